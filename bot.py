@@ -8,10 +8,16 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.types import BotCommand
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from config import BOT_TOKEN, BRANDS, ADMIN_CHAT_ID
-from database import init_db, upsert_project
+from config import BOT_TOKEN, BRANDS, ADMIN_CHAT_ID, PUBLISH_SLOTS
+from database import init_db, upsert_project, seed_competitor_channels
 from handlers import commands, generate, callbacks
 from scheduler import setup_scheduler
+from services.competitor import COMPETITOR_CHANNELS
+from services.image_queue import start_image_workers, stop_image_workers
+from services.publish_schedule import recover_scheduled_posts
+from services.publisher import recover_outbox
+from services.renditions import shutdown_renditions
+from services.translator import start_translation_workers, stop_translation_workers
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,9 +31,10 @@ async def main():
     # 1. Init database
     await init_db()
 
-    # 2. Seed brands
+    # 2. Seed brands and default competitor channels
     for project_id, data in BRANDS.items():
         await upsert_project(project_id, data)
+    await seed_competitor_channels(COMPETITOR_CHANNELS)
 
     # 3. Create bot
     bot = Bot(
@@ -41,10 +48,14 @@ async def main():
     dp.include_router(generate.router)
     dp.include_router(callbacks.router)
 
-    # 5. Setup scheduler
+    # 5. Setup scheduler (restoring publish jobs) and background workers
     scheduler = AsyncIOScheduler()
     setup_scheduler(scheduler, bot)
     scheduler.start()
+    await recover_outbox(bot)
+    await recover_scheduled_posts()
+    start_image_workers(bot)
+    start_translation_workers(bot)
 
     # 6. Set bot menu commands
     await bot.set_my_commands([
@@ -52,12 +63,16 @@ async def main():
         BotCommand(command="trends", description="Тренды дня"),
         BotCommand(command="status", description="Статистика и черновики"),
         BotCommand(command="publish", description="Опубликовать одобренные"),
-        BotCommand(command="report", description="Недельный отчёт"),
+        BotCommand(command="schedule", description="Расписание публикаций"),
+        BotCommand(command="report", description="Отчёт или статистика за период"),
+        BotCommand(command="stats", description="Вовлечённость постов"),
         BotCommand(command="competitors", description="Анализ конкурентов"),
+        BotCommand(command="competitor", description="Каналы конкурентов"),
         BotCommand(command="run_trends", description="Собрать тренды сейчас"),
         BotCommand(command="run_competitors", description="Анализ конкурентов сейчас"),
         BotCommand(command="run_report", description="Отчёт сейчас"),
         BotCommand(command="brands", description="Список брендов"),
+        BotCommand(command="sources", description="Источники трендов"),
         BotCommand(command="help", description="Справка"),
     ])
 
@@ -67,9 +82,9 @@ async def main():
         "<b>SMM Agent started</b>\n\n"
         "Расписание:\n"
         "  06:00 — мониторинг конкурентов\n"
-        "  07:00 — сбор трендов\n"
+        "  07:00 — сбор трендов (+ опрос источников в течение дня)\n"
         "  08:00 — генерация постов\n"
-        "  10:00, 14:00, 18:00 — публикация\n"
+        f"  {', '.join(PUBLISH_SLOTS)} — слоты публикации (время назначается при одобрении)\n"
         "  Пн 09:00 — недельный отчёт\n\n"
         "/help — команды",
     )
@@ -82,6 +97,9 @@ async def main():
         await dp.start_polling(bot)
     finally:
         scheduler.shutdown()
+        await stop_image_workers()
+        await stop_translation_workers()
+        shutdown_renditions()
 
 
 if __name__ == "__main__":
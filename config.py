@@ -6,6 +6,7 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = str(BASE_DIR / "smm_agent.db")
+IMAGES_DIR = BASE_DIR / "images"
 
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 CHANNEL_ID = int(os.getenv("CHANNEL_ID", "0"))
@@ -18,7 +19,110 @@ GEMINI_MODEL = "gemini-2.0-flash"
 
 TIMEZONE = "Asia/Tashkent"
 
+# Max LLM requests in flight across all workflows
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+
+# WF1: (brand, platform) generation tasks run concurrently up to this limit
+POST_GENERATION_CONCURRENCY = int(os.getenv("POST_GENERATION_CONCURRENCY", "3"))
+# One LLM call per brand returning a variant for each of its platforms
+MULTI_PLATFORM_GENERATION = os.getenv("MULTI_PLATFORM_GENERATION", "1") == "1"
+# Variants sampled per slot; the best is the draft, the rest wait in a pool.
+# Extra variants are sampled for each brand's primary (first) platform only,
+# one single-platform LLM call each (pregen included)
+POST_CANDIDATES = int(os.getenv("POST_CANDIDATES", "2"))
+# Night pre-generation of the next morning's drafts (evergreen topics + KB);
+# the 07:00 trend run only regenerates brands whose trend changes the topic
+PREGEN_ENABLED = os.getenv("PREGEN_ENABLED", "1") == "1"
+PREGEN_HOUR = int(os.getenv("PREGEN_HOUR", "3"))
+# SimHash near-duplicate guard: max Hamming distance (of 64 bits) that
+# still counts as "the same post"
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "10"))
+
+# WF4: publish slots (local time); an approved post takes the next free one
+PUBLISH_SLOTS = [
+    s.strip() for s in os.getenv("PUBLISH_SLOTS", "10:00,14:00,18:00").split(",") if s.strip()
+]
+
+# WF4 publisher: Telegram flood limits (token buckets) — messages per second
+# across all chats and messages per minute into one chat — and retries
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "20"))
+PUBLISH_RETRIES = int(os.getenv("PUBLISH_RETRIES", "3"))
+
+# Engagement metrics of published channel posts: API returning views and
+# reactions per message id (a local stand-in in tests; collection is off
+# when unset), ids per request, requests per minute, retries per request
+# and the poll tick
+METRICS_API_URL = os.getenv("METRICS_API_URL", "").rstrip("/")
+METRICS_BATCH_SIZE = int(os.getenv("METRICS_BATCH_SIZE", "50"))
+METRICS_RATE = float(os.getenv("METRICS_RATE", "30"))
+METRICS_RETRIES = int(os.getenv("METRICS_RETRIES", "2"))
+METRICS_TICK_MINUTES = int(os.getenv("METRICS_TICK_MINUTES", "10"))
+
+# Background image queue: parallel workers and retries per image
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_RETRIES = int(os.getenv("IMAGE_RETRIES", "2"))
+# Image store eviction: files older than this or beyond the size cap (LRU)
+IMAGE_STORE_MAX_AGE_DAYS = int(os.getenv("IMAGE_STORE_MAX_AGE_DAYS", "30"))
+IMAGE_STORE_MAX_MB = int(os.getenv("IMAGE_STORE_MAX_MB", "500"))
+
+# Per-platform image renditions (resize + crop + re-encode in a process pool)
+PLATFORM_RENDITIONS = {
+    "telegram": {"width": 1280, "height": 1280, "format": "JPEG"},
+    "instagram": {"width": 1080, "height": 1350, "format": "JPEG"},
+    "linkedin": {"width": 1200, "height": 627, "format": "JPEG"},
+    "facebook": {"width": 1200, "height": 630, "format": "JPEG"},
+}
+RENDITION_QUALITY = int(os.getenv("RENDITION_QUALITY", "85"))
+RENDITION_PROCESSES = int(os.getenv("RENDITION_PROCESSES", "2"))
+WATERMARK_ENABLED = os.getenv("WATERMARK_ENABLED", "0") == "1"
+WATERMARK_FONT = os.getenv("WATERMARK_FONT", "")
+
+# Local trend prefilter: candidates per brand sent to the LLM
+TREND_CANDIDATES_PER_BRAND = int(os.getenv("TREND_CANDIDATES_PER_BRAND", "5"))
+
+# Intra-day trend polling: scheduler tick and the relevance score of a new
+# item that is worth a re-analysis
+TREND_POLL_TICK_MINUTES = int(os.getenv("TREND_POLL_TICK_MINUTES", "5"))
+TREND_REANALYSIS_MIN_SCORE = float(os.getenv("TREND_REANALYSIS_MIN_SCORE", "3.0"))
+
+# Trend source registry: poll interval (minutes) and parser
+# (services.trend_monitor.PARSERS) per source
+TREND_SOURCES = [
+    {
+        "name": "Google Trends UZ",
+        "url": "https://trends.google.com/trends/trendingsearches/daily/rss?geo=UZ",
+        "interval": 60,
+        "parser": "rss_titles",
+    },
+    {
+        "name": "Google Trends RU",
+        "url": "https://trends.google.com/trends/trendingsearches/daily/rss?geo=RU",
+        "interval": 60,
+        "parser": "rss_titles",
+    },
+    {
+        "name": "vc.ru RSS",
+        "url": "https://vc.ru/rss",
+        "interval": 30,
+        "parser": "rss",
+    },
+]
+
+# Competitor feeds via RSSHub (self-hosted instances tolerate higher limits)
+RSSHUB_BASE = os.getenv("RSSHUB_BASE", "https://rsshub.app")
+COMPETITOR_FETCH_CONCURRENCY = int(os.getenv("COMPETITOR_FETCH_CONCURRENCY", "20"))
+COMPETITOR_PER_HOST_LIMIT = int(os.getenv("COMPETITOR_PER_HOST_LIMIT", "5"))
+COMPETITOR_FETCH_RETRIES = int(os.getenv("COMPETITOR_FETCH_RETRIES", "3"))
+# Map-reduce analysis: prompt budget per chunk of competitor posts
+COMPETITOR_CHUNK_TOKENS = int(os.getenv("COMPETITOR_CHUNK_TOKENS", "3000"))
+
+# Map-reduce reports: prompt budget for one brand's post excerpts (map stage)
+REPORT_BRAND_TOKENS = int(os.getenv("REPORT_BRAND_TOKENS", "3000"))
+
 # Три бренда
+# visual.concepts: stem prefix (max 6 chars, see relevance.tokenize) of a
+# Russian post term -> English image subject, for local visual prompts
 BRANDS = {
     "personal_brand": {
         "name": "Личный Бренд",
@@ -29,6 +133,28 @@ BRANDS = {
         "topics": "маркетинг, кейсы, ошибки, личная эффективность, бизнес-мышление",
         "forbidden": "агрессивные продажи, клише, хайп без пользы",
         "platforms": ["telegram", "instagram"],
+        "watermark": "@marketing365uz",
+        "visual": {
+            "colors": "warm orange and deep navy",
+            "style": "flat design illustration",
+            "motifs": ["notebook with hand-drawn charts", "glowing lightbulb", "upward arrow"],
+            "concepts": {
+                "маркет": "marketing strategy board with a sales funnel",
+                "продаж": "rising sales chart",
+                "клиент": "customer journey map",
+                "кейс": "case study folder with results charts",
+                "ошибк": "crossroads with warning signs",
+                "эффект": "tidy productive workspace",
+                "бизнес": "modern business workspace",
+                "страте": "chess pieces on a strategy board",
+                "автома": "automation gears linked into a workflow",
+                "данны": "data dashboard with charts",
+                "цифр": "data dashboard with charts",
+                "рост": "rising growth arrows",
+                "обучен": "open notebook with a lightbulb",
+                "команд": "team collaborating at a table",
+            },
+        },
     },
     "leader_team": {
         "name": "Лидер Тим",
@@ -39,6 +165,33 @@ BRANDS = {
         "topics": "решения для бизнеса, кейсы внедрения, ROI, телеком тренды",
         "forbidden": "развлекательный контент, личные темы, обещания без цифр",
         "platforms": ["telegram", "linkedin"],
+        "watermark": "@liderteamuz",
+        "visual": {
+            "colors": "corporate blue and white",
+            "style": "clean 3D render",
+            "motifs": ["server rack", "neatly routed network cables", "business handshake"],
+            "concepts": {
+                "roi": "return on investment growth chart",
+                "коммут": "network switch with glowing ports",
+                "кабел": "fiber optic cables with light trails",
+                "сетев": "network topology of connected nodes",
+                "ибп": "uninterruptible power supply units",
+                "безопа": "shield and lock over network nodes",
+                "сервер": "modern server room",
+                "телеко": "telecom tower with signal waves",
+                "связь": "telecom tower with signal waves",
+                "5g": "5G antenna array",
+                "интегр": "system integration diagram of connected modules",
+                "кейс": "case study folder with results charts",
+                "бизнес": "modern business workspace",
+                "продаж": "rising sales chart",
+                "клиент": "customer journey map",
+                "автома": "automation gears linked into a workflow",
+                "данны": "data dashboard with charts",
+                "цифр": "data dashboard with charts",
+                "рост": "rising growth arrows",
+            },
+        },
     },
     "pixie": {
         "name": "Пикси",
@@ -49,9 +202,56 @@ BRANDS = {
         "topics": "технологии, производственные стандарты, индустриальные тренды, партнёрство",
         "forbidden": "негативное сравнение с конкурентами, непроверенные заявления",
         "platforms": ["telegram", "facebook"],
+        "watermark": "Pixie",
+        "visual": {
+            "colors": "teal and graphite with neon accents",
+            "style": "isometric 3D render",
+            "motifs": ["circuit board close-up", "fiber optic light trails", "automated factory line"],
+            "concepts": {
+                "произв": "modern electronics manufacturing line",
+                "станда": "quality certification seal on hardware",
+                "сертиф": "quality certification seal on hardware",
+                "технол": "futuristic circuitry",
+                "иннова": "lightbulb made of circuits",
+                "партнё": "partners handshake over a network grid",
+                "партне": "partners handshake over a network grid",
+                "дилер": "distribution network map",
+                "телеко": "telecom tower with signal waves",
+                "связь": "telecom tower with signal waves",
+                "5g": "5G antenna array",
+                "сетев": "network topology of connected nodes",
+                "кабел": "fiber optic cables with light trails",
+                "коммут": "network switch with glowing ports",
+                "автома": "automation gears linked into a workflow",
+                "интегр": "system integration diagram of connected modules",
+            },
+        },
     },
 }
 
+# Publish targets per brand and platform: "telegram:<chat_id>" or
+# "http:<url>", set as a comma-separated list in TARGETS_<BRAND>_<PLATFORM>
+# (e.g. TARGETS_PIXIE_TELEGRAM=telegram:-100123,telegram:-100456).
+# Unset platforms without an adapter post to an HTTP endpoint when
+# PLATFORM_STANDIN_URL is set (local stand-in for testing), else to CHANNEL_ID.
+PLATFORM_STANDIN_URL = os.getenv("PLATFORM_STANDIN_URL", "").rstrip("/")
+
+
+def _targets(project_id: str, platform: str) -> list[str]:
+    configured = os.getenv(f"TARGETS_{project_id.upper()}_{platform.upper()}", "")
+    targets = [t.strip() for t in configured.split(",") if t.strip()]
+    if targets:
+        return targets
+    if platform == "telegram" or not PLATFORM_STANDIN_URL:
+        return [f"telegram:{CHANNEL_ID}"]
+    return [f"http:{PLATFORM_STANDIN_URL}/{project_id}/{platform}"]
+
+
+PUBLISH_TARGETS = {
+    pid: {p: _targets(pid, p) for p in brand["platforms"]}
+    for pid, brand in BRANDS.items()
+}
+
 BRAND_ALIASES = {
     "личный": "personal_brand",
     "личный бренд": "personal_brand",
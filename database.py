@@ -36,6 +36,25 @@ async def init_db():
                 created_at  TEXT NOT NULL
             )
         """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS trend_items (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                source      TEXT NOT NULL,
+                item_hash   TEXT NOT NULL,
+                title       TEXT NOT NULL,
+                link        TEXT,
+                seen_at     TEXT NOT NULL,
+                UNIQUE (source, item_hash)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS trend_sources (
+                name            TEXT PRIMARY KEY,
+                last_polled_at  TEXT,
+                last_new_count  INTEGER NOT NULL DEFAULT 0,
+                last_error      TEXT
+            )
+        """)
         await db.execute("""
             CREATE TABLE IF NOT EXISTS posts (
                 id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -71,6 +90,13 @@ async def init_db():
                 created_at  TEXT NOT NULL
             )
         """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS competitor_channels (
+                channel     TEXT PRIMARY KEY,
+                active      INTEGER NOT NULL DEFAULT 1,
+                added_at    TEXT NOT NULL
+            )
+        """)
         await db.execute("""
             CREATE TABLE IF NOT EXISTS competitor_insights (
                 id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -84,10 +110,191 @@ async def init_db():
                 created_at  TEXT NOT NULL
             )
         """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS competitor_posts (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel     TEXT NOT NULL,
+                post_key    TEXT NOT NULL,
+                title       TEXT,
+                description TEXT,
+                link        TEXT,
+                published_at TEXT,
+                fetched_at  TEXT NOT NULL,
+                UNIQUE (channel, post_key)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS competitor_stats (
+                date          TEXT NOT NULL,
+                channel       TEXT NOT NULL,
+                posts         INTEGER NOT NULL,
+                posts_per_day REAL,
+                avg_length    REAL,
+                media_share   REAL,
+                avg_hashtags  REAL,
+                peak_hours    TEXT,
+                top_hashtags  TEXT,
+                PRIMARY KEY (date, channel)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS post_images (
+                post_id     INTEGER PRIMARY KEY,
+                path        TEXT NOT NULL,
+                delivered   INTEGER NOT NULL DEFAULT 0,
+                created_at  TEXT NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                hash          TEXT PRIMARY KEY,
+                path          TEXT,
+                size          INTEGER NOT NULL,
+                file_id       TEXT,
+                created_at    TEXT NOT NULL,
+                last_used_at  TEXT NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS image_renditions (
+                source_hash     TEXT NOT NULL,
+                spec            TEXT NOT NULL,
+                rendition_hash  TEXT NOT NULL,
+                created_at      TEXT NOT NULL,
+                PRIMARY KEY (source_hash, spec)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS post_candidates (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                post_id     INTEGER NOT NULL,
+                rank        INTEGER NOT NULL,
+                content     TEXT NOT NULL,
+                score       REAL NOT NULL,
+                used        INTEGER NOT NULL DEFAULT 0,
+                created_at  TEXT NOT NULL
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_post_candidates_post ON post_candidates(post_id, used, rank)"
+        )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS post_fingerprints (
+                post_id     INTEGER PRIMARY KEY,
+                project_id  TEXT NOT NULL,
+                simhash     INTEGER NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                hash        TEXT PRIMARY KEY,
+                target      TEXT NOT NULL,
+                created_at  TEXT NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS publish_outbox (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                post_id     INTEGER NOT NULL,
+                target      TEXT NOT NULL,
+                status      TEXT NOT NULL DEFAULT 'pending',
+                message_id  TEXT,
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                last_error  TEXT,
+                updated_at  TEXT NOT NULL,
+                UNIQUE (post_id, target)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS post_metrics (
+                post_id     INTEGER NOT NULL,
+                sampled_at  TEXT NOT NULL,
+                views       INTEGER NOT NULL DEFAULT 0,
+                reactions   INTEGER NOT NULL DEFAULT 0,
+                forwards    INTEGER NOT NULL DEFAULT 0,
+                comments    INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (post_id, sampled_at)
+            ) WITHOUT ROWID
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                name        TEXT PRIMARY KEY,
+                value       TEXT NOT NULL,
+                updated_at  TEXT NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS report_cache (
+                stage       TEXT NOT NULL,
+                input_hash  TEXT NOT NULL,
+                output      TEXT NOT NULL,
+                created_at  TEXT NOT NULL,
+                PRIMARY KEY (stage, input_hash)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS daily_post_rollups (
+                date        TEXT NOT NULL,
+                project_id  TEXT NOT NULL,
+                platform    TEXT NOT NULL,
+                category    TEXT NOT NULL,
+                posts       INTEGER NOT NULL DEFAULT 0,
+                chars       INTEGER NOT NULL DEFAULT 0,
+                words       INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (date, project_id, platform, category)
+            )
+        """)
+        # Migrations for tables created by earlier versions
+        await _ensure_column(db, "competitor_channels", "watermark_id", "INTEGER NOT NULL DEFAULT 0")
+        await _ensure_column(db, "competitor_posts", "text_length", "INTEGER")
+        await _ensure_column(db, "competitor_posts", "has_media", "INTEGER NOT NULL DEFAULT 0")
+        await _ensure_column(db, "competitor_posts", "hashtags", "TEXT")
+        await _ensure_column(db, "post_images", "image_hash", "TEXT")
+        await _ensure_column(db, "posts", "similar_to", "INTEGER")
+        await _ensure_column(db, "posts", "scheduled_at", "TEXT")
+        await _ensure_column(db, "posts", "metrics_checked_at", "TEXT")
+        await _ensure_column(db, "knowledge_base", "source_post_ids", "TEXT")
+        # Failed publishes used to set 'error', a dead end: scheduled posts go
+        # back to approved (and get retried), the rest back to draft
+        await db.execute("""
+            UPDATE posts SET status = CASE WHEN scheduled_at IS NULL THEN 'draft' ELSE 'approved' END
+            WHERE status = 'error'
+        """)
+        await _ensure_column(db, "publish_outbox", "part_ids", "TEXT")
+        # Competitor published_at used to keep the feed's UTC offset; store
+        # naive server-local time like fetched_at
+        await db.execute("""
+            UPDATE competitor_posts
+            SET published_at = strftime('%Y-%m-%dT%H:%M:%S', published_at, 'localtime')
+            WHERE published_at GLOB '*[+-][0-9][0-9]:[0-9][0-9]'
+        """)
+        # Backfill rollups from posts published before the table existed
+        cursor = await db.execute("SELECT 1 FROM daily_post_rollups LIMIT 1")
+        if not await cursor.fetchone():
+            await db.execute(f"""
+                INSERT INTO daily_post_rollups (date, project_id, platform, category, posts, chars, words)
+                SELECT substr(published_at, 1, 10), project_id, platform, COALESCE(category, ''),
+                       COUNT(*), SUM(length(content)), SUM({_WORDS_SQL})
+                FROM posts WHERE status = 'published' AND published_at IS NOT NULL
+                GROUP BY 1, 2, 3, 4
+            """)
         await db.commit()
     logger.info("Database initialized")
 
 
+# Word count of posts.content: spaces + 1 after folding newlines to spaces
+_WORDS_SQL = (
+    "length(trim(replace(content, char(10), ' '))) "
+    "- length(replace(trim(replace(content, char(10), ' ')), ' ', '')) + 1"
+)
+
+
+async def _ensure_column(db: aiosqlite.Connection, table: str, column: str, decl: str):
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    if column not in {r[1] for r in await cursor.fetchall()}:
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
 # ── Projects ────────────────────────────────────────────────
 
 async def upsert_project(project_id: str, data: dict):
@@ -129,26 +336,89 @@ async def save_trend(date: str, project_id: str, trend: str, idea: str,
 
 
 async def get_today_trends(date: str = None) -> list[dict]:
+    """Latest trend per project for the date (intra-day re-analysis adds rows)."""
     date = date or datetime.now().strftime("%Y-%m-%d")
     async with aiosqlite.connect(DB_PATH) as db:
         db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT * FROM trends WHERE id IN (
+                SELECT MAX(id) FROM trends WHERE date = ? GROUP BY project_id
+            )
+            ORDER BY project_id
+        """, (date,))
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+# ── Trend Sources ───────────────────────────────────────────
+
+async def ingest_trend_items(source: str, items: list[dict]) -> list[dict]:
+    """Store feed items not seen before for this source. Returns only the new ones."""
+    now = datetime.now().isoformat()
+    new_items = []
+    async with aiosqlite.connect(DB_PATH) as db:
+        for item in items:
+            cursor = await db.execute("""
+                INSERT OR IGNORE INTO trend_items (source, item_hash, title, link, seen_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (source, item["hash"], item["title"], item.get("link", ""), now))
+            if cursor.rowcount:
+                new_items.append(item)
+        await db.commit()
+    return new_items
+
+
+async def get_recent_trend_titles(hours: int = 24) -> list[str]:
+    since = (datetime.now() - timedelta(hours=hours)).isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
         cursor = await db.execute(
-            "SELECT * FROM trends WHERE date = ? ORDER BY project_id", (date,)
+            "SELECT DISTINCT title FROM trend_items WHERE seen_at >= ?", (since,)
         )
-        return [dict(r) for r in await cursor.fetchall()]
+        return [r[0] for r in await cursor.fetchall()]
+
+
+async def update_trend_source_state(name: str, new_count: int, error: str = ""):
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            INSERT INTO trend_sources (name, last_polled_at, last_new_count, last_error)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                last_polled_at=excluded.last_polled_at,
+                last_new_count=excluded.last_new_count,
+                last_error=excluded.last_error
+        """, (name, now, new_count, error))
+        await db.commit()
+
+
+async def get_trend_sources_state() -> dict[str, dict]:
+    """Poll state and ingest counters per source name."""
+    day_ago = (datetime.now() - timedelta(days=1)).isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT s.name, s.last_polled_at, s.last_new_count, s.last_error,
+                   COUNT(i.id) AS total_items,
+                   COALESCE(SUM(i.seen_at >= ?), 0) AS items_24h,
+                   MAX(i.seen_at) AS last_new_at
+            FROM trend_sources s
+            LEFT JOIN trend_items i ON i.source = s.name
+            GROUP BY s.name
+        """, (day_ago,))
+        return {r["name"]: dict(r) for r in await cursor.fetchall()}
 
 
 # ── Posts ───────────────────────────────────────────────────
 
 async def create_post(project_id: str, platform: str, content: str,
-                      category: str = "trend", scheduled_date: str = None) -> int:
+                      category: str = "trend", scheduled_date: str = None,
+                      status: str = "draft") -> int:
     now = datetime.now()
     scheduled_date = scheduled_date or now.strftime("%Y-%m-%d")
     async with aiosqlite.connect(DB_PATH) as db:
         cursor = await db.execute("""
             INSERT INTO posts (project_id, platform, content, status, category, scheduled_date, created_at)
-            VALUES (?, ?, ?, 'draft', ?, ?, ?)
-        """, (project_id, platform, content, category, scheduled_date, now.isoformat()))
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (project_id, platform, content, status, category, scheduled_date, now.isoformat()))
         await db.commit()
         return cursor.lastrowid
 
@@ -161,13 +431,37 @@ async def get_post(post_id: int) -> dict | None:
         return dict(row) if row else None
 
 
-async def update_post_status(post_id: int, status: str):
+async def update_post_status(post_id: int, status: str, targets: list[str] = ()):
+    """Set a post's status; publishing also adds it to its day's rollup row.
+
+    Approving writes the post's publish_outbox rows (one per target) in the
+    same transaction, so an approved post always has its outbox.
+    """
     async with aiosqlite.connect(DB_PATH) as db:
-        if status == "published":
+        if status == "approved" and targets:
             await db.execute(
-                "UPDATE posts SET status = ?, published_at = ? WHERE id = ?",
-                (status, datetime.now().isoformat(), post_id)
+                "UPDATE posts SET status = ? WHERE id = ?", (status, post_id)
+            )
+            await db.executemany("""
+                INSERT OR IGNORE INTO publish_outbox (post_id, target, status, updated_at)
+                VALUES (?, ?, 'pending', ?)
+            """, [(post_id, t, datetime.now().isoformat()) for t in targets])
+        elif status == "published":
+            cursor = await db.execute(
+                "UPDATE posts SET status = ?, published_at = ? WHERE id = ? AND status != ?",
+                (status, datetime.now().isoformat(), post_id, status)
             )
+            if cursor.rowcount:
+                await db.execute(f"""
+                    INSERT INTO daily_post_rollups (date, project_id, platform, category, posts, chars, words)
+                    SELECT substr(published_at, 1, 10), project_id, platform, COALESCE(category, ''),
+                           1, length(content), {_WORDS_SQL}
+                    FROM posts WHERE id = ?
+                    ON CONFLICT (date, project_id, platform, category) DO UPDATE SET
+                        posts = posts + excluded.posts,
+                        chars = chars + excluded.chars,
+                        words = words + excluded.words
+                """, (post_id,))
         else:
             await db.execute(
                 "UPDATE posts SET status = ? WHERE id = ?", (status, post_id)
@@ -197,6 +491,350 @@ async def set_post_channel_message_id(post_id: int, message_id: int):
         await db.commit()
 
 
+async def save_post_image(post_id: int, image_hash: str, path: str):
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            INSERT OR REPLACE INTO post_images (post_id, path, image_hash, delivered, created_at)
+            VALUES (?, ?, ?, 0, ?)
+        """, (post_id, path, image_hash, now))
+        await db.commit()
+
+
+async def get_post_image(post_id: int) -> dict | None:
+    """Post image link joined with the stored blob (hash, path, file_id)."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT pi.post_id, pi.delivered, pi.image_hash,
+                   COALESCE(i.path, CASE WHEN pi.image_hash IS NULL THEN pi.path END) AS path,
+                   i.file_id
+            FROM post_images pi
+            LEFT JOIN images i ON i.hash = pi.image_hash
+            WHERE pi.post_id = ?
+        """, (post_id,))
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+
+async def mark_post_image_delivered(post_id: int):
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("UPDATE post_images SET delivered = 1 WHERE post_id = ?", (post_id,))
+        await db.commit()
+
+
+async def set_post_similar_to(post_id: int, similar_to: int | None):
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute(
+            "UPDATE posts SET similar_to = ? WHERE id = ?", (similar_to, post_id)
+        )
+        await db.commit()
+
+
+# ── Post Fingerprints ───────────────────────────────────────
+
+async def save_post_fingerprints(rows: list[tuple[int, str, int]]):
+    """Upsert (post_id, project_id, simhash) rows; simhash as signed 64-bit."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany("""
+            INSERT OR REPLACE INTO post_fingerprints (post_id, project_id, simhash)
+            VALUES (?, ?, ?)
+        """, rows)
+        await db.commit()
+
+
+async def get_post_fingerprints() -> list[tuple[int, str, int]]:
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("SELECT post_id, project_id, simhash FROM post_fingerprints")
+        return [tuple(r) for r in await cursor.fetchall()]
+
+
+async def delete_post_fingerprints(post_ids: list[int]):
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany(
+            "DELETE FROM post_fingerprints WHERE post_id = ?", [(pid,) for pid in post_ids]
+        )
+        await db.commit()
+
+
+async def get_posts_without_fingerprint() -> list[dict]:
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT p.id, p.project_id, p.content FROM posts p
+            LEFT JOIN post_fingerprints f ON f.post_id = p.id
+            WHERE f.post_id IS NULL AND p.status != 'superseded'
+        """)
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+# ── Publish Outbox ──────────────────────────────────────────
+
+async def create_outbox_entries(post_id: int, targets: list[str]):
+    """One pending row per target; existing rows (any status) are kept as is."""
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany("""
+            INSERT OR IGNORE INTO publish_outbox (post_id, target, status, updated_at)
+            VALUES (?, ?, 'pending', ?)
+        """, [(post_id, t, now) for t in targets])
+        await db.commit()
+
+
+async def get_outbox_entries(post_ids: list[int]) -> list[dict]:
+    if not post_ids:
+        return []
+    placeholders = ",".join("?" * len(post_ids))
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            f"SELECT * FROM publish_outbox WHERE post_id IN ({placeholders}) ORDER BY id",
+            post_ids,
+        )
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def claim_outbox_entry(entry_id: int) -> bool:
+    """pending -> sending; False if another run got there first."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("""
+            UPDATE publish_outbox
+            SET status = 'sending', attempts = attempts + 1, updated_at = ?
+            WHERE id = ? AND status = 'pending'
+        """, (datetime.now().isoformat(), entry_id))
+        await db.commit()
+        return cursor.rowcount == 1
+
+
+async def finish_outbox_entry(entry_id: int, message_id: str = None, error: str = None):
+    """sending -> sent (with the target's message id) or error."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            UPDATE publish_outbox
+            SET status = ?, message_id = ?, last_error = ?, updated_at = ?
+            WHERE id = ?
+        """, ("error" if error else "sent", message_id, error,
+              datetime.now().isoformat(), entry_id))
+        await db.commit()
+
+
+async def save_outbox_progress(entry_id: int, part_ids: list[str]):
+    """Message ids of the parts of a multi-part send delivered so far."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute(
+            "UPDATE publish_outbox SET part_ids = ?, updated_at = ? WHERE id = ?",
+            (",".join(part_ids), datetime.now().isoformat(), entry_id),
+        )
+        await db.commit()
+
+
+async def retry_outbox_errors(post_ids: list[int]):
+    """error -> pending. Interrupted sends are terminal and never retried."""
+    placeholders = ",".join("?" * len(post_ids))
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute(f"""
+            UPDATE publish_outbox SET status = 'pending'
+            WHERE status = 'error' AND post_id IN ({placeholders})
+        """, post_ids)
+        await db.commit()
+
+
+async def fail_interrupted_outbox() -> int:
+    """Rows left 'sending' by a crash may or may not have gone out: mark them
+    'interrupted', a terminal status that is never resent."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("""
+            UPDATE publish_outbox
+            SET status = 'interrupted', last_error = 'interrupted while sending', updated_at = ?
+            WHERE status = 'sending'
+        """, (datetime.now().isoformat(),))
+        await db.commit()
+        return cursor.rowcount
+
+
+async def get_failed_outbox_attempts(post_id: int) -> int:
+    """Most attempts among a post's targets still in error (0 if none)."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT MAX(attempts) FROM publish_outbox WHERE post_id = ? AND status = 'error'",
+            (post_id,),
+        )
+        row = await cursor.fetchone()
+        return row[0] or 0
+
+
+async def get_interrupted_outbox() -> list[dict]:
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            "SELECT * FROM publish_outbox WHERE status = 'interrupted' ORDER BY id"
+        )
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def get_outbox_entry(entry_id: int) -> dict | None:
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("SELECT * FROM publish_outbox WHERE id = ?", (entry_id,))
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+
+async def resolve_interrupted_outbox(entry_id: int, resend: bool = False,
+                                     message_id: str = None) -> bool:
+    """interrupted -> sent (the target has the post) or, with `resend`, back
+    to pending; recorded part_ids are kept so delivered parts are skipped.
+    False if the row is no longer interrupted."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("""
+            UPDATE publish_outbox
+            SET status = ?, message_id = COALESCE(?, message_id), last_error = NULL,
+                updated_at = ?
+            WHERE id = ? AND status = 'interrupted'
+        """, ("pending" if resend else "sent", message_id,
+              datetime.now().isoformat(), entry_id))
+        await db.commit()
+        return cursor.rowcount == 1
+
+
+# ── Post Candidates ─────────────────────────────────────────
+
+async def save_post_candidates(post_id: int, candidates: list[tuple[str, float]]):
+    """Store runner-up variants of a post, best first."""
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany("""
+            INSERT INTO post_candidates (post_id, rank, content, score, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(post_id, rank, content, score, now)
+              for rank, (content, score) in enumerate(candidates, 1)])
+        await db.commit()
+
+
+async def pop_post_candidate(post_id: int) -> dict | None:
+    """Take the best unused candidate of a post and mark it used."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT * FROM post_candidates
+            WHERE post_id = ? AND used = 0
+            ORDER BY rank LIMIT 1
+        """, (post_id,))
+        row = await cursor.fetchone()
+        if not row:
+            return None
+        await db.execute("UPDATE post_candidates SET used = 1 WHERE id = ?", (row["id"],))
+        await db.commit()
+        return dict(row)
+
+
+async def count_post_candidates(post_id: int) -> int:
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT COUNT(*) FROM post_candidates WHERE post_id = ? AND used = 0", (post_id,)
+        )
+        return (await cursor.fetchone())[0]
+
+
+# ── Image Store ─────────────────────────────────────────────
+
+async def upsert_image(image_hash: str, path: str, size: int):
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            INSERT INTO images (hash, path, size, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(hash) DO UPDATE SET path = excluded.path, last_used_at = excluded.last_used_at
+        """, (image_hash, path, size, now, now))
+        await db.commit()
+
+
+async def get_image(image_hash: str) -> dict | None:
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("SELECT * FROM images WHERE hash = ?", (image_hash,))
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+
+async def set_image_file_id(image_hash: str, file_id: str):
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute(
+            "UPDATE images SET file_id = ?, last_used_at = ? WHERE hash = ?",
+            (file_id, datetime.now().isoformat(), image_hash),
+        )
+        await db.commit()
+
+
+async def touch_image(image_hash: str):
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute(
+            "UPDATE images SET last_used_at = ? WHERE hash = ?",
+            (datetime.now().isoformat(), image_hash),
+        )
+        await db.commit()
+
+
+async def get_rendition(source_hash: str, spec: str) -> dict | None:
+    """Cached rendition of a source image, joined with its stored blob."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT i.hash AS image_hash, i.path, i.file_id
+            FROM image_renditions r JOIN images i ON i.hash = r.rendition_hash
+            WHERE r.source_hash = ? AND r.spec = ?
+        """, (source_hash, spec))
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+
+async def save_rendition(source_hash: str, spec: str, rendition_hash: str):
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            INSERT OR REPLACE INTO image_renditions (source_hash, spec, rendition_hash, created_at)
+            VALUES (?, ?, ?, ?)
+        """, (source_hash, spec, rendition_hash, now))
+        await db.commit()
+
+
+async def get_stored_images() -> list[dict]:
+    """Images still on disk, least recently used first."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            "SELECT * FROM images WHERE path IS NOT NULL ORDER BY last_used_at"
+        )
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def mark_images_evicted(hashes: list[str]):
+    """Forget local paths; rows (and Telegram file_ids) are kept for reuse."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany(
+            "UPDATE images SET path = NULL WHERE hash = ?", [(h,) for h in hashes]
+        )
+        await db.commit()
+
+
+async def get_pregen_posts(date: str) -> list[dict]:
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            "SELECT * FROM posts WHERE status = 'pregen' AND scheduled_date = ? ORDER BY id",
+            (date,),
+        )
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def set_posts_status(post_ids: list[int], status: str):
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany(
+            "UPDATE posts SET status = ? WHERE id = ?", [(status, pid) for pid in post_ids]
+        )
+        await db.commit()
+
+
 async def get_approved_posts(date: str = None) -> list[dict]:
     date = date or datetime.now().strftime("%Y-%m-%d")
     async with aiosqlite.connect(DB_PATH) as db:
@@ -207,6 +845,41 @@ async def get_approved_posts(date: str = None) -> list[dict]:
         return [dict(r) for r in await cursor.fetchall()]
 
 
+async def set_post_scheduled_at(post_id: int, scheduled_at: str | None):
+    """Exact publish time (local ISO, minute precision); keeps scheduled_date in sync."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        if scheduled_at:
+            await db.execute(
+                "UPDATE posts SET scheduled_at = ?, scheduled_date = ? WHERE id = ?",
+                (scheduled_at, scheduled_at[:10], post_id),
+            )
+        else:
+            await db.execute("UPDATE posts SET scheduled_at = NULL WHERE id = ?", (post_id,))
+        await db.commit()
+
+
+async def get_scheduled_posts() -> list[dict]:
+    """Approved posts, earliest publish time first (unscheduled ones last)."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT id, project_id, platform, scheduled_at FROM posts
+            WHERE status = 'approved'
+            ORDER BY scheduled_at IS NULL, scheduled_at, id
+        """)
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def get_taken_slots(since: str) -> set[str]:
+    """Publish times already used by approved or published posts from `since` on."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("""
+            SELECT scheduled_at FROM posts
+            WHERE status IN ('approved', 'published') AND scheduled_at >= ?
+        """, (since,))
+        return {r[0] for r in await cursor.fetchall()}
+
+
 async def get_drafts() -> list[dict]:
     async with aiosqlite.connect(DB_PATH) as db:
         db.row_factory = aiosqlite.Row
@@ -238,28 +911,197 @@ async def get_posts_stats() -> dict:
         return stats
 
 
-async def get_published_posts_for_week() -> list[dict]:
-    week_ago = (datetime.now() - timedelta(days=7)).isoformat()
+async def get_published_post_excerpts(start: str, end: str, chars: int = 150) -> list[dict]:
+    """Published posts of [start, end] (dates), with only the first `chars` of content."""
     async with aiosqlite.connect(DB_PATH) as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute("""
-            SELECT * FROM posts
-            WHERE status = 'published' AND published_at >= ?
+            SELECT id, project_id, platform, published_at, substr(content, 1, ?) AS excerpt
+            FROM posts
+            WHERE status = 'published' AND substr(published_at, 1, 10) BETWEEN ? AND ?
+            ORDER BY published_at DESC
+        """, (chars, start, end))
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def get_published_posts_after(after: str, chars: int = 150) -> list[dict]:
+    """Published posts with published_at after a timestamp, newest first,
+    with only the first `chars` of content."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT id, project_id, platform, published_at, substr(content, 1, ?) AS excerpt
+            FROM posts
+            WHERE status = 'published' AND published_at > ?
             ORDER BY published_at DESC
-        """, (week_ago,))
+        """, (chars, after))
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+# ── Post Metrics ────────────────────────────────────────────
+
+METRIC_FIELDS = ("views", "reactions", "forwards", "comments")
+
+
+async def get_posts_for_metrics(since: str) -> list[dict]:
+    """Published posts with a channel message, published at or after `since`.
+
+    `target` is the Telegram outbox target holding message_id (NULL for
+    posts published before the outbox, which went to CHANNEL_ID).
+    """
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT p.id, p.message_id, p.published_at, p.metrics_checked_at,
+                   (SELECT o.target FROM publish_outbox o
+                    WHERE o.post_id = p.id AND o.target LIKE 'telegram:%'
+                      AND o.message_id = CAST(p.message_id AS TEXT)
+                    LIMIT 1) AS target
+            FROM posts p
+            WHERE p.status = 'published' AND p.message_id IS NOT NULL AND p.published_at >= ?
+        """, (since,))
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def save_post_metrics(samples: dict[int, dict], checked_ids: list[int]) -> int:
+    """Store samples that differ from each post's latest one; mark posts checked.
+
+    Returns the number of samples written.
+    """
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        latest = {}
+        if samples:
+            placeholders = ",".join("?" * len(samples))
+            cursor = await db.execute(f"""
+                SELECT post_id, {", ".join(METRIC_FIELDS)} FROM post_metrics m
+                WHERE post_id IN ({placeholders})
+                  AND sampled_at = (SELECT MAX(sampled_at) FROM post_metrics WHERE post_id = m.post_id)
+            """, list(samples))
+            latest = {r[0]: tuple(r[1:]) for r in await cursor.fetchall()}
+
+        rows = []
+        for post_id, sample in samples.items():
+            values = tuple(int(sample.get(f) or 0) for f in METRIC_FIELDS)
+            if latest.get(post_id) != values:
+                rows.append((post_id, now, *values))
+        await db.executemany(f"""
+            INSERT OR REPLACE INTO post_metrics (post_id, sampled_at, {", ".join(METRIC_FIELDS)})
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        await db.executemany(
+            "UPDATE posts SET metrics_checked_at = ? WHERE id = ?", [(now, pid) for pid in checked_ids]
+        )
+        await db.commit()
+        return len(rows)
+
+
+async def aggregate_post_engagement(start: str, end: str, hour_shift: str) -> list[dict]:
+    """Views and interactions (latest sample per post) of posts published in
+    [start, end] (dates), grouped by project, platform, category, weekday and hour.
+    er_posts, er_sum and er_sq_sum are the count, sum and sum of squares of
+    the per-post ERs (posts with views only), for per-post significance tests.
+
+    hour_shift is an SQLite modifier converting published_at (server local
+    time) to TIMEZONE; weekday is 0 = Sunday as in strftime('%w').
+    """
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT p.project_id, p.platform, COALESCE(p.category, '') AS category,
+                   CAST(strftime('%w', p.published_at, ?) AS INTEGER) AS weekday,
+                   CAST(strftime('%H', p.published_at, ?) AS INTEGER) AS hour,
+                   COUNT(*) AS posts, SUM(m.views) AS views,
+                   SUM(m.interactions) AS interactions,
+                   COUNT(m.er) AS er_posts, COALESCE(SUM(m.er), 0) AS er_sum,
+                   COALESCE(SUM(m.er * m.er), 0) AS er_sq_sum
+            FROM posts p
+            JOIN (
+                SELECT post_id, sampled_at, views,
+                       reactions + forwards + comments AS interactions,
+                       CAST(reactions + forwards + comments AS REAL) / NULLIF(views, 0) AS er
+                FROM post_metrics
+            ) m ON m.post_id = p.id AND m.sampled_at = (
+                SELECT MAX(sampled_at) FROM post_metrics WHERE post_id = p.id
+            )
+            WHERE p.status = 'published' AND substr(p.published_at, 1, 10) BETWEEN ? AND ?
+            GROUP BY 1, 2, 3, 4, 5
+        """, (hour_shift, hour_shift, start, end))
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+# ── Post Rollups ────────────────────────────────────────────
+
+async def get_post_rollups(start: str, end: str) -> list[dict]:
+    """Published-post totals per project/platform/category for [start, end] (dates)."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT project_id, platform, category, SUM(posts) AS posts,
+                   SUM(chars) AS chars, SUM(words) AS words, COUNT(DISTINCT date) AS days
+            FROM daily_post_rollups
+            WHERE date BETWEEN ? AND ?
+            GROUP BY project_id, platform, category
+            ORDER BY project_id, platform, category
+        """, (start, end))
         return [dict(r) for r in await cursor.fetchall()]
 
 
+# ── Translations ────────────────────────────────────────────
+
+async def get_translations(hashes: list[str]) -> dict[str, str]:
+    if not hashes:
+        return {}
+    placeholders = ",".join("?" * len(hashes))
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            f"SELECT hash, target FROM translations WHERE hash IN ({placeholders})", hashes
+        )
+        return {h: t for h, t in await cursor.fetchall()}
+
+
+async def save_translations(rows: dict[str, str]):
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany(
+            "INSERT OR REPLACE INTO translations (hash, target, created_at) VALUES (?, ?, ?)",
+            [(h, t, now) for h, t in rows.items()],
+        )
+        await db.commit()
+
+
 # ── Knowledge Base ──────────────────────────────────────────
 
 async def add_insight(project_id: str, insight_type: str, insight: str,
-                      evidence: str = ""):
+                      evidence: str = "", source_post_ids: list[int] = ()):
     now = datetime.now().isoformat()
+    sources = ",".join(str(i) for i in source_post_ids) or None
     async with aiosqlite.connect(DB_PATH) as db:
         await db.execute("""
-            INSERT INTO knowledge_base (project_id, type, insight, evidence, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (project_id, insight_type, insight, evidence, now))
+            INSERT INTO knowledge_base (project_id, type, insight, evidence, source_post_ids, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (project_id, insight_type, insight, evidence, sources, now))
+        await db.commit()
+
+
+async def add_insights_with_watermark(insights: list[dict], watermark_name: str,
+                                      watermark: str):
+    """Store insights ({project_id, type, insight, evidence, source_post_ids})
+    and advance a watermark in one transaction."""
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany("""
+            INSERT INTO knowledge_base (project_id, type, insight, evidence, source_post_ids, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (i["project_id"], i["type"], i["insight"], i["evidence"],
+             ",".join(str(pid) for pid in i["source_post_ids"]) or None, now)
+            for i in insights
+        ])
+        await db.execute(
+            "INSERT OR REPLACE INTO watermarks (name, value, updated_at) VALUES (?, ?, ?)",
+            (watermark_name, watermark, now),
+        )
         await db.commit()
 
 
@@ -280,6 +1122,16 @@ async def get_insights(project_id: str = None, limit: int = 10) -> list[dict]:
         return [dict(r) for r in await cursor.fetchall()]
 
 
+# ── Watermarks ──────────────────────────────────────────────
+
+async def get_watermark(name: str) -> str:
+    """Processing watermark of a job ("" before its first run)."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("SELECT value FROM watermarks WHERE name = ?", (name,))
+        row = await cursor.fetchone()
+        return row[0] if row else ""
+
+
 # ── Reports ─────────────────────────────────────────────────
 
 async def save_report(week_start: str, week_end: str, content: str) -> int:
@@ -303,6 +1155,192 @@ async def get_latest_report() -> dict | None:
         return dict(row) if row else None
 
 
+async def get_report_cache(stage: str, input_hash: str) -> str | None:
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT output FROM report_cache WHERE stage = ? AND input_hash = ?", (stage, input_hash)
+        )
+        row = await cursor.fetchone()
+        return row[0] if row else None
+
+
+async def save_report_cache(stage: str, input_hash: str, output: str, keep_days: int = 60):
+    """Store a stage output; entries older than keep_days are dropped."""
+    now = datetime.now()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute(
+            "INSERT OR REPLACE INTO report_cache (stage, input_hash, output, created_at) VALUES (?, ?, ?, ?)",
+            (stage, input_hash, output, now.isoformat()),
+        )
+        await db.execute(
+            "DELETE FROM report_cache WHERE created_at < ?",
+            ((now - timedelta(days=keep_days)).isoformat(),),
+        )
+        await db.commit()
+
+
+# ── Competitor Channels ─────────────────────────────────────
+
+async def seed_competitor_channels(channels: list[str]):
+    """Insert default channels only on first run, so removals stick."""
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        c = await db.execute("SELECT COUNT(*) FROM competitor_channels")
+        if (await c.fetchone())[0]:
+            return
+        await db.executemany(
+            "INSERT INTO competitor_channels (channel, added_at) VALUES (?, ?)",
+            [(ch, now) for ch in channels],
+        )
+        await db.commit()
+
+
+async def add_competitor_channel(channel: str):
+    now = datetime.now().isoformat()
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute("""
+            INSERT INTO competitor_channels (channel, added_at) VALUES (?, ?)
+            ON CONFLICT(channel) DO UPDATE SET active = 1
+        """, (channel, now))
+        await db.commit()
+
+
+async def remove_competitor_channel(channel: str) -> bool:
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "UPDATE competitor_channels SET active = 0 WHERE channel = ? AND active = 1",
+            (channel,),
+        )
+        await db.commit()
+        return cursor.rowcount > 0
+
+
+async def get_competitor_channels() -> list[str]:
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT channel FROM competitor_channels WHERE active = 1 ORDER BY channel"
+        )
+        return [r[0] for r in await cursor.fetchall()]
+
+
+# ── Competitor Posts ────────────────────────────────────────
+
+async def store_competitor_posts(posts: list[dict]) -> int:
+    """Insert posts not seen before (by channel + key). Returns number of new rows."""
+    now = datetime.now().isoformat()
+    new_count = 0
+    async with aiosqlite.connect(DB_PATH) as db:
+        for p in posts:
+            cursor = await db.execute("""
+                INSERT OR IGNORE INTO competitor_posts
+                    (channel, post_key, title, description, link, published_at, fetched_at,
+                     text_length, has_media, hashtags)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                p["source"], p["key"], p["title"], p.get("description", ""),
+                p.get("link", ""), p.get("published_at"), now,
+                p.get("text_length", 0), int(p.get("has_media", False)),
+                " ".join(p.get("hashtags", [])),
+            ))
+            new_count += cursor.rowcount
+        await db.commit()
+    return new_count
+
+
+async def get_unanalyzed_competitor_posts() -> list[dict]:
+    """Posts above their channel's watermark, i.e. not yet sent to analysis."""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT p.* FROM competitor_posts p
+            JOIN competitor_channels c ON c.channel = p.channel
+            WHERE c.active = 1 AND p.id > c.watermark_id
+            ORDER BY p.id
+        """)
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def advance_competitor_watermarks(watermarks: dict[str, int]):
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany(
+            "UPDATE competitor_channels SET watermark_id = MAX(watermark_id, ?) WHERE channel = ?",
+            [(post_id, channel) for channel, post_id in watermarks.items()],
+        )
+        await db.commit()
+
+
+async def aggregate_competitor_posts(since: str, hour_shift: str) -> tuple[list[dict], list[dict]]:
+    """Per-channel aggregates and per-channel hour histogram since a timestamp,
+    for active channels only.
+
+    Timestamps are stored as naive server-local time; hour_shift is an
+    SQLite modifier ("+300 minutes") converting them to TIMEZONE.
+    """
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT channel,
+                   COUNT(*) AS posts,
+                   MIN(COALESCE(published_at, fetched_at)) AS first_at,
+                   AVG(text_length) AS avg_length,
+                   AVG(has_media) AS media_share,
+                   AVG(CASE WHEN hashtags IS NULL OR hashtags = '' THEN 0
+                            ELSE LENGTH(hashtags) - LENGTH(REPLACE(hashtags, ' ', '')) + 1
+                       END) AS avg_hashtags,
+                   GROUP_CONCAT(NULLIF(hashtags, ''), ' ') AS all_hashtags
+            FROM competitor_posts
+            JOIN competitor_channels USING (channel)
+            WHERE competitor_channels.active = 1 AND COALESCE(published_at, fetched_at) >= ?
+            GROUP BY channel
+        """, (since,))
+        totals = [dict(r) for r in await cursor.fetchall()]
+        cursor = await db.execute("""
+            SELECT channel, CAST(strftime('%H', published_at, ?) AS INTEGER) AS hour,
+                   COUNT(*) AS posts
+            FROM competitor_posts
+            JOIN competitor_channels USING (channel)
+            WHERE competitor_channels.active = 1
+              AND published_at IS NOT NULL AND published_at >= ?
+            GROUP BY channel, hour
+        """, (hour_shift, since))
+        hours = [dict(r) for r in await cursor.fetchall()]
+    return totals, hours
+
+
+async def save_competitor_stats(date: str, stats: list[dict]):
+    import json
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.executemany("""
+            INSERT OR REPLACE INTO competitor_stats
+                (date, channel, posts, posts_per_day, avg_length, media_share,
+                 avg_hashtags, peak_hours, top_hashtags)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(
+            date, st["channel"], st["posts"], st["posts_per_day"], st["avg_length"],
+            st["media_share"], st["avg_hashtags"],
+            json.dumps(st["peak_hours"]), json.dumps(st["top_hashtags"], ensure_ascii=False),
+        ) for st in stats])
+        await db.commit()
+
+
+async def get_latest_competitor_stats() -> list[dict]:
+    import json
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("""
+            SELECT competitor_stats.* FROM competitor_stats
+            JOIN competitor_channels USING (channel)
+            WHERE competitor_channels.active = 1
+              AND date = (SELECT MAX(date) FROM competitor_stats)
+            ORDER BY posts_per_day DESC
+        """)
+        rows = [dict(r) for r in await cursor.fetchall()]
+    for r in rows:
+        r["peak_hours"] = json.loads(r["peak_hours"] or "[]")
+        r["top_hashtags"] = json.loads(r["top_hashtags"] or "[]")
+    return rows
+
+
 # ── Competitor Insights ─────────────────────────────────────
 
 async def save_competitor_insight(date: str, analysis: dict, raw_data: str = ""):
@@ -5,10 +5,22 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from config import ADMIN_CHAT_ID, CHANNEL_ID
-from database import get_post, update_post_status, update_post_content, set_post_channel_message_id
-from keyboards import approved_keyboard, rejected_keyboard, draft_keyboard, published_keyboard
-from utils import format_post_card
+from config import ADMIN_CHAT_ID
+from database import (
+    get_post, update_post_status, update_post_content,
+    pop_post_candidate, count_post_candidates, set_post_similar_to,
+    get_outbox_entry, get_outbox_entries, resolve_interrupted_outbox,
+)
+from keyboards import (
+    approved_keyboard, rejected_keyboard, draft_keyboard, published_keyboard,
+    interrupted_keyboard,
+)
+from services.notifier import refresh_draft_card
+from services.publish_schedule import schedule_post, unschedule_post, publish_or_retry
+from services.publisher import targets_for, complete_if_sent
+from services.similarity import find_similar, index_post
+from services.translator import SEPARATOR, enqueue_translation, ensure_translation
+from utils import format_post_card, format_slot
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -34,19 +46,20 @@ async def cb_approve(callback: CallbackQuery):
         await callback.answer(f"Пост уже {post['status']}.", show_alert=True)
         return
 
-    await update_post_status(post_id, "approved")
+    await update_post_status(post_id, "approved", targets_for(post))
+    run_at = await schedule_post(post_id)
     post = await get_post(post_id)
     card = format_post_card(post)
 
     try:
         await callback.message.edit_text(
             text=card,
-            reply_markup=approved_keyboard(post_id),
+            reply_markup=approved_keyboard(post_id, post["scheduled_at"]),
         )
     except Exception:
         pass
 
-    await callback.answer("Одобрено! Будет опубликован по расписанию.")
+    await callback.answer(f"Одобрено! Публикация {format_slot(run_at.isoformat())}.")
     logger.info(f"Post #{post_id} approved")
 
 
@@ -63,13 +76,15 @@ async def cb_reject(callback: CallbackQuery):
         return
 
     await update_post_status(post_id, "rejected")
+    await unschedule_post(post_id)
     post = await get_post(post_id)
     card = format_post_card(post)
+    candidates = await count_post_candidates(post_id)
 
     try:
         await callback.message.edit_text(
             text=card,
-            reply_markup=rejected_keyboard(post_id),
+            reply_markup=rejected_keyboard(post_id, candidates),
         )
     except Exception:
         pass
@@ -78,6 +93,55 @@ async def cb_reject(callback: CallbackQuery):
     logger.info(f"Post #{post_id} rejected")
 
 
+@router.callback_query(F.data.startswith("next:"))
+async def cb_next_candidate(callback: CallbackQuery):
+    """Swap in the next pre-generated variant; the post becomes a draft again."""
+    if callback.from_user.id != ADMIN_CHAT_ID:
+        await callback.answer("Только админ.", show_alert=True)
+        return
+
+    post_id = int(callback.data.split(":")[1])
+    post = await get_post(post_id)
+    if not post:
+        await callback.answer("Пост не найден.", show_alert=True)
+        return
+
+    if post["status"] not in ("draft", "rejected"):
+        await callback.answer(f"Пост уже {post['status']}.", show_alert=True)
+        return
+
+    candidate = await pop_post_candidate(post_id)
+    if not candidate:
+        await callback.answer("Других вариантов нет.", show_alert=True)
+        return
+
+    await update_post_content(post_id, candidate["content"])
+    await update_post_status(post_id, "draft")
+    await _refresh_similarity(post, candidate["content"])
+    enqueue_translation(post_id, candidate["content"])
+    post = await get_post(post_id)
+    card = format_post_card(post)
+    candidates = await count_post_candidates(post_id)
+
+    try:
+        await callback.message.edit_text(
+            text=card,
+            reply_markup=draft_keyboard(post_id, candidates),
+        )
+    except Exception:
+        pass
+
+    await callback.answer(f"Вариант {candidate['rank'] + 1}. Осталось: {candidates}")
+    logger.info(f"Post #{post_id} switched to candidate {candidate['rank']}")
+
+
+async def _refresh_similarity(post: dict, content: str):
+    """Re-check and re-index a post whose text was replaced."""
+    match = await find_similar(post["project_id"], content, exclude={post["id"]})
+    await set_post_similar_to(post["id"], match[0] if match else None)
+    await index_post(post["project_id"], post["id"], content)
+
+
 @router.callback_query(F.data.startswith("edit:"))
 async def cb_edit(callback: CallbackQuery, state: FSMContext):
     if callback.from_user.id != ADMIN_CHAT_ID:
@@ -115,7 +179,14 @@ async def process_edit(message: Message, state: FSMContext, bot: Bot):
 
     await update_post_content(post_id, message.text)
     post = await get_post(post_id)
+    if post:
+        await _refresh_similarity(post, message.text)
+        if SEPARATOR not in message.text:
+            # Russian-only edit: translate it again before it can be published
+            enqueue_translation(post_id, message.text)
+        post = await get_post(post_id)
     card = format_post_card(post)
+    candidates = await count_post_candidates(post_id)
 
     # Update the original draft message
     if edit_msg_id:
@@ -124,7 +195,7 @@ async def process_edit(message: Message, state: FSMContext, bot: Bot):
                 chat_id=ADMIN_CHAT_ID,
                 message_id=edit_msg_id,
                 text=card,
-                reply_markup=draft_keyboard(post_id),
+                reply_markup=draft_keyboard(post_id, candidates),
             )
         except Exception:
             pass
@@ -150,27 +221,74 @@ async def cb_publish_now(callback: CallbackQuery, bot: Bot):
         await callback.answer("Уже опубликован.", show_alert=True)
         return
 
-    # Publish to channel
+    if not ensure_translation(post):
+        await callback.answer("Перевод ещё готовится, опубликуйте через минуту.", show_alert=True)
+        return
+
+    # Publish to every target; targets that already have the post are skipped
+    published, retry_at = await publish_or_retry(bot, post)
+    if not published:
+        retry = f" Повтор {format_slot(retry_at.isoformat())}." if retry_at else ""
+        await callback.answer(
+            "Опубликовано не во все каналы, подробности в логах." + retry, show_alert=True,
+        )
+        return
+
+    post = await get_post(post_id)
+    card = format_post_card(post)
     try:
-        msg = await bot.send_message(chat_id=CHANNEL_ID, text=post["content"])
-        await update_post_status(post_id, "published")
-        await set_post_channel_message_id(post_id, msg.message_id)
+        await callback.message.edit_text(
+            text=card,
+            reply_markup=published_keyboard(post_id),
+        )
+    except Exception:
+        pass
 
-        post = await get_post(post_id)
-        card = format_post_card(post)
-        try:
-            await callback.message.edit_text(
-                text=card,
-                reply_markup=published_keyboard(post_id),
-            )
-        except Exception:
-            pass
+    await callback.answer("Опубликовано!")
+    logger.info(f"Post #{post_id} published now")
+
+
+@router.callback_query(F.data.startswith(("outbox_sent:", "outbox_resend:")))
+async def cb_outbox_resolve(callback: CallbackQuery, bot: Bot):
+    """Admin decision on a send a crash interrupted: the target has the post
+    (mark sent) or it does not (resend now)."""
+    if callback.from_user.id != ADMIN_CHAT_ID:
+        await callback.answer("Только админ.", show_alert=True)
+        return
+
+    action, entry_id = callback.data.split(":")
+    resend = action == "outbox_resend"
+    entry = await get_outbox_entry(int(entry_id))
+    if not entry or not await resolve_interrupted_outbox(entry["id"], resend=resend):
+        await callback.answer("Уже решено.", show_alert=True)
+        return
+    post_id = entry["post_id"]
+
+    if resend:
+        published, _ = await publish_or_retry(bot, await get_post(post_id))
+    else:
+        published = await complete_if_sent(post_id)
+        if published:
+            await unschedule_post(post_id)
+
+    remaining = [
+        e for e in await get_outbox_entries([post_id]) if e["status"] == "interrupted"
+    ]
+    try:
+        await callback.message.edit_reply_markup(
+            reply_markup=interrupted_keyboard(remaining) if remaining else None,
+        )
+    except Exception:
+        pass
 
-        await callback.answer("Опубликовано в канал!")
-        logger.info(f"Post #{post_id} published now")
-    except Exception as e:
-        logger.error(f"Publish now failed for #{post_id}: {e}")
-        await callback.answer(f"Ошибка: {e}", show_alert=True)
+    if published:
+        await refresh_draft_card(bot, post_id)
+        await callback.answer("Пост опубликован во все каналы.")
+    elif resend:
+        await callback.answer("Повторная отправка не удалась, подробности в логах.", show_alert=True)
+    else:
+        await callback.answer("Отмечено. Остальные каналы поста ещё не готовы.")
+    logger.info(f"Outbox #{entry['id']} of post #{post_id} {'resent' if resend else 'marked sent'}")
 
 
 @router.callback_query(F.data.startswith("noop:"))
@@ -1,5 +1,7 @@
 import json
 import logging
+import re
+from datetime import datetime, timedelta
 
 from aiogram import Router, F
 from aiogram.filters import Command
@@ -8,9 +10,14 @@ from aiogram.types import Message
 from config import ADMIN_CHAT_ID, BRANDS
 from database import (
     get_today_trends, get_posts_stats, get_drafts, get_latest_report,
-    get_latest_competitor_insight,
+    get_latest_competitor_insight, get_latest_competitor_stats, get_post, get_scheduled_posts,
+    get_post_rollups,
+)
+from services.competitor_stats import format_stats_line
+from utils import (
+    format_trends_card, split_message, format_post_card, format_publish_stats, format_slot,
+    format_rollups,
 )
-from utils import format_trends_card, split_message, format_post_card
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -39,13 +46,17 @@ async def cmd_help(message: Message):
         "<b>Команды:</b>\n\n"
         "<b>Контент:</b>\n"
         "/generate [проект] [платформа] — генерация постов\n"
-        "/publish — публикация одобренных постов\n\n"
+        "/publish — публикация одобренных постов\n"
+        "/schedule [id ЧЧ:ММ [дата]] — расписание публикаций\n\n"
         "<b>Данные:</b>\n"
         "/trends — тренды сегодня\n"
         "/status — черновики и статистика\n"
-        "/report — последний недельный отчёт\n"
+        "/report [дней | с по] — последний отчёт или статистика за период\n"
+        "/stats [дней] — вовлечённость по брендам, рубрикам, платформам и времени\n"
         "/competitors — анализ конкурентов\n"
-        "/brands — список брендов\n\n"
+        "/competitor [add|remove канал] — список каналов конкурентов\n"
+        "/brands — список брендов\n"
+        "/sources — источники трендов\n\n"
         "<b>Ручной запуск:</b>\n"
         "/run_trends — собрать тренды сейчас\n"
         "/run_competitors — анализ конкурентов сейчас\n"
@@ -93,6 +104,10 @@ async def cmd_status(message: Message):
 async def cmd_report(message: Message):
     if not _is_admin(message):
         return
+    args = message.text.split()[1:]
+    if args:
+        await _report_range(message, args)
+        return
     report = await get_latest_report()
     if not report:
         await message.answer("Отчётов пока нет.")
@@ -103,6 +118,52 @@ async def cmd_report(message: Message):
         await message.answer(part)
 
 
+@router.message(Command("stats"))
+async def cmd_stats(message: Message):
+    if not _is_admin(message):
+        return
+    from services.engagement import compute_engagement, format_engagement_digest
+
+    args = message.text.split()[1:]
+    end = datetime.now().date()
+    try:
+        start = end - timedelta(days=max(1, int(args[0])) - 1) if args else None
+    except ValueError:
+        await message.answer("Формат: /stats [дней]")
+        return
+    stats = await compute_engagement(start, end)
+    text = (
+        "<b>Вовлечённость</b>\n"
+        "ER = (реакции + репосты + комментарии) / просмотры, среднее по постам; "
+        "↑/↓ — значимо, p &lt; 0.05\n\n"
+        + format_engagement_digest(stats)
+    )
+    for part in split_message(text):
+        await message.answer(part)
+
+
+async def _report_range(message: Message, args: list[str]):
+    """/report N (last N days) or /report YYYY-MM-DD YYYY-MM-DD: stats from the rollups."""
+    try:
+        if len(args) == 1:
+            end = datetime.now().date()
+            start = end - timedelta(days=max(1, int(args[0])) - 1)
+        else:
+            start = datetime.strptime(args[0], "%Y-%m-%d").date()
+            end = datetime.strptime(args[1], "%Y-%m-%d").date()
+    except ValueError:
+        await message.answer("Формат: /report [дней] или /report ГГГГ-ММ-ДД ГГГГ-ММ-ДД")
+        return
+    if start > end:
+        start, end = end, start
+
+    rollups = await get_post_rollups(start.isoformat(), end.isoformat())
+    total = sum(r["posts"] for r in rollups)
+    header = f"<b>Публикации {start} — {end}</b>\nВсего постов: {total}\n\n"
+    for part in split_message(header + (format_rollups(rollups) or "Публикаций нет.")):
+        await message.answer(part)
+
+
 @router.message(Command("competitors"))
 async def cmd_competitors(message: Message):
     if not _is_admin(message):
@@ -114,6 +175,13 @@ async def cmd_competitors(message: Message):
 
     lines = [f"<b>Конкуренты {insight['date']}</b>", ""]
 
+    stats = await get_latest_competitor_stats()
+    if stats:
+        lines.append("<b>Каналы (30 дней):</b>")
+        for st in stats:
+            lines.append(f"  {format_stats_line(st)}")
+        lines.append("")
+
     topics = json.loads(insight.get("hot_topics", "[]"))
     if topics:
         lines.append("<b>Горячие темы:</b>")
@@ -143,6 +211,55 @@ async def cmd_competitors(message: Message):
         await message.answer(part)
 
 
+@router.message(Command("competitor"))
+async def cmd_competitor(message: Message):
+    if not _is_admin(message):
+        return
+    from database import (
+        get_competitor_channels, add_competitor_channel, remove_competitor_channel,
+    )
+    args = message.text.split()[1:]
+
+    if not args:
+        channels = await get_competitor_channels()
+        lines = [f"<b>Каналы конкурентов ({len(channels)}):</b>"]
+        lines += [f"  @{ch}" for ch in channels] or ["  список пуст"]
+        lines.append("\n/competitor add канал — добавить\n/competitor remove канал — удалить")
+        for part in split_message("\n".join(lines)):
+            await message.answer(part)
+        return
+
+    action, names = args[0].lower(), [_channel_name(a) for a in args[1:]]
+    invalid = [n for n in names if not CHANNEL_RE.match(n)]
+    if action not in ("add", "remove") or not names or invalid:
+        await message.answer(
+            "Пример: /competitor add telecom_uz\n"
+            "        /competitor remove telecom_uz"
+        )
+        return
+
+    if action == "add":
+        for name in names:
+            await add_competitor_channel(name)
+        await message.answer(f"Добавлено: {', '.join('@' + n for n in names)}")
+    else:
+        removed = [n for n in names if await remove_competitor_channel(n)]
+        missing = [n for n in names if n not in removed]
+        text = f"Удалено: {', '.join('@' + n for n in removed) or '—'}"
+        if missing:
+            text += f"\nНе найдены: {', '.join('@' + n for n in missing)}"
+        await message.answer(text)
+
+
+CHANNEL_RE = re.compile(r"^[A-Za-z0-9_]{4,64}$")
+
+
+def _channel_name(raw: str) -> str:
+    """Accept @name, t.me/name and https://t.me/name forms."""
+    name = re.sub(r"^(https?://)?(t\.me/)?@?", "", raw.strip())
+    return name.rstrip("/")
+
+
 @router.message(Command("brands"))
 async def cmd_brands(message: Message):
     if not _is_admin(message):
@@ -156,6 +273,37 @@ async def cmd_brands(message: Message):
     await message.answer("\n".join(lines))
 
 
+@router.message(Command("sources"))
+async def cmd_sources(message: Message):
+    if not _is_admin(message):
+        return
+    from services.trend_monitor import get_sources_overview
+    sources = await get_sources_overview()
+
+    lines = ["<b>Источники трендов:</b>", ""]
+    for src in sources:
+        lines.append(f"<b>{src['name']}</b> (каждые {src['interval']} мин)")
+        polled = src.get("last_polled_at")
+        lines.append(f"  Опрошен: {_ago(polled)}" if polled else "  Ещё не опрашивался")
+        if src.get("last_new_at"):
+            lines.append(f"  Последний новый: {_ago(src['last_new_at'])}")
+        lines.append(
+            f"  Новых за опрос: {src.get('last_new_count', 0)} | "
+            f"за 24ч: {src.get('items_24h', 0)} | всего: {src.get('total_items', 0)}"
+        )
+        if src.get("last_error"):
+            lines.append(f"  Ошибка: {src['last_error']}")
+        lines.append("")
+    await message.answer("\n".join(lines))
+
+
+def _ago(iso: str) -> str:
+    minutes = int((datetime.now() - datetime.fromisoformat(iso)).total_seconds() // 60)
+    if minutes < 60:
+        return f"{minutes} мин назад"
+    return f"{minutes // 60} ч {minutes % 60} мин назад"
+
+
 @router.message(Command("run_trends"))
 async def cmd_run_trends(message: Message):
     if not _is_admin(message):
@@ -179,8 +327,10 @@ async def cmd_run_competitors(message: Message):
     result = await run_competitor_monitoring()
     if result.get("error"):
         await message.answer(f"Ошибка: {result['error']}")
+    elif result.get("no_new"):
+        await message.answer("Новой активности конкурентов нет.")
     else:
-        await message.answer(f"Готово! {result.get('posts_count', 0)} постов проанализировано.")
+        await message.answer(f"Готово! {result.get('posts_count', 0)} новых постов проанализировано.")
 
 
 @router.message(Command("run_report"))
@@ -200,8 +350,57 @@ async def cmd_publish(message: Message, bot_obj=None):
     if not _is_admin(message):
         return
     from services.publisher import run_publisher
-    published = await run_publisher(message.bot)
-    if published:
-        await message.answer(f"Опубликовано {len(published)} постов.")
+    from services.publish_schedule import schedule_publish_retry
+    stats = await run_publisher(message.bot)
+    for post in stats["failed"]:
+        await schedule_publish_retry(post["id"])
+    if stats["published"] or stats["failed"] or stats["waiting"]:
+        await message.answer(format_publish_stats(stats))
     else:
         await message.answer("Нет одобренных постов для публикации.")
+
+
+@router.message(Command("schedule"))
+async def cmd_schedule(message: Message):
+    if not _is_admin(message):
+        return
+    from services.publish_schedule import local_now, next_free_slot, schedule_post
+
+    args = message.text.split()[1:]
+    if not args:
+        posts = await get_scheduled_posts()
+        lines = ["<b>Расписание публикаций</b>", ""]
+        for p in posts:
+            when = format_slot(p["scheduled_at"]) if p["scheduled_at"] else "без времени"
+            brand = BRANDS.get(p["project_id"], {}).get("name", p["project_id"])
+            lines.append(f"{when} — #{p['id']} {brand} / {p['platform']}")
+        if not posts:
+            lines.append("Одобренных постов нет.")
+        slot = await next_free_slot()
+        lines += ["", f"Следующий свободный слот: {format_slot(slot.isoformat())}"]
+        await message.answer("\n".join(lines))
+        return
+
+    usage = "Формат: /schedule &lt;id&gt; ЧЧ:ММ [ГГГГ-ММ-ДД]"
+    try:
+        post_id = int(args[0])
+        at = datetime.strptime(args[1], "%H:%M").time()
+        day = datetime.strptime(args[2], "%Y-%m-%d").date() if len(args) > 2 else local_now().date()
+    except (IndexError, ValueError):
+        await message.answer(usage)
+        return
+    run_at = datetime.combine(day, at)
+    if run_at < local_now():
+        await message.answer("Это время уже прошло.")
+        return
+
+    post = await get_post(post_id)
+    if not post:
+        await message.answer(f"Пост #{post_id} не найден.")
+        return
+    if post["status"] != "approved":
+        await message.answer(f"Пост #{post_id} {post['status']}, сначала одобрите его.")
+        return
+
+    run_at = await schedule_post(post_id, run_at)
+    await message.answer(f"Пост #{post_id} будет опубликован {format_slot(run_at.isoformat())}.")
@@ -1,29 +1,36 @@
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from utils import format_slot
 
-def draft_keyboard(post_id: int) -> InlineKeyboardMarkup:
+
+def draft_keyboard(post_id: int, candidates: int = 0) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Одобрить", callback_data=f"approve:{post_id}")
     builder.button(text="Отклонить", callback_data=f"reject:{post_id}")
     builder.button(text="Редактировать", callback_data=f"edit:{post_id}")
     builder.button(text="Опубликовать сейчас", callback_data=f"publish_now:{post_id}")
-    builder.adjust(2, 1, 1)
+    if candidates:
+        builder.button(text=f"Следующий вариант ({candidates})", callback_data=f"next:{post_id}")
+    builder.adjust(2, 1, 1, 1)
     return builder.as_markup()
 
 
-def approved_keyboard(post_id: int) -> InlineKeyboardMarkup:
+def approved_keyboard(post_id: int, scheduled_at: str = None) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Опубликовать сейчас", callback_data=f"publish_now:{post_id}")
-    builder.button(text="Одобрено (ждёт расписания)", callback_data=f"noop:{post_id}")
+    status = f"публикация {format_slot(scheduled_at)}" if scheduled_at else "ждёт расписания"
+    builder.button(text=f"Одобрено ({status})", callback_data=f"noop:{post_id}")
     builder.adjust(1, 1)
     return builder.as_markup()
 
 
-def rejected_keyboard(post_id: int) -> InlineKeyboardMarkup:
+def rejected_keyboard(post_id: int, candidates: int = 0) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Отклонено", callback_data=f"noop:{post_id}")
-    builder.adjust(1)
+    if candidates:
+        builder.button(text=f"Следующий вариант ({candidates})", callback_data=f"next:{post_id}")
+    builder.adjust(1, 1)
     return builder.as_markup()
 
 
@@ -32,3 +39,15 @@ def published_keyboard(post_id: int) -> InlineKeyboardMarkup:
     builder.button(text="Опубликовано", callback_data=f"noop:{post_id}")
     builder.adjust(1)
     return builder.as_markup()
+
+
+def interrupted_keyboard(entries: list[dict]) -> InlineKeyboardMarkup:
+    """Per interrupted outbox target: mark it sent (checked by hand) or resend."""
+    builder = InlineKeyboardBuilder()
+    for entry in entries:
+        builder.button(
+            text=f"Уже есть: {entry['target']}"[:60], callback_data=f"outbox_sent:{entry['id']}",
+        )
+        builder.button(text="Отправить заново", callback_data=f"outbox_resend:{entry['id']}")
+    builder.adjust(2)
+    return builder.as_markup()
@@ -6,8 +6,8 @@ MASTER_SYSTEM = """Ты автономный SMM-агент, управляющ
 3. ОБУЧЕНИЕ НА РЕЗУЛЬТАТАХ — анализируй Knowledge Base, применяй выводы.
 4. ФИЛЬТР ТРЕНДОВ — не каждый тренд подходит каждому проекту.
 5. НЕТ ШАБЛОНАМ — чередуй форматы: кейс, инсайт, обучение, история, данные, вопрос.
-6. ДВУЯЗЫЧНОСТЬ — ВСЕГДА генерируй пост на двух языках: русский + узбекский.
-   Никогда не смешивай языки в одном блоке. Сначала полный текст на русском, затем разделитель, затем полный текст на узбекском."""
+6. ЯЗЫК — пиши пост только на русском. Узбекскую версию готовит отдельный шаг перевода,
+   не добавляй её сам."""
 
 
 POST_GENERATION = """Создай пост для {platform}.
@@ -38,19 +38,72 @@ POST_GENERATION = """Создай пост для {platform}.
    Варианты: кейс | инсайт/мнение | обучение/советы | история | данные+анализ | вопрос к аудитории
 4. Напиши пост строго в голосе бренда.
 
-ОБЯЗАТЕЛЬНО: Пост должен быть на ДВУХ языках.
-Структура:
-1) Полный текст на РУССКОМ языке
-2) Строка-разделитель: ➖➖➖
-3) Полный текст на УЗБЕКСКОМ языке (не перевод Google Translate, а живой узбекский)
+Пиши ТОЛЬКО на русском языке. Короткие абзацы, разделённые пустой строкой.
 
 ТРЕБОВАНИЯ К ПЛАТФОРМЕ:
-- instagram: крючок в первой строке (max 8 слов) + 150-300 слов на каждом языке + 10-15 хэштегов + CTA
-- telegram: разговорный + эмодзи умеренно + 100-250 слов на каждом языке + без хэштегов
-- facebook: открывающий вопрос + 200-400 слов на каждом языке + 3-5 хэштегов + вопрос в конце
-- linkedin: сильный тезис + инсайт или кейс + 150-300 слов на каждом языке + 3-5 хэштегов
+{platform_rules}
 
-Верни ТОЛЬКО текст поста (оба языка) без объяснений."""
+Верни ТОЛЬКО текст поста на русском без объяснений."""
+
+
+POST_GENERATION_MULTI = """Создай по одному посту для каждой платформы: {platforms}.
+
+ПРОЕКТ: {project_name}
+ГОЛОС: {voice}
+АУДИТОРИЯ: {audience}
+ЦЕЛЬ: {goal}
+ТЕМЫ: {topics}
+ЗАПРЕЩЕНО: {forbidden}
+
+ТРЕНД ДНЯ: {trend}
+ИДЕЯ: {idea}
+
+БАЗА ЗНАНИЙ (что работало / не работало раньше):
+{insights}
+
+ИСТОРИЯ ПОСЛЕДНИХ ПОСТОВ (последние 5):
+{recent_posts}
+
+ЭТАЛОН СТИЛЯ КАНАЛА:
+{style_reference}
+
+ИНСТРУКЦИЯ:
+1. Прочитай базу знаний. Определи лучший формат и темы.
+2. Проверь тренд на релевантность. Если не подходит — используй вечнозелёную тему.
+3. Выбери формат который НЕ повторяет последние 2 поста:
+   Варианты: кейс | инсайт/мнение | обучение/советы | история | данные+анализ | вопрос к аудитории
+4. Одна тема на все платформы, но каждый вариант — самостоятельный пост по правилам своей платформы
+   (свой крючок, длина, хэштеги, CTA). Не копируй текст между вариантами.
+5. Пиши строго в голосе бренда.
+
+Каждый вариант ТОЛЬКО на русском языке. Короткие абзацы, разделённые пустой строкой.
+
+ТРЕБОВАНИЯ К ПЛАТФОРМАМ:
+{platform_rules}
+
+Верни ТОЛЬКО JSON без markdown, ключи — ровно эти платформы ({platforms}):
+{{"<платформа>": "полный текст поста на русском, переносы строк как \\n"}}"""
+
+
+PLATFORM_RULES = {
+    "instagram": "крючок в первой строке (max 8 слов) + 150-300 слов + 10-15 хэштегов + CTA",
+    "telegram": "разговорный + эмодзи умеренно + 100-250 слов + без хэштегов",
+    "facebook": "открывающий вопрос + 200-400 слов + 3-5 хэштегов + вопрос в конце",
+    "linkedin": "сильный тезис + инсайт или кейс + 150-300 слов + 3-5 хэштегов",
+}
+
+
+TRANSLATE_UZ = """Переведи абзацы SMM-поста с русского на узбекский.
+
+Пиши живым узбекским языком, как пишет носитель, а не дословный машинный перевод.
+Сохраняй смысл, тон, эмодзи, хэштеги, ссылки, @упоминания и форматирование каждого абзаца.
+Названия брендов и продуктов не переводи.
+
+АБЗАЦЫ (JSON-массив):
+{paragraphs}
+
+Верни ТОЛЬКО JSON без markdown — ровно {count} переводов в том же порядке:
+{{"paragraphs": ["перевод абзаца 1", "перевод абзаца 2"]}}"""
 
 
 # Style references extracted from actual channels
@@ -58,12 +111,12 @@ STYLE_PERSONAL_BRAND = """Канал @marketing365uz «Маркетинг без
 Стиль: прямой, без воды, на цифрах. Кейсы, стратегии, инструменты, автоматизация.
 Тон: уверенный эксперт, говорит как наставник. Реальные примеры B2B и B2C.
 Формат: короткие абзацы, эмодзи умеренно (📊💡🔥), буллет-поинты для ключевых мыслей.
-Язык: рус + узб параллельно, никогда не мешает в одном абзаце.
+Язык: пост пишется на русском; узбекскую версию добавляет перевод, не пиши её сам.
 Примеры фраз: «Всё чётко, на цифрах», «без фейковых историй», «вот конкретный кейс».
 Запрещено: вода, мотивационные цитаты без пользы, кликбейт."""
 
 STYLE_LEADER_TEAM = """Канал @liderteamuz «Lider Team»
-Стиль: деловой, экспертный, партнёрский. Билингвальный (рус + узб параллельно).
+Стиль: деловой, экспертный, партнёрский. Пост пишется на русском (узбекскую версию добавляет перевод).
 Тон: профессионал-консультант, помогает выбрать решение.
 Формат:
 - Эмодзи как маркеры секций (🔹▫️👉☎️⚡️🔥🛡💾)
@@ -71,7 +124,7 @@ STYLE_LEADER_TEAM = """Канал @liderteamuz «Lider Team»
 - Буллет-листы с продуктами/решениями
 - Закрывающий CTA с контактами
 - Футер с ссылками на соцсети (сайт + Instagram + YouTube + Facebook)
-Длина: 400-600 слов (оба языка вместе).
+Длина: 200-300 слов.
 Темы: телеком оборудование, коммутаторы, кабели, ИБП, сетевая безопасность.
 Акцент: надёжность, наличие на складе, партнёрство, «поможем подобрать».
 Примеры фраз: «Мы поможем вам подобрать оптимальное решение», «Надёжность и стабильность»."""
@@ -81,12 +134,17 @@ STYLE_PIXIE = """Бренд Пикси — производитель телек
 Тон: уверенный производитель, говорит о технологиях и стандартах.
 Формат: данные и цифры, технические характеристики, отраслевые тренды.
 Акцент: производственные стандарты, сертификация, технологическое превосходство.
-Язык: рус + узб параллельно."""
+Язык: пост пишется на русском; узбекскую версию добавляет перевод, не пиши её сам."""
+
 
+TREND_ANALYSIS = """Тренды дня: {count} кандидатов, отобранных из {total} по релевантности нишам проектов.
 
-TREND_ANALYSIS = """Тренды дня ({count} штук):
+Кандидаты по проектам:
 {trends}
 
+Текущие темы дня (оставь текущую, если кандидаты не сильнее):
+{current}
+
 Проанализируй для 3 проектов и верни JSON:
 {{
   "personal_brand": {{"trend": "", "idea": "", "category": ""}},
@@ -106,13 +164,16 @@ TREND_ANALYSIS = """Тренды дня ({count} штук):
 COMPETITOR_ANALYSIS = """Контент конкурентов ({count} постов):
 {posts}
 
+Статистика каналов за 30 дней (посчитано по ленте, это факты):
+{stats}
+
 Отрасль: телекоммуникации, B2B оборудование, маркетинг (Узбекистан/СНГ)
 
 Верни JSON анализ:
 {{
   "hot_topics": ["топ темы которые они освещают"],
   "content_gaps": ["что НЕ освещают — возможность для нас"],
-  "best_formats": ["форматы которые работают у них"],
+  "best_formats": ["форматы которые работают у них — опирайся на статистику"],
   "our_opportunities": ["конкретные идеи постов для наших проектов"],
   "urgent_alert": "срочное если есть, иначе пустая строка"
 }}
@@ -120,7 +181,34 @@ COMPETITOR_ANALYSIS = """Контент конкурентов ({count} пост
 Верни ТОЛЬКО JSON."""
 
 
-WEEKLY_REPORT = """Создай еженедельный SMM отчёт.
+BRAND_SUMMARY = """Подведи итоги периода для одного бренда.
+
+Бренд: {brand_name}
+Цель: {goal}
+Период: {week_start} — {week_end}
+
+Статистика публикаций:
+{stats}
+
+Вовлечённость бренда (ER = (реакции + репосты + комментарии) / просмотры, среднее по постам; n — постов;
+↑/↓ — значимо выше/ниже остальных постов бренда, p < 0.05):
+{engagement}
+
+Опубликованные посты ({count}):
+{posts}
+
+Выводы об эффективности делай только по значимым (↑/↓) различиям ER.
+
+Верни JSON:
+{{
+  "summary": "2-3 предложения: что публиковали и как это зашло",
+  "worked": "что сработало, 1 предложение",
+  "avoid": "что не сработало, 1 предложение или пустая строка",
+  "recommendation": "1 конкретное действие на следующий период"
+}}"""
+
+
+WEEKLY_REPORT = """Создай {period_name} SMM отчёт.
 
 Период: {week_start} — {week_end}
 Всего постов: {total_posts}
@@ -128,6 +216,13 @@ WEEKLY_REPORT = """Создай еженедельный SMM отчёт.
 Статистика по проектам:
 {stats}
 
+Итоги по брендам:
+{summaries}
+
+Вовлечённость (ER = (реакции + репосты + комментарии) / просмотры, среднее по постам; n — постов;
+↑/↓ — значимо выше/ниже остальных, p < 0.05):
+{engagement}
+
 База знаний (что работало раньше):
 {insights}
 
@@ -135,30 +230,37 @@ WEEKLY_REPORT = """Создай еженедельный SMM отчёт.
 Для каждого проекта:
 [Название]
 - Постов: X
-- Что сработало: 1 инсайт
+- Что сработало: 1 инсайт (опирайся на ER, а не на догадки)
 - Рекомендация: 1 конкретное действие
 
-ИТОГИ НЕДЕЛИ:
+ИТОГИ ПЕРИОДА:
 - Топ-3 вывода
-- Фокус следующей недели
+- Фокус следующего периода
 
 Пиши кратко, без воды."""
 
 
 KB_UPDATE = """Проанализируй результаты недели и обнови базу знаний.
 
-ОПУБЛИКОВАННЫЕ ПОСТЫ:
-{posts}
+ИТОГИ ПО БРЕНДАМ:
+{summaries}
+
+ВОВЛЕЧЁННОСТЬ (ER = (реакции + репосты + комментарии) / просмотры, среднее по постам; n — постов;
+↑/↓ — значимо выше/ниже остальных, p < 0.05):
+{engagement}
 
 ТЕКУЩАЯ БАЗА ЗНАНИЙ:
 {current_knowledge}
 
 Задача:
-1. Найди успешные посты — что в них общего?
-2. Найди неуспешные — почему не зашли?
+1. Что общего у того, что сработало?
+2. Что не сработало и почему?
 3. Определи лучший формат для каждого проекта
 4. Определи лучшую платформу для каждого проекта
 
+Выводы о том, что сработало, делай только по значимым (↑/↓) различиям ER;
+без них пиши выводы о содержании, а не об эффективности.
+
 Верни JSON:
 {{
   "new_insights": [
@@ -166,7 +268,7 @@ KB_UPDATE = """Проанализируй результаты недели и 
       "project": "personal_brand | leader_team | pixie",
       "type": "best_format | avoid | best_platform | content_insight",
       "insight": "конкретный вывод в 1-2 предложениях",
-      "evidence": "на каком посте основан вывод"
+      "evidence": "на каких данных основан вывод"
     }}
   ],
   "next_week_focus": {{
@@ -1,20 +1,34 @@
 """APScheduler cron job registration for all workflows."""
 
+import asyncio
 import logging
-from datetime import datetime
 
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
-from config import ADMIN_CHAT_ID, BRANDS, TIMEZONE
-from utils import split_message, format_post_card, format_trends_card
+from config import (
+    ADMIN_CHAT_ID, BRANDS, TIMEZONE, TREND_POLL_TICK_MINUTES, PREGEN_ENABLED, PREGEN_HOUR,
+    METRICS_API_URL, METRICS_TICK_MINUTES,
+)
+from services.publish_schedule import start_publish_schedule
+from utils import split_message, format_trends_card
 
 logger = logging.getLogger(__name__)
 
-
 def setup_scheduler(scheduler: AsyncIOScheduler, bot: Bot):
-    """Register all cron jobs."""
+    """Register all cron jobs; per-post publish jobs are added at approval time."""
+    start_publish_schedule(scheduler, bot)
+
+    # WF1 (night): Pre-generate the morning drafts — PREGEN_HOUR daily
+    if PREGEN_ENABLED:
+        scheduler.add_job(
+            _job_pregenerate,
+            CronTrigger(hour=PREGEN_HOUR, minute=0, timezone=TIMEZONE),
+            id="wf1_pregenerate",
+            replace_existing=True,
+        )
 
     # WF6: Competitor monitoring — 06:00 daily
     scheduler.add_job(
@@ -34,20 +48,20 @@ def setup_scheduler(scheduler: AsyncIOScheduler, bot: Bot):
         replace_existing=True,
     )
 
-    # WF1: Post generation — 08:00 daily
+    # WF2: Intra-day incremental source polling
     scheduler.add_job(
-        _job_generate,
-        CronTrigger(hour=8, minute=0, timezone=TIMEZONE),
-        id="wf1_generate",
+        _job_trend_poll,
+        IntervalTrigger(minutes=TREND_POLL_TICK_MINUTES, timezone=TIMEZONE),
+        id="wf2_trend_poll",
         kwargs={"bot": bot},
         replace_existing=True,
     )
 
-    # WF4: Auto-publish — 10:00, 14:00, 18:00 daily
+    # WF1: Post generation — 08:00 daily
     scheduler.add_job(
-        _job_publish,
-        CronTrigger(hour="10,14,18", minute=0, timezone=TIMEZONE),
-        id="wf4_publish",
+        _job_generate,
+        CronTrigger(hour=8, minute=0, timezone=TIMEZONE),
+        id="wf1_generate",
         kwargs={"bot": bot},
         replace_existing=True,
     )
@@ -61,6 +75,32 @@ def setup_scheduler(scheduler: AsyncIOScheduler, bot: Bot):
         replace_existing=True,
     )
 
+    # WF5: Monthly report — 1st of the month 09:30
+    scheduler.add_job(
+        _job_report,
+        CronTrigger(day=1, hour=9, minute=30, timezone=TIMEZONE),
+        id="wf5_monthly_report",
+        kwargs={"bot": bot, "kind": "monthly"},
+        replace_existing=True,
+    )
+
+    # Engagement metrics of published posts (per-post intervals by age)
+    if METRICS_API_URL:
+        scheduler.add_job(
+            _job_collect_metrics,
+            IntervalTrigger(minutes=METRICS_TICK_MINUTES, timezone=TIMEZONE),
+            id="metrics_collect",
+            replace_existing=True,
+        )
+
+    # Image store eviction — 04:00 daily
+    scheduler.add_job(
+        _job_evict_images,
+        CronTrigger(hour=4, minute=0, timezone=TIMEZONE),
+        id="image_store_eviction",
+        replace_existing=True,
+    )
+
     logger.info("Scheduler: all cron jobs registered")
 
 
@@ -77,6 +117,10 @@ async def _job_competitors(bot: Bot):
             await bot.send_message(ADMIN_CHAT_ID, f"WF6: {result['error']}")
             return
 
+        if result.get("no_new"):
+            await bot.send_message(ADMIN_CHAT_ID, "WF6: Новой активности конкурентов нет.")
+            return
+
         lines = [f"<b>Конкуренты {result['date']}</b>", ""]
         topics = analysis.get("hot_topics", [])
         if topics:
@@ -124,6 +168,14 @@ async def _job_trends(bot: Bot):
 
         trends = await get_today_trends()
         text = format_trends_card(trends)
+
+        if PREGEN_ENABLED:
+            from services.pregen import refresh_pregen_for_trends
+            refreshed = await refresh_pregen_for_trends()
+            if refreshed:
+                names = ", ".join(BRANDS[pid]["name"] for pid in refreshed)
+                text += f"\nЧерновики переписаны под тренд: {names}"
+
         for part in split_message(text):
             await bot.send_message(ADMIN_CHAT_ID, part)
 
@@ -132,35 +184,64 @@ async def _job_trends(bot: Bot):
         await bot.send_message(ADMIN_CHAT_ID, f"WF2 error: {e}")
 
 
+async def _job_trend_poll(bot: Bot):
+    """WF2 (intra-day): poll due sources, notify admin if trends were re-analyzed."""
+    try:
+        from services.trend_monitor import run_trend_repoll
+        from database import get_today_trends
+
+        result = await run_trend_repoll()
+        updated = result.get("updated")
+        if not updated:
+            return
+
+        trends = [t for t in await get_today_trends() if t["project_id"] in updated]
+        text = "<b>Новые тренды за день</b>\n\n" + format_trends_card(trends)
+        for part in split_message(text):
+            await bot.send_message(ADMIN_CHAT_ID, part)
+
+    except Exception as e:
+        logger.error(f"WF2 poll job error: {e}")
+
+
 async def _job_generate(bot: Bot):
-    """WF1: Generate posts and send drafts for approval."""
+    """WF1: Send pre-generated drafts; generate (and send as ready) only what is missing."""
     try:
         from services.post_generator import run_post_generation
-        from database import get_post, set_post_admin_message_id
-        from keyboards import draft_keyboard
-
-        posts = await run_post_generation()
+        from services.notifier import send_draft
+        from services.pregen import promote_pregen
+
+        async def deliver(post_data: dict):
+            await send_draft(bot, ADMIN_CHAT_ID, post_data["id"])
+
+        posts = await promote_pregen(bot, ADMIN_CHAT_ID) if PREGEN_ENABLED else []
+        # Coverage is per (brand, platform): a brand may be pregenerated for
+        # only some of its platforms
+        ready = {(p["project_id"], p["platform"]) for p in posts}
+        missing: dict[str, list[str]] = {}
+        for pid, brand in BRANDS.items():
+            for plat in brand.get("platforms", ["telegram"]):
+                if (pid, plat) not in ready:
+                    missing.setdefault(pid, []).append(plat)
+        if not ready:
+            posts = await run_post_generation(on_post=deliver)
+        elif missing:
+            runs = []
+            for pid, plats in missing.items():
+                if len(plats) == len(BRANDS[pid].get("platforms", ["telegram"])):
+                    runs.append(run_post_generation(project_id=pid, on_post=deliver))
+                else:
+                    runs += [
+                        run_post_generation(project_id=pid, platform=plat, on_post=deliver)
+                        for plat in plats
+                    ]
+            results = await asyncio.gather(*runs)
+            posts += [p for r in results for p in r]
 
         if not posts:
             await bot.send_message(ADMIN_CHAT_ID, "WF1: Не удалось сгенерировать посты.")
             return
 
-        for post_data in posts:
-            post = await get_post(post_data["id"])
-            if not post:
-                continue
-            card = format_post_card(post)
-            parts = split_message(card)
-            for i, part in enumerate(parts):
-                if i == 0:
-                    sent = await bot.send_message(
-                        ADMIN_CHAT_ID, part,
-                        reply_markup=draft_keyboard(post["id"]),
-                    )
-                    await set_post_admin_message_id(post["id"], sent.message_id)
-                else:
-                    await bot.send_message(ADMIN_CHAT_ID, part)
-
         await bot.send_message(
             ADMIN_CHAT_ID,
             f"WF1: Сгенерировано {len(posts)} постов. Одобри или отклони выше."
@@ -171,38 +252,31 @@ async def _job_generate(bot: Bot):
         await bot.send_message(ADMIN_CHAT_ID, f"WF1 error: {e}")
 
 
-async def _job_publish(bot: Bot):
-    """WF4: Publish approved posts to channel."""
+async def _job_pregenerate():
+    """WF1 (night): Prepare the morning drafts while nobody waits for them."""
     try:
-        from services.publisher import run_publisher
-
-        published = await run_publisher(bot)
-
-        if published:
-            names = ", ".join(
-                f"#{p['id']}" for p in published
-            )
-            await bot.send_message(
-                ADMIN_CHAT_ID,
-                f"WF4: Опубликовано {len(published)} постов: {names}"
-            )
-
+        from services.pregen import run_pregeneration
+        await run_pregeneration()
     except Exception as e:
-        logger.error(f"WF4 job error: {e}")
-        await bot.send_message(ADMIN_CHAT_ID, f"WF4 error: {e}")
+        logger.error(f"WF1 pregen job error: {e}")
 
 
-async def _job_report(bot: Bot):
-    """WF5: Weekly report."""
+async def _job_report(bot: Bot, kind: str = "weekly"):
+    """WF5: Weekly or monthly report."""
     try:
-        from services.reporter import run_weekly_report
-
-        result = await run_weekly_report()
+        from services.reporter import run_weekly_report, run_monthly_report
+
+        if kind == "monthly":
+            result = await run_monthly_report()
+            title, period = "Месячный отчёт", "месяц"
+        else:
+            result = await run_weekly_report()
+            title, period = "Недельный отчёт", "неделю"
         report_text = result.get("report_text", "No report generated")
 
         header = (
-            f"<b>Недельный отчёт {result['week_start']} — {result['week_end']}</b>\n"
-            f"Постов за неделю: {result['total_posts']}\n\n"
+            f"<b>{title} {result['week_start']} — {result['week_end']}</b>\n"
+            f"Постов за {period}: {result['total_posts']}\n\n"
         )
         for part in split_message(header + report_text):
             await bot.send_message(ADMIN_CHAT_ID, part)
@@ -210,3 +284,21 @@ async def _job_report(bot: Bot):
     except Exception as e:
         logger.error(f"WF5 job error: {e}")
         await bot.send_message(ADMIN_CHAT_ID, f"WF5 error: {e}")
+
+
+async def _job_collect_metrics():
+    """Poll views and reactions of published posts that are due."""
+    try:
+        from services.metrics import collect_metrics
+        await collect_metrics()
+    except Exception as e:
+        logger.error(f"Metrics job error: {e}")
+
+
+async def _job_evict_images():
+    """Drop old / over-quota image files; Telegram file_ids stay reusable."""
+    try:
+        from services.image_store import evict_images
+        await evict_images()
+    except Exception as e:
+        logger.error(f"Image eviction error: {e}")
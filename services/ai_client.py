@@ -1,10 +1,14 @@
+import asyncio
 import json
 import logging
+import math
 import re
 
 import httpx
 
-from config import GROQ_API_KEY, GROQ_MODEL, GEMINI_API_KEY, GEMINI_MODEL
+from config import (
+    GROQ_API_KEY, GROQ_MODEL, GEMINI_API_KEY, GEMINI_MODEL, AI_MAX_CONCURRENCY,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -14,28 +18,59 @@ GEMINI_URL = (
     "{model}:generateContent?key={key}"
 )
 
+# Rough chars-per-token for mixed Russian/Uzbek/English text
+CHARS_PER_TOKEN = 3
+
+DEFAULT_TEMPERATURE = 0.3
+
+_ai_slots = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+
 
-async def ask_ai(prompt: str, system: str = "", max_tokens: int = 2048) -> str:
-    """Groq (primary) -> Gemini (fallback)."""
-    result = await _ask_groq(prompt, system, max_tokens)
-    if result and not result.startswith("ERR:"):
-        return result
+async def ask_ai(prompt: str, system: str = "", max_tokens: int = 2048,
+                 temperature: float = DEFAULT_TEMPERATURE) -> str:
+    """Groq (primary) -> Gemini (fallback). At most AI_MAX_CONCURRENCY calls in flight."""
+    async with _ai_slots:
+        result = await _ask_groq(prompt, system, max_tokens, temperature)
+        if result and not result.startswith("ERR:"):
+            return result
 
-    logger.warning("Groq failed, trying Gemini fallback...")
-    result = await _ask_gemini(prompt, system, max_tokens)
-    if result and not result.startswith("ERR:"):
-        return result
+        logger.warning("Groq failed, trying Gemini fallback...")
+        result = await _ask_gemini(prompt, system, max_tokens, temperature)
+        if result and not result.startswith("ERR:"):
+            return result
 
     return "AI unavailable"
 
 
-async def ask_ai_json(prompt: str, system: str = "", max_tokens: int = 2048) -> dict:
+async def ask_ai_json(prompt: str, system: str = "", max_tokens: int = 2048,
+                      temperature: float = DEFAULT_TEMPERATURE) -> dict:
     """Ask AI and parse JSON response."""
-    raw = await ask_ai(prompt, system, max_tokens)
+    raw = await ask_ai(prompt, system, max_tokens, temperature)
     return _extract_json(raw)
 
 
-async def _ask_groq(prompt: str, system: str = "", max_tokens: int = 2048) -> str:
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for prompt budgeting (no tokenizer dependency)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_by_tokens(lines: list[str], budget: int) -> list[list[str]]:
+    """Greedily pack lines into chunks whose estimated size fits the budget."""
+    chunks, current, used = [], [], 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _ask_groq(prompt: str, system: str = "", max_tokens: int = 2048,
+                    temperature: float = DEFAULT_TEMPERATURE) -> str:
     messages = []
     if system:
         messages.append({"role": "system", "content": system})
@@ -53,7 +88,7 @@ async def _ask_groq(prompt: str, system: str = "", max_tokens: int = 2048) -> st
                     "model": GROQ_MODEL,
                     "messages": messages,
                     "max_tokens": max_tokens,
-                    "temperature": 0.3,
+                    "temperature": temperature,
                 },
             )
             resp.raise_for_status()
@@ -64,14 +99,15 @@ async def _ask_groq(prompt: str, system: str = "", max_tokens: int = 2048) -> st
         return f"ERR: {e}"
 
 
-async def _ask_gemini(prompt: str, system: str = "", max_tokens: int = 2048) -> str:
+async def _ask_gemini(prompt: str, system: str = "", max_tokens: int = 2048,
+                      temperature: float = DEFAULT_TEMPERATURE) -> str:
     full_prompt = f"{system}\n\n{prompt}" if system else prompt
     url = GEMINI_URL.format(model=GEMINI_MODEL, key=GEMINI_API_KEY)
     body = {
         "contents": [{"parts": [{"text": full_prompt}]}],
         "generationConfig": {
             "maxOutputTokens": max_tokens,
-            "temperature": 0.3,
+            "temperature": temperature,
         },
     }
     try:
@@ -89,14 +125,15 @@ def _extract_json(text: str) -> dict:
     """Extract JSON from AI response that may contain markdown fences."""
     # Remove markdown code fences
     cleaned = re.sub(r"```(?:json)?\s*", "", text).strip().rstrip("`")
+    # strict=False tolerates raw newlines inside strings (long post texts)
     try:
-        return json.loads(cleaned)
+        return json.loads(cleaned, strict=False)
     except json.JSONDecodeError:
         # Try to find JSON object in text
         match = re.search(r"\{[\s\S]*\}", cleaned)
         if match:
             try:
-                return json.loads(match.group())
+                return json.loads(match.group(), strict=False)
             except json.JSONDecodeError:
                 pass
     logger.warning(f"Failed to parse JSON from AI response: {text[:200]}")
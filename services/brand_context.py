@@ -0,0 +1,84 @@
+"""Per-run brand context shared by every platform task of the same brand."""
+
+import asyncio
+from dataclasses import dataclass
+
+from config import BRANDS
+from database import get_insights, get_recent_posts
+from prompts import STYLE_PERSONAL_BRAND, STYLE_LEADER_TEAM, STYLE_PIXIE
+
+STYLE_MAP = {
+    "personal_brand": STYLE_PERSONAL_BRAND,
+    "leader_team": STYLE_LEADER_TEAM,
+    "pixie": STYLE_PIXIE,
+}
+
+
+@dataclass(frozen=True)
+class BrandContext:
+    project_id: str
+    brand: dict
+    trend: str
+    idea: str
+    insights_text: str
+    recent_text: str
+    style_reference: str
+
+    @property
+    def name(self) -> str:
+        return self.brand["name"]
+
+    def prompt_fields(self) -> dict:
+        """Brand-level fields of POST_GENERATION (everything except platform)."""
+        return {
+            "project_name": self.brand["name"],
+            "voice": self.brand["voice"],
+            "audience": self.brand["audience"],
+            "goal": self.brand["goal"],
+            "topics": self.brand["topics"],
+            "forbidden": self.brand["forbidden"],
+            "trend": self.trend or "нет тренда — используй вечнозелёную тему",
+            "idea": self.idea,
+            "insights": self.insights_text,
+            "recent_posts": self.recent_text,
+            "style_reference": self.style_reference,
+        }
+
+
+async def build_brand_context(project_id: str, trend_data: dict = None) -> BrandContext | None:
+    """Query insights and recent posts once and pre-format them."""
+    brand = BRANDS.get(project_id)
+    if not brand:
+        return None
+    trend_data = trend_data or {}
+
+    insights_list, recent = await asyncio.gather(
+        get_insights(project_id, limit=8),
+        get_recent_posts(project_id, limit=5),
+    )
+    insights_text = "\n".join(
+        f"[{i['type']}] {i['insight']}" for i in insights_list
+    ) or "база знаний пока пуста"
+    recent_text = "\n".join(
+        f"- {p['platform']}: {p['content'][:100]}..." for p in recent
+    ) or "нет предыдущих постов"
+
+    return BrandContext(
+        project_id=project_id,
+        brand=brand,
+        trend=trend_data.get("trend", "") or "",
+        idea=trend_data.get("idea", "") or "",
+        insights_text=insights_text,
+        recent_text=recent_text,
+        style_reference=STYLE_MAP.get(project_id, ""),
+    )
+
+
+async def build_brand_contexts(project_ids: list[str],
+                               trends_by_project: dict) -> dict[str, BrandContext]:
+    """One context per distinct brand, built concurrently."""
+    unique = list(dict.fromkeys(project_ids))
+    contexts = await asyncio.gather(*(
+        build_brand_context(pid, trends_by_project.get(pid)) for pid in unique
+    ))
+    return {pid: ctx for pid, ctx in zip(unique, contexts) if ctx}
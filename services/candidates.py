@@ -0,0 +1,59 @@
+"""Local ranking of generated post variants: length fit, novelty and brand fit."""
+
+from services.relevance import brand_vocabulary, tokenize
+from services.translator import russian_part
+
+# Words of the Russian master, mirroring PLATFORM_RULES
+PLATFORM_WORDS = {
+    "instagram": (150, 300),
+    "telegram": (100, 250),
+    "facebook": (200, 400),
+    "linkedin": (150, 300),
+}
+# Distinct brand terms for a full brand-fit score
+BRAND_FIT_TERMS = 6
+
+WEIGHTS = {"length": 0.4, "novelty": 0.35, "brand": 0.25}
+
+
+def length_fit(content: str, platform: str) -> float:
+    """1.0 inside the platform's word range, falling off linearly outside it."""
+    low, high = PLATFORM_WORDS.get(platform, (100, 300))
+    words = len(content.split())
+    if low <= words <= high:
+        return 1.0
+    gap = low - words if words < low else words - high
+    return max(0.0, 1 - gap / low)
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def rank_candidates(contents: list[str], platform: str, brand: dict,
+                    history: list[str] = ()) -> list[tuple[str, float]]:
+    """Score variants best-first; exact duplicates are dropped.
+
+    Novelty is 1 minus the highest token overlap with the brand's recent
+    posts, so a variant that rehashes last week's post sinks.
+    """
+    vocab = brand_vocabulary(brand)
+    past = [set(tokenize(russian_part(h))) for h in history]
+
+    scored, seen = [], set()
+    for content in contents:
+        content = content.strip()
+        if not content or content in seen:
+            continue
+        seen.add(content)
+        terms = set(tokenize(content))
+        novelty = 1 - max((_jaccard(terms, p) for p in past), default=0.0)
+        brand_fit = min(1.0, len(terms & vocab.keys()) / BRAND_FIT_TERMS)
+        score = (
+            WEIGHTS["length"] * length_fit(content, platform)
+            + WEIGHTS["novelty"] * novelty
+            + WEIGHTS["brand"] * brand_fit
+        )
+        scored.append((content, round(score, 3)))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored
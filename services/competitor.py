@@ -1,94 +1,228 @@
-"""WF6: Monitor competitor Telegram channels via RSS, analyze via AI."""
+"""WF6: Monitor competitor Telegram channels via RSS, analyze new posts via AI."""
 
+import asyncio
 import logging
 import re
+from collections import defaultdict
 from datetime import datetime
-
-import httpx
-
-from database import save_competitor_insight
+from email.utils import parsedate_to_datetime
+
+from config import (
+    RSSHUB_BASE, COMPETITOR_FETCH_CONCURRENCY, COMPETITOR_PER_HOST_LIMIT,
+    COMPETITOR_FETCH_RETRIES, COMPETITOR_CHUNK_TOKENS,
+)
+from database import (
+    save_competitor_insight, get_competitor_channels, store_competitor_posts,
+    get_unanalyzed_competitor_posts, advance_competitor_watermarks,
+)
 from prompts import COMPETITOR_ANALYSIS
-from services.ai_client import ask_ai_json
+from services.ai_client import ask_ai_json, estimate_tokens
+from services.competitor_stats import snapshot_competitor_stats, format_stats_line
+from services.fetcher import fetch_many
+from services.relevance import tokenize
+from services.rss import parse_rss_items, item_key
 
 logger = logging.getLogger(__name__)
 
-# Competitor Telegram channels to monitor via RSSHub
+# Default competitor Telegram channels, seeded into the DB on first run
 COMPETITOR_CHANNELS = [
     "leaderteamuz",
     "pixie_uz",
     "telecom_uz",
 ]
 
-RSSHUB_BASE = "https://rsshub.app/telegram/channel/{channel}"
+RSSHUB_CHANNEL_URL = RSSHUB_BASE.rstrip("/") + "/telegram/channel/{channel}"
 HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; SMM-Agent/1.0)"}
 
+# Local reduce: list fields merged across chunk analyses, top items kept
+MERGE_FIELDS = ("hot_topics", "content_gaps", "best_formats", "our_opportunities")
+MERGE_TOP = 7
+
 
 async def run_competitor_monitoring() -> dict:
-    """Full WF6: fetch competitor RSS → parse → AI analyze → save."""
+    """Full WF6: fetch competitor RSS → store new posts → AI analyze the delta → save.
+
+    Returns {"no_new": True} without calling the LLM when no channel has
+    posts above its watermark.
+    """
     logger.info("WF6: Starting competitor monitoring")
 
-    # 1. Fetch competitor posts
-    all_posts = await _fetch_competitor_posts()
-    if not all_posts:
+    # 1. Fetch competitor posts and store the unseen ones. Failed fetches do
+    # not stop the run: posts stored earlier may still await analysis
+    fetched = await _fetch_competitor_posts()
+    if fetched:
+        stored = await store_competitor_posts(fetched)
+        logger.info(f"WF6: {stored}/{len(fetched)} fetched posts are new")
+    else:
         logger.warning("WF6: No competitor data fetched")
-        return {"error": "No competitor data"}
 
-    # 2. AI analysis
-    posts_text = "\n---\n".join(
-        f"{p['title']}" + (f": {p['description']}" if p.get("description") else "")
-        for p in all_posts[:20]
-    )
-    prompt = COMPETITOR_ANALYSIS.format(count=len(all_posts), posts=posts_text)
-    analysis = await ask_ai_json(
-        prompt,
-        system="Ты стратег по контент-маркетингу. Отвечай строго JSON без markdown.",
-    )
+    # 2. Daily cadence/format snapshot, computed locally
+    stats = await snapshot_competitor_stats()
+
+    # 3. Analyze only posts above each channel's watermark
+    today = datetime.now().strftime("%Y-%m-%d")
+    all_posts = await get_unanalyzed_competitor_posts()
+    if not all_posts:
+        logger.info("WF6: No new competitor activity, skipping analysis")
+        return {"date": today, "no_new": True, "posts_count": 0}
+
+    # Map: analyze token-budgeted chunks concurrently; reduce: merge locally
+    lines = [
+        f"{p['title']}" + (f": {p['description'][:200]}" if p.get("description") else "")
+        for p in all_posts
+    ]
+    chunks = _chunk_with_stats(all_posts, lines, stats, COMPETITOR_CHUNK_TOKENS)
+    results = await asyncio.gather(*(
+        _analyze_chunk(chunk, stats_text) for chunk, stats_text in chunks
+    ))
+    chunks = [chunk for chunk, _ in chunks]
+    partials = [(len(chunk), a) for chunk, a in zip(chunks, results) if a]
+    logger.info(f"WF6: {len(partials)}/{len(chunks)} chunks analyzed")
+    analysis = _merge_analyses(partials)
+    posts_text = "\n---\n".join(lines)
+    analyzed = [bool(a) for chunk, a in zip(chunks, results) for _ in chunk]
 
     if not analysis:
         logger.error("WF6: AI analysis failed")
         return {"error": "AI analysis failed"}
 
-    # 3. Save to DB
-    today = datetime.now().strftime("%Y-%m-%d")
+    # 4. Save to DB and move the watermarks past the analyzed posts; a channel
+    # stops at its first post from a failed chunk so it is retried next run
     await save_competitor_insight(today, analysis, posts_text)
+    watermarks, blocked = {}, set()
+    for p, ok in zip(all_posts, analyzed):
+        if not ok:
+            blocked.add(p["channel"])
+        elif p["channel"] not in blocked:
+            watermarks[p["channel"]] = p["id"]
+    await advance_competitor_watermarks(watermarks)
 
     logger.info(f"WF6: Saved competitor insights for {today}")
     return {"date": today, "analysis": analysis, "posts_count": len(all_posts)}
 
 
-async def _fetch_competitor_posts() -> list[dict]:
-    """Fetch and parse RSS feeds from competitor channels."""
-    posts = []
+def _chunk_with_stats(posts: list[dict], lines: list[str], stats: list[dict],
+                      budget: int) -> list[tuple[list[str], str]]:
+    """Pack post lines into chunks in order, each with the stats lines of
+    only its own channels; both count against the token budget."""
+    stats_lines = {st["channel"]: format_stats_line(st) for st in stats}
+    chunks, current, channels, used = [], [], [], 0
+
+    def _close():
+        text = "\n".join(stats_lines[c] for c in channels if c in stats_lines)
+        chunks.append((current, text or "нет данных"))
+
+    for post, line in zip(posts, lines):
+        channel = post["channel"]
+        cost = estimate_tokens(line)
+        if channel not in channels:
+            cost += estimate_tokens(stats_lines.get(channel, ""))
+        if current and used + cost > budget:
+            _close()
+            current, channels, used = [], [], 0
+            cost = estimate_tokens(line) + estimate_tokens(stats_lines.get(channel, ""))
+        current.append(line)
+        if channel not in channels:
+            channels.append(channel)
+        used += cost
+    if current:
+        _close()
+    return chunks
+
+
+async def _analyze_chunk(lines: list[str], stats_text: str) -> dict:
+    prompt = COMPETITOR_ANALYSIS.format(
+        count=len(lines), posts="\n---\n".join(lines), stats=stats_text,
+    )
+    return await ask_ai_json(
+        prompt,
+        system="Ты стратег по контент-маркетингу. Отвечай строго JSON без markdown.",
+    )
+
 
-    async with httpx.AsyncClient(timeout=15, headers=HEADERS) as client:
-        for channel in COMPETITOR_CHANNELS:
-            url = RSSHUB_BASE.format(channel=channel)
-            try:
-                resp = await client.get(url)
-                resp.raise_for_status()
-                channel_posts = _parse_rss(resp.text, channel)
-                posts.extend(channel_posts)
-                logger.info(f"WF6: {channel} -> {len(channel_posts)} posts")
-            except Exception as e:
-                logger.warning(f"WF6: Failed to fetch {channel}: {e}")
+def _merge_analyses(partials: list[tuple[int, dict]]) -> dict:
+    """Merge chunk analyses; list items are ranked by the number of posts behind them.
+
+    Each item weighs as much as its chunk's post count, summed over every
+    chunk that mentions it. Items are matched by their stemmed word set, so
+    small wording differences between chunks collapse into one entry.
+    """
+    if not partials:
+        return {}
+    if len(partials) == 1:
+        return partials[0][1]
+
+    merged = {}
+    for field in MERGE_FIELDS:
+        weights = defaultdict(float)
+        labels = {}
+        for weight, analysis in partials:
+            for item in analysis.get(field) or []:
+                if not isinstance(item, str) or not item.strip():
+                    continue
+                key = " ".join(sorted(set(tokenize(item)))) or item.strip().lower()
+                labels.setdefault(key, item.strip())
+                weights[key] += weight
+        ranked = sorted(weights, key=lambda k: weights[k], reverse=True)
+        merged[field] = [labels[k] for k in ranked[:MERGE_TOP]]
+
+    alerts = [a.get("urgent_alert", "").strip() for _, a in partials]
+    merged["urgent_alert"] = "; ".join(dict.fromkeys(a for a in alerts if a))
+    return merged
 
+
+async def _fetch_competitor_posts() -> list[dict]:
+    """Fetch and parse RSS feeds from all active competitor channels concurrently."""
+    channels = await get_competitor_channels()
+    urls = {RSSHUB_CHANNEL_URL.format(channel=ch): ch for ch in channels}
+
+    bodies = await fetch_many(
+        list(urls),
+        concurrency=COMPETITOR_FETCH_CONCURRENCY,
+        per_host=COMPETITOR_PER_HOST_LIMIT,
+        retries=COMPETITOR_FETCH_RETRIES,
+        headers=HEADERS,
+    )
+
+    posts = []
+    for url, body in bodies.items():
+        channel = urls[url]
+        if body is None:
+            continue
+        channel_posts = _parse_rss(body, channel)
+        posts.extend(channel_posts)
+        logger.info(f"WF6: {channel} -> {len(channel_posts)} posts")
+
+    logger.info(f"WF6: Fetched {sum(b is not None for b in bodies.values())}/{len(urls)} channels")
     return posts
 
 
 def _parse_rss(body: str, source: str) -> list[dict]:
-    """Parse titles and descriptions from RSS XML."""
-    # CDATA titles
-    cdata = re.findall(r"<title><!\[CDATA\[([^\]]{10,200})\]\]>", body)
-    plain = re.findall(r"<title>([^<]{10,150})</title>", body)
-    plain = [t.strip() for t in plain if not t.startswith("http") and "<?" not in t]
-
-    # Descriptions
-    descs = re.findall(r"<description><!\[CDATA\[(.+?)\]\]></description>", body, re.DOTALL)
-    descs = [re.sub(r"<[^>]+>", "", d).strip()[:200] for d in descs]
+    """Parse feed items into posts keyed by guid or content hash."""
+    posts = []
+    for item in parse_rss_items(body):
+        description = re.sub(r"<[^>]+>", " ", item["description"])
+        description = re.sub(r"\s+", " ", description).strip()
+        if not item["title"] and not description:
+            continue
+        text = description or item["title"]
+        posts.append({
+            "title": item["title"][:200],
+            "description": description,
+            "link": item["link"],
+            "key": item_key(item),
+            "published_at": _parse_date(item["pub_date"]),
+            "source": source,
+            "text_length": len(text),
+            "has_media": item["has_media"],
+            "hashtags": re.findall(r"#\w+", text),
+        })
+    return posts
 
-    titles = list(dict.fromkeys(cdata + plain))[:8]
 
-    return [
-        {"title": t, "description": descs[i] if i < len(descs) else "", "source": source}
-        for i, t in enumerate(titles)
-    ]
+def _parse_date(value: str) -> str | None:
+    """RFC 822 feed date -> naive server-local ISO time (as fetched_at is stored)."""
+    try:
+        return parsedate_to_datetime(value).astimezone().replace(tzinfo=None).isoformat()
+    except (TypeError, ValueError):
+        return None
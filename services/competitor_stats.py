@@ -0,0 +1,75 @@
+"""Local competitor cadence and format statistics, computed without the LLM."""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from config import TIMEZONE
+from database import aggregate_competitor_posts, save_competitor_stats
+
+logger = logging.getLogger(__name__)
+
+STATS_WINDOW_DAYS = 30
+PEAK_HOURS = 3
+TOP_HASHTAGS = 5
+
+
+async def compute_competitor_stats(days: int = STATS_WINDOW_DAYS) -> list[dict]:
+    """Per-channel posting frequency, hours, length, media share and hashtags.
+
+    Aggregation runs in SQLite (one GROUP BY per metric family); only the
+    hour histograms and hashtag counts are folded in Python.
+    """
+    now = datetime.now()
+    since = (now - timedelta(days=days)).isoformat()
+    offset = ZoneInfo(TIMEZONE).utcoffset(now) - now.astimezone().utcoffset()
+    hour_shift = f"{int(offset.total_seconds() // 60):+d} minutes"
+
+    totals, hours = await aggregate_competitor_posts(since, hour_shift)
+
+    hist = defaultdict(Counter)
+    for row in hours:
+        hist[row["channel"]][row["hour"]] += row["posts"]
+
+    stats = []
+    for row in totals:
+        channel = row["channel"]
+        # Frequency over the observed span, so newly added channels are not diluted
+        first = datetime.fromisoformat(row["first_at"])
+        span_days = min(days, max(1.0, (now - first).total_seconds() / 86400))
+        tags = Counter((row["all_hashtags"] or "").lower().split())
+        stats.append({
+            "channel": channel,
+            "posts": row["posts"],
+            "posts_per_day": round(row["posts"] / span_days, 2),
+            "avg_length": round(row["avg_length"] or 0),
+            "media_share": round(row["media_share"] or 0, 2),
+            "avg_hashtags": round(row["avg_hashtags"] or 0, 1),
+            "peak_hours": [h for h, _ in hist[channel].most_common(PEAK_HOURS)],
+            "top_hashtags": [t for t, _ in tags.most_common(TOP_HASHTAGS)],
+        })
+    stats.sort(key=lambda st: st["posts_per_day"], reverse=True)
+    return stats
+
+
+async def snapshot_competitor_stats() -> list[dict]:
+    """Compute today's stats and store them as the daily snapshot."""
+    stats = await compute_competitor_stats()
+    today = datetime.now().strftime("%Y-%m-%d")
+    await save_competitor_stats(today, stats)
+    logger.info(f"WF6: Stats snapshot for {len(stats)} channels")
+    return stats
+
+
+def format_stats_line(st: dict) -> str:
+    """One compact line per channel, shared by the prompt and /competitors."""
+    line = (
+        f"@{st['channel']}: {st['posts_per_day']} п/день, ~{round(st['avg_length'] or 0)} симв, "
+        f"медиа {round(st['media_share'] * 100)}%, хэштегов {st['avg_hashtags']}/пост"
+    )
+    if st["peak_hours"]:
+        line += f", пик {','.join(str(h) for h in st['peak_hours'])}ч"
+    if st["top_hashtags"]:
+        line += f", {' '.join(st['top_hashtags'])}"
+    return line
@@ -0,0 +1,124 @@
+"""Local engagement analytics over post metrics, computed without the LLM."""
+
+import math
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from config import BRANDS, TIMEZONE
+from database import aggregate_post_engagement
+
+STATS_WINDOW_DAYS = 30
+# Two-sided p < 0.05 critical t by degrees of freedom (Welch); normal beyond
+T_CRITICAL = {
+    1: 12.71, 2: 4.30, 3: 3.18, 4: 2.78, 5: 2.57, 6: 2.45, 7: 2.36, 8: 2.31, 9: 2.26,
+    10: 2.23, 12: 2.18, 15: 2.13, 20: 2.09, 30: 2.04, 60: 2.00, 120: 1.98,
+}
+Z_CRITICAL = 1.96
+# Groups with fewer posts are shown but never flagged
+MIN_POSTS = 3
+
+WEEKDAYS = ["вс", "пн", "вт", "ср", "чт", "пт", "сб"]
+DIMENSIONS = {
+    "brand": ("Бренды", lambda r: BRANDS.get(r["project_id"], {}).get("name", r["project_id"])),
+    "category": ("Рубрики", lambda r: r["category"] or "—"),
+    "platform": ("Платформы", lambda r: r["platform"]),
+    "weekday": ("Дни недели", lambda r: WEEKDAYS[r["weekday"]]),
+    "hour": ("Часы", lambda r: f"{r['hour']:02d}ч"),
+}
+
+
+def _welch_t(group: tuple[int, float, float], rest: tuple[int, float, float]) -> tuple[float, float]:
+    """Welch t-test of a group's per-post ERs against all other posts'.
+
+    Each side is (n, sum, sum of squares) of per-post ER, so one viral post
+    weighs as one post, not as its views. Returns (t, degrees of freedom).
+    """
+    (n1, s1, q1), (n2, s2, q2) = group, rest
+    if n1 < 2 or n2 < 2:
+        return 0.0, 0.0
+    m1, m2 = s1 / n1, s2 / n2
+    v1 = max(0.0, (q1 - n1 * m1 * m1) / (n1 - 1)) / n1
+    v2 = max(0.0, (q2 - n2 * m2 * m2) / (n2 - 1)) / n2
+    if not v1 + v2:
+        return 0.0, 0.0
+    df = (v1 + v2) ** 2 / (v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1))
+    return (m1 - m2) / math.sqrt(v1 + v2), df
+
+
+def _t_critical(df: float) -> float:
+    """Critical t of the table row at or below df (conservative); normal beyond."""
+    if df > max(T_CRITICAL):
+        return Z_CRITICAL
+    return T_CRITICAL[max((k for k in T_CRITICAL if k <= df), default=1)]
+
+
+async def compute_engagement(start: date = None, end: date = None,
+                             project_id: str = None) -> dict:
+    """Engagement rate ((reactions + forwards + comments) / views, averaged per
+    post) overall and per brand, category, platform, weekday and hour, each
+    group Welch t-tested against the rest over per-post ERs.
+
+    SQLite does one GROUP BY over the latest metric sample per post; the
+    per-dimension folds run over those few rows in Python. Defaults to the
+    last STATS_WINDOW_DAYS days; with project_id, only that brand's posts
+    are compared.
+    """
+    now = datetime.now()
+    end = end or now.date()
+    start = start or end - timedelta(days=STATS_WINDOW_DAYS - 1)
+    offset = ZoneInfo(TIMEZONE).utcoffset(now) - now.astimezone().utcoffset()
+    hour_shift = f"{int(offset.total_seconds() // 60):+d} minutes"
+    rows = await aggregate_post_engagement(start.isoformat(), end.isoformat(), hour_shift)
+    if project_id:
+        rows = [r for r in rows if r["project_id"] == project_id]
+
+    views = sum(r["views"] for r in rows)
+    totals = tuple(sum(r[f] for r in rows) for f in ("er_posts", "er_sum", "er_sq_sum"))
+    stats = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "posts": sum(r["posts"] for r in rows),
+        "views": views,
+        "er": totals[1] / totals[0] if totals[0] else 0.0,
+        "dimensions": {},
+    }
+    for dim, (_, key_of) in DIMENSIONS.items():
+        groups: dict[str, list] = {}
+        for r in rows:
+            g = groups.setdefault(key_of(r), [0, 0, 0, 0.0, 0.0])
+            g[0] += r["posts"]
+            g[1] += r["views"]
+            g[2] += r["er_posts"]
+            g[3] += r["er_sum"]
+            g[4] += r["er_sq_sum"]
+        result = []
+        for key, (posts, g_views, n, er_sum, er_sq_sum) in groups.items():
+            rest = (totals[0] - n, totals[1] - er_sum, totals[2] - er_sq_sum)
+            t, df = _welch_t((n, er_sum, er_sq_sum), rest)
+            flag = ""
+            if n >= MIN_POSTS and df and abs(t) >= _t_critical(df):
+                flag = "↑" if t > 0 else "↓"
+            result.append({
+                "key": key, "posts": posts, "views": g_views,
+                "er": er_sum / n if n else 0.0,
+                "t": round(t, 2), "flag": flag,
+            })
+        result.sort(key=lambda g: g["er"], reverse=True)
+        stats["dimensions"][dim] = result
+    return stats
+
+
+def format_engagement_digest(stats: dict) -> str:
+    """Compact numeric digest shared by the report prompts and /stats."""
+    if not stats["posts"]:
+        return "нет данных о просмотрах"
+    lines = [
+        f"{stats['start']} — {stats['end']}: {stats['posts']} постов, {stats['views']} просмотров, "
+        f"ER {stats['er'] * 100:.2f}%"
+    ]
+    for dim, (title, _) in DIMENSIONS.items():
+        groups = stats["dimensions"][dim]
+        lines.append(f"{title}: " + ", ".join(
+            f"{g['key']} {g['er'] * 100:.2f}% (n={g['posts']}){g['flag']}" for g in groups
+        ))
+    return "\n".join(lines)
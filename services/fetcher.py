@@ -0,0 +1,67 @@
+"""Bounded-concurrency HTTP fetching with per-host limits and jittered retries."""
+
+import asyncio
+import logging
+import random
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+
+async def fetch_many(urls: list[str], concurrency: int, per_host: int,
+                     retries: int = 3, timeout: float = 15,
+                     headers: dict = None) -> dict[str, str | None]:
+    """Fetch all URLs concurrently. Returns {url: body or None on failure}.
+
+    At most `concurrency` requests are in flight overall and at most
+    `per_host` against any single host, so a sweep takes roughly the
+    slowest request's time instead of the sum of all of them.
+    """
+    global_limit = asyncio.Semaphore(concurrency)
+    host_limits: dict[str, asyncio.Semaphore] = {}
+
+    async def _fetch(client: httpx.AsyncClient, url: str) -> str | None:
+        host = urlsplit(url).netloc
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+        for attempt in range(retries + 1):
+            retry_after = None
+            # Host slot first: a request queued behind its busy host must not
+            # hold a global slot that requests to idle hosts could use
+            async with host_limit, global_limit:
+                try:
+                    resp = await client.get(url)
+                    if resp.status_code not in RETRY_STATUSES:
+                        resp.raise_for_status()
+                        return resp.text
+                    retry_after = resp.headers.get("retry-after")
+                    error = f"HTTP {resp.status_code}"
+                except httpx.TransportError as e:
+                    error = repr(e)
+                except httpx.HTTPStatusError as e:
+                    logger.warning(f"Fetch {url} failed: {e}")
+                    return None
+
+            if attempt == retries:
+                break
+            # Sleep outside the semaphores so other requests keep flowing
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+        logger.warning(f"Fetch {url} failed after {retries + 1} attempts: {error}")
+        return None
+
+    async with httpx.AsyncClient(timeout=timeout, headers=headers,
+                                 follow_redirects=True) as client:
+        bodies = await asyncio.gather(*(_fetch(client, url) for url in urls))
+    return dict(zip(urls, bodies))
+
+
+def backoff_delay(attempt: int, retry_after: str | None) -> float:
+    """Exponential backoff with full jitter; honors a numeric Retry-After."""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX) + random.uniform(0, 1)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
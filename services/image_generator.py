@@ -1,22 +1,67 @@
 """Generate visuals for posts using Pollinations.ai (free, no API key)."""
 
+import hashlib
 import logging
 import urllib.parse
+from collections import Counter
 
 import httpx
 
 from services.ai_client import ask_ai
+from services.brand_context import BrandContext
+from services.relevance import tokenize
 
 logger = logging.getLogger(__name__)
 
 POLLINATIONS_URL = "https://image.pollinations.ai/prompt/{prompt}?width=1080&height=1080&nologo=true"
 
+# Local prompt is used when the top concepts have at least this many hits
+VISUAL_MIN_HITS = 2
+
+
+def build_visual_prompt(post_content: str, ctx: BrandContext) -> tuple[str, int]:
+    """Fill an image prompt template from post key terms matched against the
+    brand's visual concepts (config BRANDS[...]["visual"]).
+
+    Returns (prompt, hits); hits is the confidence — how often the chosen
+    concepts occur in the post and trend.
+    """
+    visual = ctx.brand.get("visual", {})
+    concepts = visual.get("concepts", {})
+    text = f"{ctx.trend}\n{post_content[:800]}"
+    hits = Counter()
+    # Two-character terms kept for short concept keys such as "5g"
+    for term in tokenize(text, min_length=2):
+        for prefix, concept in concepts.items():
+            if term.startswith(prefix):
+                hits[concept] += 1
+                break
+    top = hits.most_common(2)
+
+    motifs = visual.get("motifs") or ["abstract geometric shapes"]
+    # Deterministic per post, but varied across posts
+    motif = motifs[int(hashlib.md5(post_content.encode("utf-8")).hexdigest(), 16) % len(motifs)]
+    subject = " and ".join(c for c, _ in top) or "abstract business concept"
+
+    prompt = (
+        f"{subject}, {motif}, {visual.get('style', 'flat design')}, "
+        f"{visual.get('colors', 'corporate blue')} color palette, "
+        "minimalist, clean background, no text, no letters"
+    )
+    return prompt, sum(n for _, n in top)
+
+
+async def generate_visual_prompt(post_content: str, ctx: BrandContext) -> str:
+    """Build the image prompt locally; ask AI only when the post gives too few key terms."""
+    local_prompt, hits = build_visual_prompt(post_content, ctx)
+    if hits >= VISUAL_MIN_HITS:
+        return local_prompt
 
-async def generate_visual_prompt(post_content: str, brand_name: str) -> str:
-    """Ask AI to create an image generation prompt based on post content."""
     prompt = f"""Создай промпт для генерации изображения к посту в соцсетях.
 
-Бренд: {brand_name}
+Бренд: {ctx.name}
+Тематика бренда: {ctx.brand["topics"]}
+Тема дня: {ctx.trend or "вечнозелёная"}
 Текст поста (фрагмент): {post_content[:300]}
 
 Требования к промпту:
@@ -31,14 +76,14 @@ async def generate_visual_prompt(post_content: str, brand_name: str) -> str:
 
     result = await ask_ai(prompt, max_tokens=150)
     if not result or result == "AI unavailable":
-        return f"Modern minimalist business illustration for {brand_name}, clean corporate style, blue tones"
+        return local_prompt
     return result.strip().strip('"').strip("'")
 
 
-async def generate_image(post_content: str, brand_name: str) -> bytes | None:
+async def generate_image(post_content: str, ctx: BrandContext) -> bytes | None:
     """Generate an image for a post. Returns image bytes or None."""
     try:
-        img_prompt = await generate_visual_prompt(post_content, brand_name)
+        img_prompt = await generate_visual_prompt(post_content, ctx)
         encoded = urllib.parse.quote(img_prompt)
         url = POLLINATIONS_URL.format(prompt=encoded)
 
@@ -0,0 +1,71 @@
+"""Background image generation queue: drafts never wait for the image provider."""
+
+import asyncio
+import logging
+
+from aiogram import Bot
+
+from config import IMAGE_WORKERS, IMAGE_RETRIES
+from database import save_post_image
+from services.brand_context import BrandContext
+from services.image_generator import generate_image
+from services.image_store import put_image
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = 10
+
+_queue: asyncio.Queue | None = None
+_workers: list[asyncio.Task] = []
+
+
+def start_image_workers(bot: Bot):
+    """Start IMAGE_WORKERS consumers; generated images are attached to drafts via bot."""
+    global _queue
+    _queue = asyncio.Queue()
+    for i in range(IMAGE_WORKERS):
+        _workers.append(asyncio.create_task(_worker(bot, i)))
+    logger.info(f"Image queue: {IMAGE_WORKERS} workers started")
+
+
+async def stop_image_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+def enqueue_image(post_id: int, content: str, ctx: BrandContext):
+    """Schedule image generation for a stored post. No-op if workers are not running."""
+    if _queue is None:
+        logger.warning(f"Image queue not started, skipping image for post #{post_id}")
+        return
+    _queue.put_nowait((post_id, content, ctx))
+
+
+async def _worker(bot: Bot, n: int):
+    from services.notifier import attach_draft_image
+
+    while True:
+        post_id, content, ctx = await _queue.get()
+        try:
+            image_data = await _generate_with_retries(post_id, content, ctx)
+            if image_data:
+                image_hash, path = await put_image(image_data)
+                await save_post_image(post_id, image_hash, path)
+                await attach_draft_image(bot, post_id)
+        except Exception as e:
+            logger.error(f"Image worker {n}: post #{post_id} failed: {e}")
+        finally:
+            _queue.task_done()
+
+
+async def _generate_with_retries(post_id: int, content: str, ctx: BrandContext) -> bytes | None:
+    for attempt in range(IMAGE_RETRIES + 1):
+        image_data = await generate_image(content, ctx)
+        if image_data:
+            return image_data
+        if attempt < IMAGE_RETRIES:
+            await asyncio.sleep(RETRY_DELAY * (attempt + 1))
+    logger.warning(f"Image for post #{post_id} failed after {IMAGE_RETRIES + 1} attempts")
+    return None
@@ -0,0 +1,98 @@
+"""Content-addressed image store on disk with Telegram file_id reuse."""
+
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from aiogram import Bot
+from aiogram.types import FSInputFile, Message
+
+from config import IMAGES_DIR, IMAGE_STORE_MAX_AGE_DAYS, IMAGE_STORE_MAX_MB
+from database import (
+    upsert_image, set_image_file_id, touch_image,
+    get_stored_images, mark_images_evicted,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def image_extension(data: bytes) -> str:
+    if data.startswith(b"\x89PNG"):
+        return "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return "jpg"
+
+
+async def put_image(data: bytes) -> tuple[str, str]:
+    """Store bytes under their sha256. Returns (hash, path); identical bytes are stored once."""
+    image_hash = hashlib.sha256(data).hexdigest()
+    path = IMAGES_DIR / image_hash[:2] / f"{image_hash}.{image_extension(data)}"
+    await asyncio.to_thread(_write_once, path, data)
+    await upsert_image(image_hash, str(path), len(data))
+    return image_hash, str(path)
+
+
+def _write_once(path: Path, data: bytes):
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+async def send_image(bot: Bot, chat_id: int, image: dict, **kwargs) -> Message | None:
+    """Send a stored image by Telegram file_id if known, else upload it once.
+
+    `image` is a dict with image_hash/path/file_id (see get_post_image).
+    """
+    file_id = image.get("file_id")
+    if file_id:
+        msg = await bot.send_photo(chat_id, file_id, **kwargs)
+        await touch_image(image["image_hash"])
+        return msg
+
+    path = image.get("path")
+    if not path or not Path(path).exists():
+        logger.warning(f"Image {image.get('image_hash') or path} is no longer available")
+        return None
+
+    msg = await bot.send_photo(chat_id, FSInputFile(path), **kwargs)
+    if image.get("image_hash") and msg.photo:
+        # Largest size is what Telegram stored; reuse it for every later send
+        await set_image_file_id(image["image_hash"], msg.photo[-1].file_id)
+    return msg
+
+
+async def evict_images(max_age_days: int = IMAGE_STORE_MAX_AGE_DAYS,
+                       max_total_mb: int = IMAGE_STORE_MAX_MB) -> int:
+    """Delete files unused for max_age_days, then least recently used ones over the cap.
+
+    Rows keep their Telegram file_id, so evicted images can still be re-sent.
+    """
+    images = await get_stored_images()
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+    budget = max_total_mb * 1024 * 1024
+
+    total = sum(img["size"] for img in images)
+    evicted = []
+    for img in images:  # least recently used first
+        if img["last_used_at"] >= cutoff and total <= budget:
+            break
+        evicted.append(img)
+        total -= img["size"]
+
+    await asyncio.to_thread(_unlink_all, [img["path"] for img in evicted])
+    await mark_images_evicted([img["hash"] for img in evicted])
+    if evicted:
+        logger.info(f"Image store: evicted {len(evicted)} files")
+    return len(evicted)
+
+
+def _unlink_all(paths: list[str]):
+    for path in paths:
+        Path(path).unlink(missing_ok=True)
+
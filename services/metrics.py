@@ -0,0 +1,121 @@
+"""Engagement metrics collector: batched, age-adaptive, rate-limited polling."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import httpx
+
+from config import (
+    CHANNEL_ID, METRICS_API_URL, METRICS_BATCH_SIZE, METRICS_RATE, METRICS_RETRIES,
+)
+from database import get_posts_for_metrics, save_post_metrics
+from services.fetcher import RETRY_STATUSES, backoff_delay
+from services.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# (post age up to, poll interval): fresh posts change fast, old ones barely
+POLL_SCHEDULE = [
+    (timedelta(hours=6), timedelta(minutes=30)),
+    (timedelta(days=2), timedelta(hours=3)),
+    (timedelta(days=7), timedelta(hours=12)),
+    (timedelta(days=30), timedelta(days=1)),
+]
+HTTP_TIMEOUT = 30
+
+_bucket = TokenBucket(METRICS_RATE / 60, 1)
+
+
+def poll_interval(age: timedelta) -> timedelta | None:
+    """How often to poll a post of this age; None once it is too old to track."""
+    for max_age, interval in POLL_SCHEDULE:
+        if age <= max_age:
+            return interval
+    return None
+
+
+def due_posts(posts: list[dict], now: datetime) -> list[dict]:
+    due = []
+    for post in posts:
+        interval = poll_interval(now - datetime.fromisoformat(post["published_at"]))
+        if not interval:
+            continue
+        checked = post["metrics_checked_at"]
+        if not checked or now - datetime.fromisoformat(checked) >= interval:
+            due.append(post)
+    return due
+
+
+async def _fetch_batch(client: httpx.AsyncClient, chat_id: int,
+                       message_ids: list[int]) -> dict[str, dict]:
+    """GET {METRICS_API_URL}/{chat_id}?ids=1,2,3 -> {"<message_id>": {"views": ..., ...}}."""
+    url = f"{METRICS_API_URL}/{chat_id}"
+    params = {"ids": ",".join(str(i) for i in message_ids)}
+    for attempt in range(METRICS_RETRIES + 1):
+        await _bucket.acquire()
+        try:
+            resp = await client.get(url, params=params)
+        except httpx.TransportError:
+            if attempt == METRICS_RETRIES:
+                raise
+            await asyncio.sleep(backoff_delay(attempt, None))
+            continue
+        if resp.status_code in RETRY_STATUSES and attempt < METRICS_RETRIES:
+            await asyncio.sleep(backoff_delay(attempt, resp.headers.get("retry-after")))
+            continue
+        resp.raise_for_status()
+        result = resp.json()
+        if not isinstance(result, dict):
+            raise ValueError(f"expected an object, got {type(result).__name__}")
+        return result
+
+
+async def collect_metrics() -> dict:
+    """Poll metrics of the published posts that are due. Returns {polled, changed, failed}."""
+    stats = {"polled": 0, "changed": 0, "failed": 0}
+    if not METRICS_API_URL:
+        return stats
+
+    now = datetime.now()
+    since = (now - POLL_SCHEDULE[-1][0]).isoformat()
+    posts = due_posts(await get_posts_for_metrics(since), now)
+    if not posts:
+        return stats
+
+    by_chat: dict[int, list[dict]] = {}
+    for post in posts:
+        chat_id = int(post["target"].partition(":")[2]) if post["target"] else CHANNEL_ID
+        by_chat.setdefault(chat_id, []).append(post)
+
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
+        for chat_id, chat_posts in by_chat.items():
+            for i in range(0, len(chat_posts), METRICS_BATCH_SIZE):
+                batch = chat_posts[i:i + METRICS_BATCH_SIZE]
+                try:
+                    result = await _fetch_batch(client, chat_id, [p["message_id"] for p in batch])
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.warning(f"Metrics: batch of {len(batch)} in {chat_id} failed: {e}")
+                    stats["failed"] += len(batch)
+                    continue
+                samples, checked = {}, []
+                for p in batch:
+                    sample = result.get(str(p["message_id"]))
+                    if sample is not None and not isinstance(sample, dict):
+                        logger.warning(
+                            f"Metrics: malformed sample for message {p['message_id']} "
+                            f"in {chat_id}: {sample!r}"
+                        )
+                        stats["failed"] += 1
+                        continue
+                    if sample is not None:
+                        samples[p["id"]] = sample
+                    checked.append(p["id"])
+                stats["changed"] += await save_post_metrics(samples, checked)
+                stats["polled"] += len(checked)
+
+    logger.info(
+        f"Metrics: polled {stats['polled']} posts, {stats['changed']} changed, "
+        f"{stats['failed']} failed"
+    )
+    return stats
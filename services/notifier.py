@@ -0,0 +1,122 @@
+"""Delivery of generated drafts (and their background images) to the admin chat."""
+
+import asyncio
+import logging
+
+from aiogram import Bot
+
+from config import ADMIN_CHAT_ID
+from database import (
+    get_post, set_post_admin_message_id, get_post_image, mark_post_image_delivered,
+    count_post_candidates, get_outbox_entries,
+)
+from keyboards import (
+    draft_keyboard, approved_keyboard, rejected_keyboard, published_keyboard,
+    interrupted_keyboard,
+)
+from services.image_store import send_image
+from services.renditions import get_post_visual
+from utils import format_post_card, split_message
+
+logger = logging.getLogger(__name__)
+
+# Drafts and images arrive concurrently; keep each card's parts together and
+# make sure an image is attached exactly once, whichever side comes second
+_delivery_lock = asyncio.Lock()
+
+
+async def send_draft(bot: Bot, chat_id: int, post_id: int) -> bool:
+    """Send a draft card with approval buttons and remember its message id."""
+    post = await get_post(post_id)
+    if not post:
+        return False
+
+    candidates = await count_post_candidates(post_id)
+    async with _delivery_lock:
+        card = format_post_card(post, limit=None)
+        for i, part in enumerate(split_message(card)):
+            if i == 0:
+                sent = await bot.send_message(
+                    chat_id, part, reply_markup=draft_keyboard(post_id, candidates),
+                )
+                await set_post_admin_message_id(post_id, sent.message_id)
+                post["admin_message_id"] = sent.message_id
+            else:
+                await bot.send_message(chat_id, part)
+
+        # The image may have finished before the text
+        await _send_image_if_ready(bot, chat_id, post)
+    return True
+
+
+async def refresh_draft_card(bot: Bot, post_id: int):
+    """Re-render an already delivered card after its text changed in the background."""
+    candidates = await count_post_candidates(post_id)
+    async with _delivery_lock:
+        post = await get_post(post_id)
+        if not post or not post.get("admin_message_id"):
+            return
+        if post["status"] == "approved":
+            markup = approved_keyboard(post_id, post.get("scheduled_at"))
+        elif post["status"] == "published":
+            markup = published_keyboard(post_id)
+        elif post["status"] == "rejected":
+            markup = rejected_keyboard(post_id, candidates)
+        else:
+            markup = draft_keyboard(post_id, candidates)
+        # Like send_draft: the first part keeps the buttons, the rest follow it
+        parts = split_message(format_post_card(post, limit=None))
+        try:
+            await bot.edit_message_text(
+                chat_id=ADMIN_CHAT_ID,
+                message_id=post["admin_message_id"],
+                text=parts[0],
+                reply_markup=markup,
+            )
+            for part in parts[1:]:
+                await bot.send_message(
+                    ADMIN_CHAT_ID, part, reply_to_message_id=post["admin_message_id"],
+                )
+        except Exception as e:
+            logger.warning(f"Could not refresh card of post #{post_id}: {e}")
+
+
+async def send_interrupted_notice(bot: Bot, post_id: int) -> bool:
+    """Ask the admin about a post's sends a crash interrupted: only they can
+    check whether the target got the post. False if there are none."""
+    entries = [e for e in await get_outbox_entries([post_id]) if e["status"] == "interrupted"]
+    if not entries:
+        return False
+    targets = "\n".join(f"• {e['target']}" for e in entries)
+    await bot.send_message(
+        ADMIN_CHAT_ID,
+        f"WF4: Отправка поста #{post_id} прервана сбоем, неизвестно, дошёл ли пост:\n"
+        f"{targets}\nПроверьте канал и выберите действие.",
+        reply_markup=interrupted_keyboard(entries),
+    )
+    return True
+
+
+async def attach_draft_image(bot: Bot, post_id: int):
+    """Reply to the draft card with its image once the background job is done."""
+    post = await get_post(post_id)
+    if not post:
+        return
+    async with _delivery_lock:
+        await _send_image_if_ready(bot, ADMIN_CHAT_ID, post)
+
+
+async def _send_image_if_ready(bot: Bot, chat_id: int, post: dict):
+    if not post.get("admin_message_id"):
+        return
+    image = await get_post_image(post["id"])
+    if not image or image["delivered"]:
+        return
+    # Preview the platform rendition so the publisher reuses its file_id
+    visual = await get_post_visual(post)
+    await send_image(
+        bot, chat_id, visual,
+        caption=f"Визуал для поста #{post['id']}",
+        reply_to_message_id=post["admin_message_id"],
+    )
+    await mark_post_image_delivered(post["id"])
@@ -1,36 +1,66 @@
 """WF1: Generate posts using AI based on trends + knowledge base."""
 
+import asyncio
 import logging
+from collections.abc import Awaitable, Callable
 from datetime import datetime
 
-from config import BRANDS
-from database import (
-    get_today_trends, get_insights, get_recent_posts, create_post,
+from config import (
+    BRANDS, POST_GENERATION_CONCURRENCY, MULTI_PLATFORM_GENERATION, POST_CANDIDATES,
 )
-from prompts import (
-    MASTER_SYSTEM, POST_GENERATION,
-    STYLE_PERSONAL_BRAND, STYLE_LEADER_TEAM, STYLE_PIXIE,
+from database import (
+    get_today_trends, create_post, get_recent_posts, save_post_candidates, set_post_similar_to,
 )
-from services.ai_client import ask_ai
-from services.image_generator import generate_image
+from prompts import MASTER_SYSTEM, POST_GENERATION, POST_GENERATION_MULTI, PLATFORM_RULES
+from services.ai_client import ask_ai, ask_ai_json, DEFAULT_TEMPERATURE
+from services.brand_context import BrandContext, build_brand_contexts
+from services.candidates import rank_candidates
+from services.image_queue import enqueue_image
+from services.similarity import find_similar, index_post
+from services.translator import enqueue_translation, translate_to_uz, bilingual
 
 logger = logging.getLogger(__name__)
 
-STYLE_MAP = {
-    "personal_brand": STYLE_PERSONAL_BRAND,
-    "leader_team": STYLE_LEADER_TEAM,
-    "pixie": STYLE_PIXIE,
-}
+# Extra candidates are sampled hotter so they actually differ from the first
+CANDIDATE_TEMPERATURE = 0.8
+# Published posts a candidate is compared against for novelty
+NOVELTY_HISTORY = 20
 
 
-async def run_post_generation(project_id: str = None, platform: str = None) -> list[dict]:
+async def run_post_generation(project_id: str = None, platform: str = None,
+                              on_post: Callable[[dict], Awaitable] = None,
+                              pregen_for: str = None) -> list[dict]:
     """Generate posts for specified or all projects/platforms.
 
-    Returns list of created post dicts with id, project_id, platform, content, image_data.
+    With MULTI_PLATFORM_GENERATION a brand's platforms share one LLM call;
+    platforms missing from its JSON fall back to single calls. Units run
+    concurrently (POST_GENERATION_CONCURRENCY); a failing unit does not
+    affect the others. `on_post` is awaited with each post as soon as it
+    is ready, so drafts can be delivered before the slowest task finishes.
+
+    Each unit is sampled once for all its platforms plus POST_CANDIDATES - 1
+    extra single-platform calls for the brand's primary (first) platform,
+    in parallel; the best variant per platform (see services.candidates)
+    becomes the draft and the rest go to the candidate pool behind the
+    "Следующий вариант" button. Variants
+    that near-duplicate an earlier post of the brand (SimHash) are demoted;
+    if every variant is one, the platform is regenerated once and, failing
+    that, the draft is flagged with `similar_to`.
+
+    Posts are generated in Russian only; the Uzbek half is appended by the
+    background translation queue after the draft has been delivered.
+    Images are generated by the background image queue, not awaited here.
+
+    With `pregen_for` (a YYYY-MM-DD date) posts are stored with status
+    'pregen' for that date, use that date's trends if there are any, and
+    are translated inline, so services.pregen can later promote them to
+    drafts without any LLM call.
+
+    Returns list of created post dicts (in task order) with id, project_id,
+    platform, content.
     """
-    logger.info("WF1: Starting post generation")
-    today = datetime.now().strftime("%Y-%m-%d")
-    created_posts = []
+    logger.info("WF1: Starting post generation" + (f" (pregen for {pregen_for})" if pregen_for else ""))
+    today = pregen_for or datetime.now().strftime("%Y-%m-%d")
 
     if project_id and platform:
         tasks = [(project_id, platform)]
@@ -45,72 +75,193 @@ async def run_post_generation(project_id: str = None, platform: str = None) -> l
 
     trends = await get_today_trends(today)
     trends_by_project = {t["project_id"]: t for t in trends}
+    contexts = await build_brand_contexts([pid for pid, _ in tasks], trends_by_project)
 
-    for pid, plat in tasks:
+    # Units of work: one per brand in multi-platform mode, else one per task
+    if MULTI_PLATFORM_GENERATION:
+        by_brand: dict[str, list[str]] = {}
+        for pid, plat in tasks:
+            by_brand.setdefault(pid, []).append(plat)
+        units = list(by_brand.items())
+    else:
+        units = [(pid, [plat]) for pid, plat in tasks]
+
+    slots = asyncio.Semaphore(POST_GENERATION_CONCURRENCY)
+
+    async def _run(pid: str, plats: list[str]) -> list[dict]:
+        ctx = contexts.get(pid)
+        if not ctx:
+            return []
+        posts = []
+        # Any failure ends this unit only; the posts saved so far are kept
         try:
-            post = await _generate_single(pid, plat, trends_by_project)
-            if post:
-                created_posts.append(post)
+            # Extra variants only for the brand's primary platform
+            primary = ctx.brand.get("platforms", ["telegram"])[0]
+            extra = POST_CANDIDATES - 1 if primary in plats else 0
+            async with slots:
+                samples = await asyncio.gather(
+                    _generate_contents(ctx, plats, DEFAULT_TEMPERATURE),
+                    *(
+                        _generate_contents(ctx, [primary], CANDIDATE_TEMPERATURE)
+                        for _ in range(extra)
+                    ),
+                    return_exceptions=True,
+                )
+            for e in samples:
+                if isinstance(e, Exception):
+                    logger.error(f"WF1: Error generating {pid}/{','.join(plats)}: {e}")
+            samples = [s for s in samples if not isinstance(s, Exception)]
+            recent = await get_recent_posts(pid, limit=NOVELTY_HISTORY)
+            history = [p["content"] for p in recent]
+
+            for plat in plats:
+                ranked = rank_candidates(
+                    [s[plat] for s in samples if s.get(plat)], plat, ctx.brand, history,
+                )
+                if not ranked:
+                    continue
+                # Platform variants of this run share a topic on purpose
+                siblings = {p["id"] for p in posts}
+                try:
+                    ranked, similar = await _demote_duplicates(ctx, plat, ranked, history, siblings)
+                    post = await _save_post(ctx, plat, ranked[0][0], similar, pregen_for)
+                    if len(ranked) > 1:
+                        await save_post_candidates(post["id"], ranked[1:])
+                except Exception as e:
+                    logger.error(f"WF1: Error saving {pid}/{plat}: {e}")
+                    continue
+                posts.append(post)
+                if on_post:
+                    try:
+                        await on_post(post)
+                    except Exception as e:
+                        logger.error(f"WF1: Delivery failed for post #{post['id']}: {e}")
+                if not pregen_for:
+                    enqueue_translation(post["id"], post["content"])
         except Exception as e:
-            logger.error(f"WF1: Error generating {pid}/{plat}: {e}")
+            logger.error(f"WF1: Error generating {pid}/{','.join(plats)}: {e}")
+        return posts
+
+    results = await asyncio.gather(*(_run(pid, plats) for pid, plats in units))
+    by_task = {(p["project_id"], p["platform"]): p for posts in results for p in posts}
+    created_posts = [by_task[t] for t in tasks if t in by_task]
 
     logger.info(f"WF1: Generated {len(created_posts)} posts")
     return created_posts
 
 
-async def _generate_single(project_id: str, platform: str,
-                           trends_by_project: dict) -> dict | None:
-    """Generate a single post via AI + visual."""
-    brand = BRANDS.get(project_id)
-    if not brand:
-        return None
+async def _generate_contents(ctx: BrandContext, platforms: list[str],
+                             temperature: float = DEFAULT_TEMPERATURE) -> dict[str, str]:
+    """Post text per platform: one multi-platform call, single calls for the rest."""
+    contents = {}
+    if len(platforms) > 1:
+        contents = await _generate_multi(ctx, platforms, temperature)
 
-    trend_data = trends_by_project.get(project_id, {})
-    trend = trend_data.get("trend", "") if trend_data else ""
-    idea = trend_data.get("idea", "") if trend_data else ""
+    missing = [p for p in platforms if p not in contents]
+    if missing:
+        singles = await asyncio.gather(*(
+            _generate_single(ctx, p, temperature) for p in missing
+        ))
+        contents.update({p: c for p, c in zip(missing, singles) if c})
+    return contents
 
-    insights_list = await get_insights(project_id, limit=8)
-    insights_text = "\n".join(
-        f"[{i['type']}] {i['insight']}" for i in insights_list
-    ) or "база знаний пока пуста"
 
-    recent = await get_recent_posts(project_id, limit=5)
-    recent_text = "\n".join(
-        f"- {p['platform']}: {p['content'][:100]}..." for p in recent
-    ) or "нет предыдущих постов"
+async def _generate_multi(ctx: BrandContext, platforms: list[str],
+                          temperature: float = DEFAULT_TEMPERATURE) -> dict[str, str]:
+    """Ask once for a JSON object with one variant per platform."""
+    prompt = POST_GENERATION_MULTI.format(
+        platforms=", ".join(platforms),
+        platform_rules=_platform_rules(platforms),
+        **ctx.prompt_fields(),
+    )
+    result = await ask_ai_json(
+        prompt, system=MASTER_SYSTEM, max_tokens=2000 * len(platforms), temperature=temperature,
+    )
+    variants = {
+        p: result[p].strip() for p in platforms
+        if isinstance(result.get(p), str) and result[p].strip()
+    }
+    if len(variants) < len(platforms):
+        logger.warning(
+            f"WF1: Multi-platform call for {ctx.project_id} returned "
+            f"{sorted(variants)} of {platforms}"
+        )
+    return variants
 
-    style_ref = STYLE_MAP.get(project_id, "")
 
+async def _generate_single(ctx: BrandContext, platform: str,
+                           temperature: float = DEFAULT_TEMPERATURE) -> str | None:
+    """Generate a single post text via AI."""
     prompt = POST_GENERATION.format(
         platform=platform,
-        project_name=brand["name"],
-        voice=brand["voice"],
-        audience=brand["audience"],
-        goal=brand["goal"],
-        topics=brand["topics"],
-        forbidden=brand["forbidden"],
-        trend=trend or "нет тренда — используй вечнозелёную тему",
-        idea=idea,
-        insights=insights_text,
-        recent_posts=recent_text,
-        style_reference=style_ref,
+        platform_rules=_platform_rules([platform]),
+        **ctx.prompt_fields(),
     )
 
-    content = await ask_ai(prompt, system=MASTER_SYSTEM, max_tokens=2000)
+    content = await ask_ai(prompt, system=MASTER_SYSTEM, max_tokens=2000, temperature=temperature)
     if not content or content == "AI unavailable":
-        logger.error(f"WF1: AI failed for {project_id}/{platform}")
+        logger.error(f"WF1: AI failed for {ctx.project_id}/{platform}")
         return None
+    return content
+
+
+async def _demote_duplicates(ctx: BrandContext, platform: str, ranked: list[tuple[str, float]],
+                             history: list[str], exclude: set[int],
+                             ) -> tuple[list[tuple[str, float]], int | None]:
+    """Move near-duplicates of earlier posts behind fresh variants.
+
+    Returns the reordered variants and, if even the first one is a
+    near-duplicate, the id of the post it resembles.
+    """
+    fresh, duplicates = [], []
+    for content, score in ranked:
+        match = await find_similar(ctx.project_id, content, exclude)
+        if match:
+            duplicates.append((content, score, match))
+        else:
+            fresh.append((content, score))
+
+    if not fresh:
+        logger.info(f"WF1: All {platform} variants of {ctx.project_id} are repeats, regenerating")
+        content = await _generate_single(ctx, platform, CANDIDATE_TEMPERATURE)
+        if content and not await find_similar(ctx.project_id, content, exclude):
+            fresh = rank_candidates([content], platform, ctx.brand, history)
+
+    for content, _, (post_id, distance) in duplicates:
+        logger.info(f"WF1: {ctx.project_id}/{platform} variant repeats post #{post_id} "
+                    f"(distance {distance})")
+    ordered = fresh + [(c, s) for c, s, _ in duplicates]
+    similar = None if fresh else duplicates[0][2][0]
+    return ordered, similar
 
-    # Generate visual
-    image_data = await generate_image(content, brand["name"])
 
-    post_id = await create_post(project_id, platform, content)
-    logger.info(f"WF1: Created post #{post_id} for {project_id}/{platform}")
+async def _save_post(ctx: BrandContext, platform: str, content: str,
+                     similar_to: int = None, pregen_for: str = None) -> dict:
+    """Store the draft, index its fingerprint and queue its visual in the background."""
+    if pregen_for:
+        uz = await translate_to_uz(content)
+        if uz:
+            content = bilingual(content, uz)
+        post_id = await create_post(
+            ctx.project_id, platform, content, scheduled_date=pregen_for, status="pregen",
+        )
+    else:
+        post_id = await create_post(ctx.project_id, platform, content)
+    logger.info(f"WF1: Created post #{post_id} for {ctx.project_id}/{platform}")
+    if similar_to:
+        await set_post_similar_to(post_id, similar_to)
+    await index_post(ctx.project_id, post_id, content)
+    enqueue_image(post_id, content, ctx)
 
     return {
         "id": post_id,
-        "project_id": project_id,
+        "project_id": ctx.project_id,
         "platform": platform,
         "content": content,
-        "image_data": image_data,
+        "similar_to": similar_to,
     }
+
+
+def _platform_rules(platforms: list[str]) -> str:
+    """Requirement lines for the given platforms only."""
+    return "\n".join(f"- {p}: {PLATFORM_RULES[p]}" for p in platforms if p in PLATFORM_RULES)
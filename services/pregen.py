@@ -0,0 +1,111 @@
+"""WF1 (night): speculative pre-generation of the next morning's drafts."""
+
+import logging
+from datetime import datetime, timedelta
+
+from aiogram import Bot
+
+from database import get_pregen_posts, get_today_trends, set_posts_status
+from services.notifier import send_draft
+from services.post_generator import run_post_generation
+from services.relevance import tokenize
+from services.similarity import forget_posts
+from services.translator import SEPARATOR, enqueue_translation
+
+logger = logging.getLogger(__name__)
+
+# Hour of the WF1 morning run (scheduler.wf1_generate)
+MORNING_RUN_HOUR = 8
+# Share of the trend's terms that must appear in the brand's prefiltered
+# news items for it to be real news (not the LLM's evergreen fallback)
+TREND_NEWS_SHARE = 0.3
+# Share of the trend's terms found in a draft for the trend to count as covered
+TREND_COVERED_SHARE = 0.5
+
+
+def _target_date() -> str:
+    """Date of the next morning run."""
+    now = datetime.now()
+    if now.hour >= MORNING_RUN_HOUR:
+        now += timedelta(days=1)
+    return now.strftime("%Y-%m-%d")
+
+
+async def run_pregeneration() -> list[dict]:
+    """Generate evergreen drafts for the next morning run (status 'pregen')."""
+    target = _target_date()
+    existing = await get_pregen_posts(target)
+    if existing:
+        logger.info(f"Pregen: {len(existing)} drafts for {target} already waiting")
+        return existing
+    posts = await run_post_generation(pregen_for=target)
+    logger.info(f"Pregen: {len(posts)} drafts prepared for {target}")
+    return posts
+
+
+async def refresh_pregen_for_trends() -> list[str]:
+    """After the 07:00 trend run, regenerate brands whose trend changes the topic.
+
+    A trend matters if it comes from today's news for the brand (WF2 falls
+    back to an evergreen topic otherwise) and none of the brand's
+    pre-generated drafts already covers it. Returns the regenerated
+    project ids.
+    """
+    today = datetime.now().strftime("%Y-%m-%d")
+    pregen = await get_pregen_posts(today)
+    if not pregen:
+        return []
+
+    by_brand: dict[str, list[dict]] = {}
+    for post in pregen:
+        by_brand.setdefault(post["project_id"], []).append(post)
+    trends = {t["project_id"]: t for t in await get_today_trends(today)}
+
+    regenerated = []
+    for pid, posts in by_brand.items():
+        trend = trends.get(pid)
+        if not trend or not trend.get("trend"):
+            continue
+        if _share(trend["trend"], trend.get("raw_trends") or "") < TREND_NEWS_SHARE:
+            continue
+        text = f"{trend['trend']} {trend.get('idea') or ''}"
+        if any(_share(text, post["content"]) >= TREND_COVERED_SHARE for post in posts):
+            continue
+
+        fresh = await run_post_generation(project_id=pid, pregen_for=today)
+        if not fresh:
+            logger.warning(f"Pregen: regeneration for {pid} failed, keeping evergreen drafts")
+            continue
+        old_ids = [p["id"] for p in posts]
+        await set_posts_status(old_ids, "superseded")
+        await forget_posts(old_ids)
+        regenerated.append(pid)
+        logger.info(f"Pregen: {pid} regenerated for trend '{trend['trend'][:60]}'")
+    return regenerated
+
+
+def _share(text: str, other: str) -> float:
+    """Share of text's terms that also occur in other."""
+    terms = set(tokenize(text))
+    if not terms:
+        return 0.0
+    return len(terms & set(tokenize(other))) / len(terms)
+
+
+async def promote_pregen(bot: Bot, chat_id: int) -> list[dict]:
+    """Turn today's pre-generated posts into drafts and deliver them. No LLM calls."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    posts = await get_pregen_posts(today)
+    if not posts:
+        return []
+    await set_posts_status([p["id"] for p in posts], "draft")
+    for post in posts:
+        try:
+            await send_draft(bot, chat_id, post["id"])
+        except Exception as e:
+            logger.error(f"Pregen: delivery failed for post #{post['id']}: {e}")
+        if SEPARATOR not in post["content"]:
+            # Inline translation failed overnight
+            enqueue_translation(post["id"], post["content"])
+    logger.info(f"Pregen: promoted {len(posts)} drafts")
+    return posts
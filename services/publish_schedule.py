@@ -0,0 +1,188 @@
+"""WF4: exact-time publishing — slot search and one APScheduler job per approved post."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, time
+from zoneinfo import ZoneInfo
+
+from aiogram import Bot
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
+
+from config import ADMIN_CHAT_ID, TIMEZONE, PUBLISH_SLOTS
+from database import (
+    get_post, get_scheduled_posts, get_taken_slots, set_post_scheduled_at,
+    get_failed_outbox_attempts,
+)
+from services.notifier import refresh_draft_card
+from services.publisher import publish_and_record
+from services.translator import ensure_translation
+from utils import format_slot
+
+logger = logging.getLogger(__name__)
+
+# How far ahead to look for a free publish slot
+SLOT_SEARCH_DAYS = 30
+# The window of the day's last slot: a post approved later waits for the
+# next morning
+LAST_SLOT_WINDOW_MINUTES = 180
+# A due post still waiting for its Uzbek half is retried this often
+TRANSLATION_WAIT_MINUTES = 5
+# Failed publishes of approved posts: first retry delay, doubled per failed
+# attempt up to the cap, and the attempts after which retrying stops
+PUBLISH_RETRY_MINUTES = 5
+PUBLISH_RETRY_MAX_MINUTES = 240
+PUBLISH_RETRY_ATTEMPTS = 6
+
+# Set by start_publish_schedule (from scheduler.setup_scheduler)
+_scheduler: AsyncIOScheduler | None = None
+_bot: Bot | None = None
+_slot_lock = asyncio.Lock()
+
+
+def start_publish_schedule(scheduler: AsyncIOScheduler, bot: Bot):
+    """Attach the running scheduler and bot that per-post publish jobs use."""
+    global _scheduler, _bot
+    _scheduler, _bot = scheduler, bot
+
+
+def local_now() -> datetime:
+    return datetime.now(ZoneInfo(TIMEZONE)).replace(tzinfo=None, second=0, microsecond=0)
+
+
+def _day_slots(day) -> list[datetime]:
+    return sorted(datetime.combine(day, time.fromisoformat(s)) for s in PUBLISH_SLOTS)
+
+
+async def next_free_slot() -> datetime:
+    """Next publish slot without an approved/published post in its window.
+
+    A slot's window lasts until the next slot; the day's last slot closes
+    LAST_SLOT_WINDOW_MINUTES later (at midnight at the latest), so nothing
+    goes out at night. If the window that is open right now is still
+    unused, the post goes out immediately instead of waiting for the next
+    slot.
+    """
+    now = local_now()
+    taken = sorted(
+        datetime.fromisoformat(t) for t in await get_taken_slots(now.strftime("%Y-%m-%d"))
+    )
+    for offset in range(SLOT_SEARCH_DAYS):
+        day = now.date() + timedelta(days=offset)
+        slots = _day_slots(day)
+        last_end = min(
+            slots[-1] + timedelta(minutes=LAST_SLOT_WINDOW_MINUTES),
+            datetime.combine(day + timedelta(days=1), time()),
+        )
+        ends = slots[1:] + [last_end]
+        for start, end in zip(slots, ends):
+            if end <= now or any(start <= t < end for t in taken):
+                continue
+            return max(start, now)
+    return now
+
+
+def _register_publish_job(post_id: int, run_at: datetime):
+    if not _scheduler:
+        logger.warning(f"Scheduler not running, post #{post_id} not scheduled")
+        return
+    _scheduler.add_job(
+        _job_publish_post,
+        DateTrigger(run_date=max(run_at, local_now()), timezone=TIMEZONE),
+        id=f"publish_post_{post_id}",
+        kwargs={"bot": _bot, "post_id": post_id},
+        replace_existing=True,
+        misfire_grace_time=None,
+    )
+
+
+async def schedule_post(post_id: int, run_at: datetime = None) -> datetime:
+    """Give an approved post its publish time (next free slot by default)."""
+    async with _slot_lock:
+        run_at = run_at or await next_free_slot()
+        await set_post_scheduled_at(post_id, run_at.isoformat(timespec="minutes"))
+    _register_publish_job(post_id, run_at)
+    logger.info(f"WF4: Post #{post_id} scheduled for {format_slot(run_at.isoformat())}")
+    return run_at
+
+
+async def unschedule_post(post_id: int):
+    """Drop a post's publish job and time (rejected or published by hand)."""
+    if _scheduler and _scheduler.get_job(f"publish_post_{post_id}"):
+        _scheduler.remove_job(f"publish_post_{post_id}")
+    await set_post_scheduled_at(post_id, None)
+
+
+async def recover_scheduled_posts() -> int:
+    """Re-register publish jobs after a restart; missed ones run right away.
+
+    Approved posts without a time (approved before exact scheduling) get
+    the next free slot.
+    """
+    posts = await get_scheduled_posts()
+    for post in posts:
+        if post["scheduled_at"]:
+            _register_publish_job(post["id"], datetime.fromisoformat(post["scheduled_at"]))
+        else:
+            await schedule_post(post["id"])
+    if posts:
+        logger.info(f"WF4: Recovered {len(posts)} scheduled posts")
+    return len(posts)
+
+
+async def publish_or_retry(bot: Bot, post: dict) -> tuple[bool, datetime | None]:
+    """Publish a post now; returns (published, retry time).
+
+    Success drops the post's slot and job. An approved post that fails
+    stays approved, keeps its slot and gets a retry job with backoff; a
+    draft published by hand stays a draft.
+    """
+    if await publish_and_record(bot, post, retry_failed=True):
+        await unschedule_post(post["id"])
+        return True, None
+    if post["status"] != "approved":
+        return False, None
+    return False, await schedule_publish_retry(post["id"])
+
+
+async def schedule_publish_retry(post_id: int) -> datetime | None:
+    """Retry job for an approved post whose publish failed, with exponential
+    backoff. None when there is nothing to retry automatically: interrupted
+    sends wait for the admin, and retrying stops after PUBLISH_RETRY_ATTEMPTS."""
+    attempts = await get_failed_outbox_attempts(post_id)
+    if not attempts:
+        return None
+    if attempts >= PUBLISH_RETRY_ATTEMPTS:
+        logger.error(f"WF4: Post #{post_id} failed {attempts} times, no more retries")
+        return None
+    delay = min(PUBLISH_RETRY_MINUTES * 2 ** (attempts - 1), PUBLISH_RETRY_MAX_MINUTES)
+    run_at = local_now() + timedelta(minutes=delay)
+    _register_publish_job(post_id, run_at)
+    logger.info(f"WF4: Post #{post_id} publish retry {attempts} at {format_slot(run_at.isoformat())}")
+    return run_at
+
+
+async def _job_publish_post(bot: Bot, post_id: int):
+    """WF4: Publish one approved post at its scheduled time."""
+    try:
+        post = await get_post(post_id)
+        if not post or post["status"] != "approved":
+            return
+
+        if not ensure_translation(post):
+            # Hold the post (its slot stays taken) until the translation lands
+            logger.info(f"WF4: Post #{post_id} waits for its translation")
+            _register_publish_job(post_id, local_now() + timedelta(minutes=TRANSLATION_WAIT_MINUTES))
+            return
+
+        published, retry_at = await publish_or_retry(bot, post)
+        if published:
+            await bot.send_message(ADMIN_CHAT_ID, f"WF4: Опубликован пост #{post_id}")
+        else:
+            retry = f", повтор {format_slot(retry_at.isoformat())}" if retry_at else ""
+            await bot.send_message(ADMIN_CHAT_ID, f"WF4: Ошибка публикации поста #{post_id}{retry}")
+        await refresh_draft_card(bot, post_id)
+
+    except Exception as e:
+        logger.error(f"WF4 job error for post #{post_id}: {e}")
+        await bot.send_message(ADMIN_CHAT_ID, f"WF4 error: {e}")
@@ -1,38 +1,173 @@
-"""WF4: Publish approved posts to the Telegram channel."""
+"""WF4: Publish approved posts to every target of their brand and platform."""
 
+import asyncio
 import logging
+import time
 
 from aiogram import Bot
 
-from config import CHANNEL_ID
-from database import get_approved_posts, update_post_status, set_post_channel_message_id
+from config import CHANNEL_ID, PUBLISH_TARGETS
+from database import (
+    get_post, get_approved_posts, update_post_status, set_post_channel_message_id,
+    create_outbox_entries, get_outbox_entries, claim_outbox_entry, finish_outbox_entry,
+    retry_outbox_errors, fail_interrupted_outbox, get_interrupted_outbox,
+    resolve_interrupted_outbox,
+)
+from services.notifier import send_interrupted_notice
+from services.targets import get_adapter
+from services.translator import ensure_translation
 
 logger = logging.getLogger(__name__)
 
 
-async def run_publisher(bot: Bot) -> list[dict]:
-    """Publish all approved posts scheduled for today."""
+def targets_for(post: dict) -> list[str]:
+    return PUBLISH_TARGETS.get(post["project_id"], {}).get(
+        post["platform"], [f"telegram:{CHANNEL_ID}"]
+    )
+
+
+async def run_publisher(bot: Bot) -> dict:
+    """Publish all approved posts scheduled for today.
+
+    Returns stats: published, failed and waiting (translation not ready)
+    post lists, elapsed seconds and throughput in posts per minute.
+    """
     logger.info("WF4: Starting publisher")
+    started = time.monotonic()
     posts = await get_approved_posts()
+    stats = {"published": [], "failed": [], "waiting": [], "elapsed": 0.0, "throughput": 0.0}
 
+    # Russian-only posts wait for their Uzbek half
+    stats["waiting"] = [p for p in posts if not ensure_translation(p)]
+    posts = [p for p in posts if p not in stats["waiting"]]
     if not posts:
         logger.info("WF4: No approved posts to publish")
-        return []
+        return stats
+
+    results = await publish_posts(bot, posts)
+    for post in posts:
+        stats["published" if results[post["id"]] else "failed"].append(post)
+
+    elapsed = time.monotonic() - started
+    stats["elapsed"] = round(elapsed, 1)
+    stats["throughput"] = round(len(stats["published"]) / elapsed * 60, 1) if elapsed else 0.0
+    logger.info(
+        f"WF4: Published {len(stats['published'])}/{len(posts)} posts "
+        f"in {stats['elapsed']}s ({stats['throughput']} posts/min)"
+    )
+    return stats
+
+
+async def publish_and_record(bot: Bot, post: dict, retry_failed: bool = False) -> bool:
+    """Publish one post to all its targets; True if every target has it."""
+    results = await publish_posts(bot, [post], retry_failed)
+    return results[post["id"]]
+
+
+async def publish_posts(bot: Bot, posts: list[dict], retry_failed: bool = False) -> dict[int, bool]:
+    """Fan posts out to their targets through the publish_outbox table.
+
+    Every (post, target) pair has one outbox row, written at approval
+    (rows missing for older posts are added here), claimed pending ->
+    sending before the send and closed as sent/error after it, so a target
+    that already has a post is never sent it again. Targets run
+    concurrently; each target receives its posts in order. With
+    `retry_failed`, targets in error are tried again; sends interrupted by
+    a crash stay 'interrupted' until the admin marks them sent or resends
+    them (send_interrupted_notice).
 
-    published = []
+    A post becomes 'published' once all its targets are sent (message_id
+    is taken from its first Telegram target); otherwise it keeps its status
+    (approved or draft) and retrying is up to the caller
+    (services.publish_schedule.publish_or_retry).
+    """
+    by_id = {p["id"]: p for p in posts}
     for post in posts:
+        await create_outbox_entries(post["id"], targets_for(post))
+    if retry_failed:
+        await retry_outbox_errors(list(by_id))
+
+    by_target: dict[str, list[dict]] = {}
+    for entry in await get_outbox_entries(list(by_id)):
+        if entry["status"] == "pending":
+            by_target.setdefault(entry["target"], []).append(entry)
+
+    async def _deliver(target: str, entries: list[dict]):
         try:
-            msg = await bot.send_message(
-                chat_id=CHANNEL_ID,
-                text=post["content"],
-            )
-            await update_post_status(post["id"], "published")
-            await set_post_channel_message_id(post["id"], msg.message_id)
-            published.append(post)
-            logger.info(f"WF4: Published post #{post['id']} to channel")
-        except Exception as e:
-            logger.error(f"WF4: Failed to publish post #{post['id']}: {e}")
-            await update_post_status(post["id"], "error")
-
-    logger.info(f"WF4: Published {len(published)}/{len(posts)} posts")
-    return published
+            adapter = get_adapter(target, bot)
+        except ValueError as e:
+            logger.error(f"WF4: {e}")
+            adapter = None
+        for entry in entries:
+            if not await claim_outbox_entry(entry["id"]):
+                continue
+            if not adapter:
+                await finish_outbox_entry(entry["id"], error="unknown target")
+                continue
+            try:
+                message_id = await adapter.send(by_id[entry["post_id"]], entry)
+            except Exception as e:
+                logger.error(f"WF4: Post #{entry['post_id']} -> {target} failed: {e}")
+                await finish_outbox_entry(entry["id"], error=str(e)[:500])
+                continue
+            await finish_outbox_entry(entry["id"], message_id=message_id)
+            logger.info(f"WF4: Post #{entry['post_id']} -> {target}")
+
+    await asyncio.gather(*(_deliver(t, es) for t, es in by_target.items()))
+
+    results = {}
+    entries = await get_outbox_entries(list(by_id))
+    for post_id in by_id:
+        rows = [e for e in entries if e["post_id"] == post_id]
+        ok = bool(rows) and all(e["status"] == "sent" for e in rows)
+        results[post_id] = ok
+        if ok:
+            await _mark_published(post_id, rows)
+        else:
+            failed = [e["target"] for e in rows if e["status"] != "sent"]
+            logger.error(f"WF4: Post #{post_id} not published to {', '.join(failed)}")
+            await send_interrupted_notice(bot, post_id)
+    return results
+
+
+async def complete_if_sent(post_id: int) -> bool:
+    """Mark a post 'published' if every outbox target has it (no sends)."""
+    rows = await get_outbox_entries([post_id])
+    if not rows or any(e["status"] != "sent" for e in rows):
+        return False
+    await _mark_published(post_id, rows)
+    return True
+
+
+async def _mark_published(post_id: int, rows: list[dict]):
+    await update_post_status(post_id, "published")
+    telegram = next((e for e in rows if e["target"].startswith("telegram:")), None)
+    if telegram and telegram["message_id"]:
+        await set_post_channel_message_id(post_id, int(telegram["message_id"]))
+
+
+async def recover_outbox(bot: Bot):
+    """Startup: mark rows a crash left in 'sending' as interrupted instead of
+    resending them. Interrupted sends the adapter can prove complete (every
+    Telegram part recorded) are closed as sent; the admin is asked about
+    the rest."""
+    count = await fail_interrupted_outbox()
+    if count:
+        logger.warning(f"WF4: {count} outbox sends were interrupted, marked interrupted (not resent)")
+
+    unresolved = []
+    for entry in await get_interrupted_outbox():
+        post = await get_post(entry["post_id"])
+        message_id = None
+        if post:
+            try:
+                message_id = await get_adapter(entry["target"], bot).resolve_interrupted(post, entry)
+            except Exception as e:
+                logger.warning(f"WF4: Could not check outbox #{entry['id']}: {e}")
+        if message_id and await resolve_interrupted_outbox(entry["id"], message_id=message_id):
+            logger.info(f"WF4: Interrupted send of post #{post['id']} -> {entry['target']} had completed")
+            await complete_if_sent(post["id"])
+        elif post and post["id"] not in unresolved:
+            unresolved.append(post["id"])
+    for post_id in unresolved:
+        await send_interrupted_notice(bot, post_id)
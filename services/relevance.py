@@ -0,0 +1,108 @@
+"""Local BM25 relevance scoring of raw trends against brand vocabularies."""
+
+import math
+import re
+from collections import Counter
+
+from config import BRANDS
+from database import get_recent_posts
+
+# Weight of each brand field in its vocabulary
+FIELD_WEIGHTS = {"topics": 3.0, "audience": 2.0, "goal": 2.0}
+POSTS_WEIGHT = 0.5
+POSTS_LIMIT = 20
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STEM_LENGTH = 6
+
+STOPWORDS = {
+    "и", "в", "во", "на", "не", "что", "как", "для", "это", "по", "из", "от",
+    "до", "за", "при", "или", "но", "же", "так", "все", "всё", "его", "их",
+    "без", "под", "над", "про", "через", "чем", "уже", "ещё", "еще", "где",
+    "the", "and", "for", "with", "from", "that", "this", "are", "was", "you",
+}
+
+_WORD_RE = re.compile(r"[a-zа-яёўқғҳ0-9]+")
+
+
+def tokenize(text: str, min_length: int = 3) -> list[str]:
+    """Lowercase, drop stopwords and words shorter than min_length, and
+    crudely stem by prefix truncation.
+
+    Prefix stemming is enough to fold Russian inflections together
+    ("маркетинг", "маркетинга", "маркетологи" -> "маркет").
+    """
+    words = _WORD_RE.findall(text.lower())
+    return [w[:STEM_LENGTH] for w in words if len(w) >= min_length and w not in STOPWORDS]
+
+
+def brand_vocabulary(brand: dict, posts: list[dict] = ()) -> Counter:
+    """Weighted term vocabulary from brand config fields and published posts."""
+    vocab = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(brand.get(field, "")):
+            vocab[term] += weight
+
+    # Published posts add presence-based weight with diminishing returns
+    post_df = Counter()
+    for p in posts:
+        post_df.update(set(tokenize(p.get("content", ""))))
+    for term, df in post_df.items():
+        vocab[term] += POSTS_WEIGHT * math.log1p(df)
+    return vocab
+
+
+async def build_brand_profiles() -> dict[str, Counter]:
+    """Vocabulary per brand from config.BRANDS plus recent published posts."""
+    profiles = {}
+    for project_id, brand in BRANDS.items():
+        posts = await get_recent_posts(project_id, limit=POSTS_LIMIT)
+        profiles[project_id] = brand_vocabulary(brand, posts)
+    return profiles
+
+
+def rank_trends(trends: list[str],
+                profiles: dict[str, Counter]) -> dict[str, list[tuple[float, str]]]:
+    """Score every trend for every brand with BM25 (brand vocabulary = query).
+
+    IDF is computed over the brand vocabularies, so terms shared by all
+    brands ("бизнес") weigh less than brand-specific ones ("коммут"), and
+    scores stay comparable between batches of different size.
+    """
+    docs = [tokenize(t) for t in trends]
+    avgdl = (sum(len(d) for d in docs) / len(docs)) if docs else 0.0
+
+    n_profiles = len(profiles)
+    profile_df = Counter()
+    for vocab in profiles.values():
+        profile_df.update(vocab.keys())
+    idf = {
+        term: math.log(1 + (n_profiles - df + 0.5) / (df + 0.5))
+        for term, df in profile_df.items()
+    }
+
+    ranked = {}
+    for project_id, vocab in profiles.items():
+        scored = []
+        for trend, doc in zip(trends, docs):
+            if not doc:
+                continue
+            tf = Counter(doc)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / avgdl)
+            score = sum(
+                vocab[term] * idf[term] * (freq * (BM25_K1 + 1)) / (freq + norm)
+                for term, freq in tf.items() if term in vocab
+            )
+            if score > 0:
+                scored.append((round(score, 3), trend))
+        scored.sort(key=lambda x: x[0], reverse=True)
+        ranked[project_id] = scored
+    return ranked
+
+
+def top_candidates(ranked: dict[str, list[tuple[float, str]]],
+                   top_n: int) -> dict[str, list[str]]:
+    """Keep only the best `top_n` trends per brand."""
+    return {pid: [t for _, t in scored[:top_n]] for pid, scored in ranked.items()}
@@ -0,0 +1,127 @@
+"""Per-platform image renditions rendered in a process pool and cached per source hash."""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from config import (
+    BRANDS, PLATFORM_RENDITIONS, RENDITION_QUALITY, RENDITION_PROCESSES,
+    WATERMARK_ENABLED, WATERMARK_FONT,
+)
+from database import get_post_image, get_rendition, save_rendition
+from services.image_store import put_image
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def shutdown_renditions():
+    global _pool
+    if _pool:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def get_post_visual(post: dict) -> dict | None:
+    """The image to send for a post: its platform rendition, or the original as fallback."""
+    image = await get_post_image(post["id"])
+    if not image or not image.get("image_hash"):
+        return image
+    rendition = await get_platform_rendition(image, post["platform"], post["project_id"])
+    return rendition or image
+
+
+async def get_platform_rendition(image: dict, platform: str, project_id: str) -> dict | None:
+    """Rendition of a stored image for a platform, rendering it once per spec."""
+    spec = PLATFORM_RENDITIONS.get(platform)
+    if not spec:
+        return None
+    watermark = BRANDS.get(project_id, {}).get("watermark", "") if WATERMARK_ENABLED else ""
+    spec_key = (
+        f"{spec['width']}x{spec['height']}:{spec['format']}:{RENDITION_QUALITY}:{watermark}"
+    )
+
+    cached = await get_rendition(image["image_hash"], spec_key)
+    if cached and (cached["file_id"] or cached["path"]):
+        return cached
+
+    path = image.get("path")
+    if not path or not Path(path).exists():
+        return None
+
+    args = (path, spec["width"], spec["height"], spec["format"],
+            RENDITION_QUALITY, watermark, WATERMARK_FONT)
+    try:
+        try:
+            data = await _render_in_pool(args)
+        except BrokenProcessPool:
+            # A worker died (OOM-kill, segfault in a codec): the executor is
+            # unusable from now on, so replace it and retry this image once
+            logger.warning(f"Rendition pool broken, restarting it for {spec_key}")
+            shutdown_renditions()
+            data = await _render_in_pool(args)
+    except Exception as e:
+        logger.error(f"Rendition {spec_key} of {image['image_hash'][:12]} failed: {e}")
+        return None
+
+    rendition_hash, rendition_path = await put_image(data)
+    await save_rendition(image["image_hash"], spec_key, rendition_hash)
+    logger.info(
+        f"Rendition {platform} {spec_key}: {Path(path).stat().st_size} -> {len(data)} bytes"
+    )
+    return {"image_hash": rendition_hash, "path": rendition_path, "file_id": None}
+
+
+async def _render_in_pool(args: tuple) -> bytes:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the bot process has a running event loop and threads
+        _pool = ProcessPoolExecutor(
+            max_workers=RENDITION_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return await asyncio.get_running_loop().run_in_executor(_pool, render, *args)
+
+
+def render(path: str, width: int, height: int, fmt: str, quality: int,
+           watermark: str = "", font_path: str = "") -> bytes:
+    """Resize + center-crop to width x height, optionally watermark, re-encode.
+
+    The target box is scaled down (keeping its aspect) to fit the source, so
+    small images are cropped but never upscaled.
+    Runs in a worker process, so it must stay a picklable top-level function.
+    """
+    with Image.open(path) as src:
+        scale = min(1.0, src.width / width, src.height / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        img = ImageOps.fit(src.convert("RGB"), size, Image.Resampling.LANCZOS)
+
+    if watermark:
+        _draw_watermark(img, watermark, font_path)
+
+    out = io.BytesIO()
+    if fmt == "WEBP":
+        img.save(out, "WEBP", quality=quality, method=6)
+    else:
+        img.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _draw_watermark(img: Image.Image, text: str, font_path: str):
+    size = max(14, img.width // 40)
+    font = ImageFont.truetype(font_path, size) if font_path else ImageFont.load_default(size)
+    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    margin = size
+    x = img.width - (right - left) - margin
+    y = img.height - (bottom - top) - margin
+    draw.text((x, y), text, font=font, fill=(255, 255, 255, 160))
+    img.paste(Image.alpha_composite(img.convert("RGBA"), overlay).convert("RGB"))
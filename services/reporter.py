@@ -1,45 +1,65 @@
-"""WF5: Weekly report — aggregate stats, AI analysis, update knowledge base."""
+"""WF5: Weekly and monthly reports — map-reduce over per-brand summaries, KB update.
 
+Map: each brand's period (rollup stats, engagement digest, post excerpts)
+is summarized concurrently. Reduce: the report and the KB insights are
+written from those summaries only, so prompt size grows with the number
+of brands, not posts. Every stage is cached by a hash of its prompt, and
+a re-run reuses the summaries of brands whose input did not change.
+
+The KB update only learns from posts published after its watermark, so
+re-running a report never re-derives insights from the same posts.
+"""
+
+import asyncio
+import hashlib
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
-from config import BRANDS
+from config import BRANDS, REPORT_BRAND_TOKENS
 from database import (
-    get_published_posts_for_week, get_insights, save_report, add_insight,
+    get_post_rollups, get_published_post_excerpts, get_published_posts_after, get_insights,
+    save_report, add_insights_with_watermark, get_report_cache, save_report_cache, get_watermark,
 )
-from prompts import WEEKLY_REPORT, KB_UPDATE
-from services.ai_client import ask_ai, ask_ai_json
+from prompts import BRAND_SUMMARY, WEEKLY_REPORT, KB_UPDATE
+from services.ai_client import ask_ai, ask_ai_json, chunk_by_tokens
+from services.engagement import compute_engagement, format_engagement_digest
+from utils import format_rollups
 
 logger = logging.getLogger(__name__)
 
+PERIOD_NAMES = {"weekly": "еженедельный", "monthly": "месячный"}
+AI_UNAVAILABLE = "AI unavailable"
+SYSTEM_TEXT = "Ты аналитик SMM. Пиши кратко, без воды."
+SYSTEM_JSON = "Ты аналитик SMM. Отвечай строго JSON."
+# Watermark: published_at of the newest post the KB has learned from
+KB_WATERMARK = "knowledge_base"
+
 
 async def run_weekly_report() -> dict:
-    """Full WF5: collect week stats, generate report, update KB."""
-    logger.info("WF5: Starting weekly report")
+    """Full WF5: last 7 days' stats, report, KB update."""
+    today = datetime.now().date()
+    return await run_report(today - timedelta(days=7), today, "weekly", update_kb=True)
 
-    now = datetime.now()
-    week_start = (now - timedelta(days=7)).strftime("%Y-%m-%d")
-    week_end = now.strftime("%Y-%m-%d")
 
-    # 1. Get published posts
-    posts = await get_published_posts_for_week()
+async def run_monthly_report() -> dict:
+    """Report for the previous calendar month (no KB update, the weekly runs cover it)."""
+    month_end = datetime.now().date().replace(day=1) - timedelta(days=1)
+    return await run_report(month_end.replace(day=1), month_end, "monthly")
 
-    # 2. Group by project
-    by_project = {}
-    for p in posts:
-        pid = p["project_id"]
-        if pid not in by_project:
-            brand = BRANDS.get(pid, {})
-            by_project[pid] = {"name": brand.get("name", pid), "posts": [], "count": 0}
-        by_project[pid]["posts"].append(p)
-        by_project[pid]["count"] += 1
-
-    stats_text = ""
-    for pid, data in by_project.items():
-        stats_text += f"\n{data['name']}: {data['count']} постов\n"
-        for p in data["posts"]:
-            stats_text += f"  - [{p['platform']}] {p['content'][:80]}...\n"
+
+async def run_report(start: date, end: date, kind: str = "weekly",
+                     update_kb: bool = False) -> dict:
+    """Generate and save a report for [start, end] from the daily rollups."""
+    logger.info(f"WF5: Starting {kind} report {start} — {end}")
+    week_start, week_end = start.isoformat(), end.isoformat()
+
+    # 1. Published-post totals, O(days) rollup rows
+    rollups = await get_post_rollups(week_start, week_end)
+    total_posts = sum(r["posts"] for r in rollups)
+
+    # 2. Engagement digest, computed locally from post metrics
+    engagement = format_engagement_digest(await compute_engagement(start, end))
 
     # 3. Get current insights
     insights_list = await get_insights(limit=10)
@@ -47,54 +67,168 @@ async def run_weekly_report() -> dict:
         f"[{i['type']}] {i['insight']}" for i in insights_list
     ) or "пусто"
 
-    # 4. Generate report
+    # 4. Map: summarize each brand's period concurrently
+    posts = await get_published_post_excerpts(week_start, week_end)
+    by_project: dict[str, list[dict]] = {}
+    for p in posts:
+        by_project.setdefault(p["project_id"], []).append(p)
+    project_ids = list(by_project)
+    results = await asyncio.gather(*(
+        _summarize_brand(pid, start, end, rollups, by_project[pid]) for pid in project_ids
+    ))
+    summaries = {pid: s for pid, s in zip(project_ids, results) if s}
+    logger.info(f"WF5: {len(summaries)}/{len(project_ids)} brand summaries ready")
+    summaries_text = _format_summaries(summaries)
+
+    # 5. Reduce: generate report
     prompt = WEEKLY_REPORT.format(
+        period_name=PERIOD_NAMES.get(kind, ""),
         week_start=week_start,
         week_end=week_end,
-        total_posts=len(posts),
-        stats=stats_text or "Нет опубликованных постов за неделю.",
+        total_posts=total_posts,
+        stats=format_rollups(rollups) or "Нет опубликованных постов за период.",
+        summaries=summaries_text,
+        engagement=engagement,
         insights=insights_text,
     )
-    report_text = await ask_ai(prompt, system="Ты аналитик SMM. Пиши кратко, без воды.")
+    report_text, _ = await _cached_ai("report", prompt, SYSTEM_TEXT)
+    report_text = report_text or AI_UNAVAILABLE
 
-    # 5. Save report
+    # 6. Save report
     report_id = await save_report(week_start, week_end, report_text)
 
-    # 6. Update knowledge base
-    await _update_knowledge_base(posts, insights_text)
+    # 7. Reduce: update knowledge base from posts it has not seen yet
+    kb_posts = 0
+    if update_kb:
+        kb_posts = await _update_knowledge_base(
+            start, end, rollups, insights_text, engagement,
+        )
 
     logger.info(f"WF5: Report #{report_id} saved")
     return {
         "report_id": report_id,
         "report_text": report_text,
-        "total_posts": len(posts),
+        "total_posts": total_posts,
+        "kb_posts": kb_posts,
         "week_start": week_start,
         "week_end": week_end,
     }
 
 
-async def _update_knowledge_base(posts: list[dict], current_knowledge: str):
-    """Ask AI to analyze posts and generate new insights for KB."""
-    if not posts:
-        return
-
-    posts_text = "\n".join(
-        f"[{p['project_id']}] [{p['platform']}] {p['content'][:150]}..."
-        for p in posts
+async def _summarize_brand(project_id: str, start: date, end: date,
+                           rollups: list[dict], posts: list[dict]) -> dict:
+    """Map stage: one brand's period as {summary, worked, avoid, recommendation}."""
+    brand = BRANDS.get(project_id, {})
+    lines = [f"[{p['platform']}] {p['excerpt']}..." for p in posts]
+    # Newest posts first; a brand over the budget is summarized from its latest posts
+    lines = chunk_by_tokens(lines, REPORT_BRAND_TOKENS)[0]
+    engagement = await compute_engagement(start, end, project_id)
+    prompt = BRAND_SUMMARY.format(
+        brand_name=brand.get("name", project_id),
+        goal=brand.get("goal", ""),
+        week_start=start.isoformat(),
+        week_end=end.isoformat(),
+        stats=format_rollups([r for r in rollups if r["project_id"] == project_id]) or "нет данных",
+        engagement=format_engagement_digest(engagement),
+        count=len(posts),
+        posts="\n".join(lines),
     )
-
-    prompt = KB_UPDATE.format(posts=posts_text, current_knowledge=current_knowledge)
-    result = await ask_ai_json(
-        prompt,
-        system="Ты аналитик SMM. Отвечай строго JSON.",
+    summary, _ = await _cached_ai("brand_summary", prompt, SYSTEM_JSON, as_json=True)
+    return summary
+
+
+def _format_summaries(summaries: dict[str, dict]) -> str:
+    blocks = []
+    for pid, s in summaries.items():
+        lines = [f"{BRANDS.get(pid, {}).get('name', pid)} ({pid}): {s.get('summary', '')}"]
+        if s.get("worked"):
+            lines.append(f"  Сработало: {s['worked']}")
+        if s.get("avoid"):
+            lines.append(f"  Не сработало: {s['avoid']}")
+        if s.get("recommendation"):
+            lines.append(f"  Рекомендация: {s['recommendation']}")
+        blocks.append("\n".join(lines))
+    return "\n".join(blocks) or "нет данных"
+
+
+async def _cached_ai(stage: str, prompt: str, system: str,
+                     as_json: bool = False) -> tuple[str | dict, bool]:
+    """LLM call cached in report_cache by a hash of its input. Returns (result, cache hit).
+
+    Failed calls (empty JSON, "AI unavailable") are not cached.
+    """
+    key = hashlib.sha256(f"{system}\n{prompt}".encode()).hexdigest()
+    cached = await get_report_cache(stage, key)
+    if cached is not None:
+        return (json.loads(cached) if as_json else cached), True
+
+    if as_json:
+        result = await ask_ai_json(prompt, system=system)
+        if result:
+            await save_report_cache(stage, key, json.dumps(result, ensure_ascii=False))
+    else:
+        result = await ask_ai(prompt, system=system)
+        if result == AI_UNAVAILABLE:
+            result = ""
+        else:
+            await save_report_cache(stage, key, result)
+    return result, False
+
+
+async def _update_knowledge_base(start: date, end: date, rollups: list[dict],
+                                 current_knowledge: str, engagement: str) -> int:
+    """Reduce stage: new KB insights from all posts published after the KB
+    watermark (the report period on the first run), however old. Returns the
+    number of posts analyzed (0: no LLM call made).
+
+    Each insight records its brand's analyzed post ids as provenance. The
+    insights and the new watermark are written in one transaction, so a
+    failed or interrupted update is redone from the same posts next run.
+    """
+    watermark = await get_watermark(KB_WATERMARK) or start.isoformat()
+    new_posts = await get_published_posts_after(watermark)
+    if not new_posts:
+        logger.info("WF5: No posts since the KB watermark, skipping KB update")
+        return 0
+
+    # Posts missed by earlier runs widen the summarized period
+    first = date.fromisoformat(new_posts[-1]["published_at"][:10])
+    if first < start:
+        start = first
+        rollups = await get_post_rollups(start.isoformat(), end.isoformat())
+
+    by_project: dict[str, list[dict]] = {}
+    for p in new_posts:
+        by_project.setdefault(p["project_id"], []).append(p)
+    # A brand whose posts are all new has the report's summary prompt: cache hit
+    results = await asyncio.gather(*(
+        _summarize_brand(pid, start, end, rollups, ps) for pid, ps in by_project.items()
+    ))
+    if not all(results):
+        logger.warning("WF5: Brand summary failed, KB update postponed")
+        return 0
+    summaries = dict(zip(by_project, results))
+
+    prompt = KB_UPDATE.format(
+        summaries=_format_summaries(summaries), engagement=engagement,
+        current_knowledge=current_knowledge,
     )
-
-    new_insights = result.get("new_insights", [])
-    for ins in new_insights:
-        await add_insight(
-            project_id=ins.get("project", ""),
-            insight_type=ins.get("type", "content_insight"),
-            insight=ins.get("insight", ""),
-            evidence=ins.get("evidence", ""),
-        )
-    logger.info(f"WF5: Added {len(new_insights)} new insights to KB")
+    result, _ = await _cached_ai("kb_update", prompt, SYSTEM_JSON, as_json=True)
+    if not result:
+        logger.warning("WF5: KB update failed, watermark kept")
+        return 0
+
+    # A cache hit means an earlier run got this far but never committed:
+    # its insights are written now
+    new_insights = [{
+        "project_id": ins.get("project", ""),
+        "type": ins.get("type", "content_insight"),
+        "insight": ins.get("insight", ""),
+        "evidence": ins.get("evidence", ""),
+        "source_post_ids": sorted(
+            p["id"] for p in by_project.get(ins.get("project", ""), new_posts)
+        ),
+    } for ins in result.get("new_insights", [])]
+    await add_insights_with_watermark(new_insights, KB_WATERMARK, new_posts[0]["published_at"])
+    logger.info(f"WF5: Added {len(new_insights)} new insights to KB from {len(new_posts)} posts")
+    return len(new_posts)
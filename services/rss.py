@@ -0,0 +1,59 @@
+"""Minimal regex-based RSS/Atom item parsing shared by the monitors."""
+
+import hashlib
+import html
+import re
+
+_ITEM_RE = re.compile(r"<(item|entry)\b[^>]*>(.*?)</\1>", re.DOTALL)
+_MEDIA_RE = re.compile(r"<(img|video|enclosure|media:content)\b")
+
+
+def _tag(block: str, tag: str) -> str:
+    """Text of the first <tag> in block, CDATA unwrapped."""
+    match = re.search(
+        rf"<{tag}\b[^>]*>\s*(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?\s*</{tag}>",
+        block, re.DOTALL,
+    )
+    return html.unescape(match.group(1)).strip() if match else ""
+
+
+def _link(block: str) -> str:
+    link = _tag(block, "link")
+    if link:
+        return link
+    # Atom: <link href="..."/>
+    match = re.search(r"<link\b[^>]*href=\"([^\"]+)\"", block)
+    return match.group(1) if match else ""
+
+
+def parse_rss_items(body: str) -> list[dict]:
+    """Parse <item>/<entry> blocks into flat dicts.
+
+    Keys: title, link, guid, description, pub_date, has_media.
+    """
+    items = []
+    for _, block in _ITEM_RE.findall(body):
+        link = _link(block)
+        description = _tag(block, "description") or _tag(block, "summary")
+        items.append({
+            "title": _tag(block, "title"),
+            "link": link,
+            "guid": _tag(block, "guid") or _tag(block, "id") or link,
+            "description": description,
+            "pub_date": _tag(block, "pubDate") or _tag(block, "published"),
+            "has_media": bool(_MEDIA_RE.search(block) or _MEDIA_RE.search(description)),
+        })
+    return items
+
+
+def item_key(item: dict) -> str:
+    """Stable identity of a feed item: hash of guid + title, or of its text.
+
+    The title is mixed in because some feeds (Google Trends) reuse one
+    generic link as the guid of every item.
+    """
+    if item.get("guid"):
+        text = f"{item['guid']}\n{item.get('title', '')}"
+    else:
+        text = f"{item.get('title', '')}\n{item.get('description', '')}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
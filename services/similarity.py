@@ -0,0 +1,139 @@
+"""SimHash near-duplicate index over all generated posts, per brand."""
+
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+
+from config import SIMHASH_MAX_DISTANCE
+from database import (
+    get_post_fingerprints, get_posts_without_fingerprint, save_post_fingerprints,
+    delete_post_fingerprints,
+)
+from services.relevance import tokenize
+from services.translator import russian_part
+
+logger = logging.getLogger(__name__)
+
+BITS = 64
+# Pigeonhole: two fingerprints within MAX_DISTANCE bits agree on at least one
+# of MAX_DISTANCE + 1 bands, so only same-band posts need a Hamming check
+BANDS = SIMHASH_MAX_DISTANCE + 1
+_BOUNDS = [round(i * BITS / BANDS) for i in range(BANDS + 1)]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of stemmed unigrams and bigrams, weighted by frequency.
+
+    Only the Russian master is hashed, so drafts compare the same before and
+    after their Uzbek half is appended.
+    """
+    terms = tokenize(russian_part(text))
+    features = Counter(terms)
+    features.update(f"{a} {b}" for a, b in zip(terms, terms[1:]))
+
+    weights = [0] * BITS
+    for feature, count in features.items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+def _bands(fp: int) -> list[int]:
+    return [fp >> lo & ((1 << (hi - lo)) - 1) for lo, hi in zip(_BOUNDS, _BOUNDS[1:])]
+
+
+def _to_signed(fp: int) -> int:
+    """SQLite INTEGER is signed 64-bit."""
+    return fp - (1 << BITS) if fp >= 1 << (BITS - 1) else fp
+
+
+class SimHashIndex:
+    """Banded in-memory index: project_id -> band no -> band value -> post ids."""
+
+    def __init__(self):
+        self._fps: dict[int, tuple[str, int]] = {}
+        self._buckets: dict[str, list[dict[int, set[int]]]] = {}
+
+    def add(self, project_id: str, post_id: int, fp: int):
+        self.remove(post_id)
+        self._fps[post_id] = (project_id, fp)
+        bands = self._buckets.setdefault(project_id, [{} for _ in range(BANDS)])
+        for table, key in zip(bands, _bands(fp)):
+            table.setdefault(key, set()).add(post_id)
+
+    def remove(self, post_id: int):
+        entry = self._fps.pop(post_id, None)
+        if not entry:
+            return
+        project_id, fp = entry
+        for table, key in zip(self._buckets[project_id], _bands(fp)):
+            table.get(key, set()).discard(post_id)
+
+    def nearest(self, project_id: str, fp: int,
+                exclude: set[int] = frozenset()) -> tuple[int, int] | None:
+        """(post_id, distance) of the closest post within SIMHASH_MAX_DISTANCE."""
+        bands = self._buckets.get(project_id)
+        if not bands:
+            return None
+        candidates = set()
+        for table, key in zip(bands, _bands(fp)):
+            candidates |= table.get(key, set())
+        best = None
+        for post_id in candidates - exclude:
+            distance = (fp ^ self._fps[post_id][1]).bit_count()
+            if distance <= SIMHASH_MAX_DISTANCE and (not best or distance < best[1]):
+                best = (post_id, distance)
+        return best
+
+
+_index = SimHashIndex()
+_loaded = False
+_load_lock = asyncio.Lock()
+
+
+async def _ensure_loaded():
+    """Load stored fingerprints once, backfilling posts that have none."""
+    global _loaded
+    if _loaded:
+        return
+    async with _load_lock:
+        if _loaded:
+            return
+        for post_id, project_id, fp in await get_post_fingerprints():
+            _index.add(project_id, post_id, fp & ((1 << BITS) - 1))
+
+        missing = await get_posts_without_fingerprint()
+        rows = []
+        for post in missing:
+            fp = simhash(post["content"])
+            _index.add(post["project_id"], post["id"], fp)
+            rows.append((post["id"], post["project_id"], _to_signed(fp)))
+        if rows:
+            await save_post_fingerprints(rows)
+            logger.info(f"SimHash index: backfilled {len(rows)} posts")
+        _loaded = True
+
+
+async def find_similar(project_id: str, content: str,
+                       exclude: set[int] = frozenset()) -> tuple[int, int] | None:
+    """Closest earlier post of the brand as (post_id, distance), if near-duplicate."""
+    await _ensure_loaded()
+    return _index.nearest(project_id, simhash(content), exclude)
+
+
+async def index_post(project_id: str, post_id: int, content: str):
+    """Add or refresh a post's fingerprint (after insert or a content change)."""
+    await _ensure_loaded()
+    fp = simhash(content)
+    _index.add(project_id, post_id, fp)
+    await save_post_fingerprints([(post_id, project_id, _to_signed(fp))])
+
+
+async def forget_posts(post_ids: list[int]):
+    """Drop discarded posts (e.g. superseded pre-generated drafts) from the index."""
+    await _ensure_loaded()
+    for post_id in post_ids:
+        _index.remove(post_id)
+    await delete_post_fingerprints(post_ids)
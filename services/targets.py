@@ -0,0 +1,201 @@
+"""Publish target adapters: Telegram chats and HTTP endpoints (platform stand-ins)."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import httpx
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+from aiohttp import ClientConnectorError
+
+from config import TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE, PUBLISH_RETRIES
+from database import save_outbox_progress
+from services.fetcher import backoff_delay
+from services.image_store import send_image
+from services.ratelimit import TokenBucket
+from services.renditions import get_post_visual
+from utils import split_message
+
+logger = logging.getLogger(__name__)
+
+# Telegram limits for photo captions and text messages
+CAPTION_LIMIT = 1024
+TEXT_LIMIT = 4096
+
+CHAT_BURST = 3
+HTTP_TIMEOUT = 30
+# HTTP statuses that guarantee the endpoint did not create the post
+NOT_PROCESSED_STATUSES = {429, 503}
+
+
+class TargetAdapter:
+    """Publishes a post to one target and returns the target's message id.
+
+    `entry` is the post's publish_outbox row for this target. An adapter
+    must never publish a post twice: it only retries sends the target
+    provably did not perform, and raises on anything ambiguous (the outbox
+    then needs an admin decision, see services.publisher).
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+
+    async def send(self, post: dict, entry: dict) -> str:
+        raise NotImplementedError
+
+    async def resolve_interrupted(self, post: dict, entry: dict) -> str | None:
+        """Message id if an interrupted send provably completed, else None
+        (the admin has to check the target)."""
+        return None
+
+
+class TelegramTarget(TargetAdapter):
+    def __init__(self, target: str, bot: Bot, chat_id: int):
+        super().__init__(target)
+        self.bot = bot
+        self.chat_id = chat_id
+
+    async def send(self, post: dict, entry: dict) -> str:
+        """Parts delivered by an earlier attempt (outbox part_ids) are skipped."""
+        sent = [i for i in (entry.get("part_ids") or "").split(",") if i]
+
+        async def _record(part_ids: list[str]):
+            await save_outbox_progress(entry["id"], part_ids)
+
+        return await publish_post(self.bot, self.chat_id, post, sent, _record)
+
+    async def resolve_interrupted(self, post: dict, entry: dict) -> str | None:
+        """Complete if every part of the post's plan was recorded in part_ids."""
+        sent = [i for i in (entry.get("part_ids") or "").split(",") if i]
+        parts = await _plan_parts(self.bot, self.chat_id, post)
+        if not sent or len(sent) < len(parts):
+            return None
+        return next(sent[i] for i, (holds_text, _) in enumerate(parts) if holds_text)
+
+
+class HttpTarget(TargetAdapter):
+    """POSTs the post as JSON; the endpoint answers with {"id": ...}.
+
+    Every attempt carries the same Idempotency-Key header ("<post_id>:<target>"),
+    so an endpoint that honours it can drop a duplicate. Retried are only
+    connection failures before the request went out and 429/503 (not
+    processed); read timeouts and other 5xx may hide a created post and are
+    raised.
+    """
+
+    def __init__(self, target: str, url: str):
+        super().__init__(target)
+        self.url = url
+
+    async def send(self, post: dict, entry: dict) -> str:
+        image = await get_post_visual(post)
+        payload = {
+            "post_id": post["id"],
+            "project_id": post["project_id"],
+            "platform": post["platform"],
+            "content": post["content"],
+            "image_path": image.get("path") if image else None,
+        }
+        headers = {"Idempotency-Key": f"{post['id']}:{self.target}"}
+        async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
+            for attempt in range(PUBLISH_RETRIES + 1):
+                try:
+                    resp = await client.post(self.url, json=payload, headers=headers)
+                except (httpx.ConnectError, httpx.ConnectTimeout):
+                    if attempt == PUBLISH_RETRIES:
+                        raise
+                    await asyncio.sleep(backoff_delay(attempt, None))
+                    continue
+                if resp.status_code in NOT_PROCESSED_STATUSES and attempt < PUBLISH_RETRIES:
+                    await asyncio.sleep(backoff_delay(attempt, resp.headers.get("retry-after")))
+                    continue
+                resp.raise_for_status()
+                return str(resp.json().get("id", ""))
+
+
+def get_adapter(target: str, bot: Bot) -> TargetAdapter:
+    """Adapter for a "telegram:<chat_id>" or "http:<url>" target."""
+    kind, _, address = target.partition(":")
+    if kind == "telegram":
+        return TelegramTarget(target, bot, int(address))
+    if kind == "http":
+        return HttpTarget(target, address)
+    raise ValueError(f"Unknown publish target: {target}")
+
+
+# ── Telegram ──
+
+_global_bucket = TokenBucket(TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_RATE)
+_chat_buckets: dict[int, TokenBucket] = {}
+
+
+async def _send(chat_id: int, call: Callable[[], Awaitable]):
+    """Run one Bot API send within the flood limits.
+
+    Only sends Telegram provably did not perform are retried: RetryAfter
+    and connection failures before the request went out. Timeouts and
+    server errors may hide a delivered message, so they are raised.
+    """
+    bucket = _chat_buckets.setdefault(chat_id, TokenBucket(TELEGRAM_CHAT_RATE / 60, CHAT_BURST))
+    for attempt in range(PUBLISH_RETRIES + 1):
+        await bucket.acquire()
+        await _global_bucket.acquire()
+        try:
+            return await call()
+        except TelegramRetryAfter as e:
+            if attempt == PUBLISH_RETRIES:
+                raise
+            logger.warning(f"WF4: Flood control in {chat_id}, retrying in {e.retry_after}s")
+            await asyncio.sleep(e.retry_after)
+        except TelegramNetworkError as e:
+            if attempt == PUBLISH_RETRIES or not isinstance(e.__cause__, ClientConnectorError):
+                raise
+            logger.warning(f"WF4: Could not connect for {chat_id} ({e}), retrying")
+            await asyncio.sleep(2 ** attempt)
+
+
+async def publish_post(bot: Bot, chat_id: int, post: dict, sent: list[str] = (),
+                       on_part: Callable[[list[str]], Awaitable] = None) -> str:
+    """Send a post with its platform image rendition, if any. Returns the id of
+    the message holding the text.
+
+    Text that fits a caption goes under the photo; longer text follows the
+    photo as messages split at TEXT_LIMIT. `sent` holds the message ids of
+    parts an earlier attempt already delivered: those parts are skipped.
+    `on_part` is awaited with the updated ids after every delivered part.
+    """
+    parts = await _plan_parts(bot, chat_id, post)
+    sent = list(sent)
+    text_id = None
+    for i, (holds_text, call) in enumerate(parts):
+        if i >= len(sent):
+            msg = await _send(chat_id, call)
+            if not msg:
+                raise RuntimeError(f"image of post #{post['id']} is no longer available")
+            sent.append(str(msg.message_id))
+            if on_part:
+                await on_part(sent)
+        if holds_text:
+            text_id = sent[i]
+    return text_id
+
+
+async def _plan_parts(bot: Bot, chat_id: int, post: dict) -> list[tuple[bool, Callable]]:
+    """The messages of a post as (part holds the text, send call); the same
+    post always gives the same plan."""
+    content = post["content"]
+    image = await get_post_visual(post)
+    if image and not image.get("file_id") and not Path(image.get("path") or "").is_file():
+        logger.warning(f"WF4: Image of post #{post['id']} is gone, publishing text only")
+        image = None
+    parts = []
+    if image and len(content) <= CAPTION_LIMIT:
+        parts.append((True, lambda: send_image(bot, chat_id, image, caption=content)))
+    else:
+        if image:
+            parts.append((False, lambda: send_image(bot, chat_id, image)))
+        for i, part in enumerate(split_message(content, TEXT_LIMIT)):
+            parts.append((i == 0, lambda part=part: bot.send_message(chat_id=chat_id, text=part)))
+    return parts
@@ -0,0 +1,155 @@
+"""RU -> UZ translation of drafts, cached per paragraph, run in the background."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+
+from aiogram import Bot
+
+from database import get_post, get_translations, save_translations, update_post_content
+from prompts import TRANSLATE_UZ
+from services.ai_client import ask_ai_json, chunk_by_tokens
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = "➖➖➖"
+WORKERS = 2
+# Prompt budget per translation call; longer posts are split by paragraphs
+CHUNK_TOKENS = 1500
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+_queue: asyncio.Queue | None = None
+_workers: list[asyncio.Task] = []
+# Post ids with a translation queued or in progress
+_pending: set[int] = set()
+
+
+def russian_part(content: str) -> str:
+    """The Russian master of a (possibly already bilingual) post."""
+    return content.split(SEPARATOR, 1)[0].strip()
+
+
+def _paragraph_hash(paragraph: str) -> str:
+    normalized = " ".join(paragraph.split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+async def translate_to_uz(text: str) -> str | None:
+    """Uzbek version of a Russian text; cached paragraphs are not re-translated.
+
+    Platform variants of one post usually share paragraphs (hook, CTA,
+    hashtags), so later variants mostly hit the cache.
+    """
+    paragraphs = [p.strip() for p in _PARAGRAPH_RE.split(text.strip()) if p.strip()]
+    if not paragraphs:
+        return None
+    hashes = [_paragraph_hash(p) for p in paragraphs]
+    cached = await get_translations(list(set(hashes)))
+
+    missing = list(dict.fromkeys(p for p, h in zip(paragraphs, hashes) if h not in cached))
+    if missing:
+        chunks = chunk_by_tokens(missing, CHUNK_TOKENS)
+        results = await asyncio.gather(*(_translate_chunk(c) for c in chunks))
+        fresh = {}
+        for chunk, translated in zip(chunks, results):
+            if translated is None:
+                return None
+            fresh.update({_paragraph_hash(p): t for p, t in zip(chunk, translated)})
+        await save_translations(fresh)
+        cached.update(fresh)
+
+    logger.info(f"Translation: {len(paragraphs)} paragraphs, {len(missing)} translated")
+    return "\n\n".join(cached[h] for h in hashes)
+
+
+async def _translate_chunk(paragraphs: list[str]) -> list[str] | None:
+    prompt = TRANSLATE_UZ.format(
+        paragraphs=json.dumps(paragraphs, ensure_ascii=False, indent=1),
+        count=len(paragraphs),
+    )
+    result = await ask_ai_json(prompt, max_tokens=800 + 2 * sum(len(p) for p in paragraphs) // 3)
+    translated = result.get("paragraphs")
+    if (not isinstance(translated, list) or len(translated) != len(paragraphs)
+            or not all(isinstance(t, str) and t.strip() for t in translated)):
+        logger.error(f"Translation: bad response for {len(paragraphs)} paragraphs")
+        return None
+    return [t.strip() for t in translated]
+
+
+def bilingual(ru: str, uz: str) -> str:
+    return f"{ru}\n\n{SEPARATOR}\n\n{uz}"
+
+
+def is_translated(post: dict) -> bool:
+    return SEPARATOR in post["content"]
+
+
+def ensure_translation(post: dict) -> bool:
+    """Queue the Uzbek half of a Russian-only post unless already queued.
+
+    Returns True if the post is already bilingual (ready to publish).
+    """
+    if is_translated(post):
+        return True
+    if post["id"] not in _pending:
+        enqueue_translation(post["id"], post["content"])
+    return False
+
+
+# ── Background queue ──
+
+def start_translation_workers(bot: Bot):
+    """Start consumers that translate delivered drafts and refresh their cards."""
+    global _queue
+    _queue = asyncio.Queue()
+    for i in range(WORKERS):
+        _workers.append(asyncio.create_task(_worker(bot, i)))
+    logger.info(f"Translation queue: {WORKERS} workers started")
+
+
+async def stop_translation_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+def enqueue_translation(post_id: int, ru_content: str):
+    """Schedule the Uzbek half of a Russian draft. No-op if workers are not running."""
+    if _queue is None:
+        logger.warning(f"Translation queue not started, post #{post_id} stays Russian-only")
+        return
+    _pending.add(post_id)
+    _queue.put_nowait((post_id, ru_content))
+
+
+async def _worker(bot: Bot, n: int):
+    from services.notifier import refresh_draft_card
+
+    while True:
+        post_id, ru_content = await _queue.get()
+        try:
+            uz = await translate_to_uz(ru_content)
+            if uz and await _apply_translation(post_id, ru_content, uz):
+                await refresh_draft_card(bot, post_id)
+        except Exception as e:
+            logger.error(f"Translation worker {n}: post #{post_id} failed: {e}")
+        finally:
+            _pending.discard(post_id)
+            _queue.task_done()
+
+
+async def _apply_translation(post_id: int, ru_content: str, uz: str) -> bool:
+    """Append the Uzbek half unless the post changed while we were translating."""
+    post = await get_post(post_id)
+    if not post or post["status"] == "published":
+        return False
+    # Edited by the admin, swapped for another variant or already bilingual
+    if post["content"] != ru_content or SEPARATOR in post["content"]:
+        logger.info(f"Translation: post #{post_id} changed meanwhile, skipped")
+        return False
+    await update_post_content(post_id, bilingual(ru_content, uz))
+    return True
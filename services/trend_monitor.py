@@ -1,24 +1,27 @@
-"""WF2: Collect trends from Google Trends + vc.ru, analyze via AI, save to DB."""
+"""WF2: Collect trends from a registry of polled sources, analyze via AI, save to DB."""
 
+import asyncio
+import hashlib
 import logging
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import httpx
 
-from config import BRANDS
-from database import save_trend, get_today_trends
+from config import (
+    BRANDS, TREND_CANDIDATES_PER_BRAND, TREND_REANALYSIS_MIN_SCORE, TREND_SOURCES,
+)
+from database import (
+    save_trend, get_today_trends, ingest_trend_items, get_recent_trend_titles,
+    update_trend_source_state, get_trend_sources_state,
+)
 from prompts import TREND_ANALYSIS
 from services.ai_client import ask_ai_json
+from services.relevance import build_brand_profiles, rank_trends, top_candidates
+from services.rss import parse_rss_items, item_key
 
 logger = logging.getLogger(__name__)
 
-SOURCES = [
-    ("Google Trends UZ", "https://trends.google.com/trends/trendingsearches/daily/rss?geo=UZ"),
-    ("Google Trends RU", "https://trends.google.com/trends/trendingsearches/daily/rss?geo=RU"),
-    ("vc.ru RSS", "https://vc.ru/rss"),
-]
-
 HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; SMM-Agent/1.0)"}
 
 
@@ -26,17 +29,29 @@ async def run_trend_monitoring() -> dict:
     """Full WF2 pipeline: fetch → parse → AI analyze → save."""
     logger.info("WF2: Starting trend monitoring")
 
-    # 1. Fetch all RSS sources
-    raw_trends = await _fetch_all_trends()
+    # 1. Poll every source, then analyze everything ingested over the last day
+    await poll_trend_sources(force=True)
+    raw_trends = [t for t in await get_recent_trend_titles(hours=24) if len(t) > 3]
     if not raw_trends:
         logger.warning("WF2: No trends fetched")
         return {"error": "No trends fetched"}
 
-    # 2. Ask AI to analyze trends for each project
+    # 2. Pre-rank candidates per brand locally, send only the top few
+    profiles = await build_brand_profiles()
+    candidates = top_candidates(
+        rank_trends(raw_trends, profiles), TREND_CANDIDATES_PER_BRAND
+    )
+    candidates_text = _format_candidates(candidates)
+    candidates_count = len({t for ts in candidates.values() for t in ts})
+    logger.info(f"WF2: {candidates_count}/{len(raw_trends)} trends passed prefilter")
+
+    # 3. Ask AI to analyze candidates for each project
     today = datetime.now().strftime("%Y-%m-%d")
     prompt = TREND_ANALYSIS.format(
-        count=len(raw_trends),
-        trends="\n".join(raw_trends[:25]),
+        count=candidates_count,
+        total=len(raw_trends),
+        trends=candidates_text,
+        current="(ещё не выбраны)",
     )
     analysis = await ask_ai_json(
         prompt,
@@ -47,8 +62,7 @@ async def run_trend_monitoring() -> dict:
         logger.error("WF2: AI returned empty analysis")
         return {"error": "AI analysis failed"}
 
-    # 3. Save trends for each project
-    raw_str = "\n".join(raw_trends[:25])
+    # 4. Save trends for each project
     for project_id in BRANDS:
         proj_data = analysis.get(project_id, {})
         await save_trend(
@@ -57,38 +71,163 @@ async def run_trend_monitoring() -> dict:
             trend=proj_data.get("trend", ""),
             idea=proj_data.get("idea", ""),
             category=proj_data.get("category", ""),
-            raw_trends=raw_str,
+            raw_trends="\n".join(candidates.get(project_id, [])),
         )
 
     logger.info(f"WF2: Saved trends for {len(BRANDS)} projects")
     return {"date": today, "analysis": analysis, "raw_count": len(raw_trends)}
 
 
-async def _fetch_all_trends() -> list[str]:
-    """Fetch and parse trends from all RSS sources."""
-    all_trends: set[str] = set()
+async def run_trend_repoll() -> dict:
+    """Intra-day WF2: poll due sources and re-analyze only on new relevant items.
+
+    Returns {"new": n} when nothing changed, plus "date"/"updated" project ids
+    when a lightweight re-analysis replaced some brands' trends.
+    """
+    new_items = await poll_trend_sources()
+    titles = list(dict.fromkeys(i["title"] for i in new_items if len(i["title"]) > 3))
+    if not titles:
+        return {"new": 0}
+
+    # Until the daily analysis has run, new items just wait for it
+    today = datetime.now().strftime("%Y-%m-%d")
+    current = {t["project_id"]: t.get("trend", "") for t in await get_today_trends(today)}
+    if not current:
+        return {"new": len(titles)}
+
+    profiles = await build_brand_profiles()
+    ranked = rank_trends(titles, profiles)
+    hot = {
+        pid: [t for score, t in scored if score >= TREND_REANALYSIS_MIN_SCORE]
+        for pid, scored in ranked.items()
+    }
+    hot = {pid: ts[:TREND_CANDIDATES_PER_BRAND] for pid, ts in hot.items() if ts}
+    if not hot:
+        logger.info(f"WF2: {len(titles)} new items, none relevant enough to re-analyze")
+        return {"new": len(titles)}
+
+    # Current trends compete with the new candidates
+    prompt = TREND_ANALYSIS.format(
+        count=sum(len(ts) for ts in hot.values()),
+        total=len(titles),
+        trends=_format_candidates(hot, missing="(без изменений)"),
+        current="\n".join(f"{pid}: {current[pid]}" for pid in BRANDS if current.get(pid))
+        or "(нет)",
+    )
+    analysis = await ask_ai_json(
+        prompt,
+        system="Ты аналитик трендов. Отвечай строго JSON без markdown.",
+    )
+    if not analysis:
+        logger.error("WF2: AI returned empty re-analysis")
+        return {"new": len(titles), "error": "AI analysis failed"}
+
+    updated = []
+    for project_id in hot:
+        proj_data = analysis.get(project_id, {})
+        if not proj_data.get("trend"):
+            continue
+        await save_trend(
+            date=today,
+            project_id=project_id,
+            trend=proj_data.get("trend", ""),
+            idea=proj_data.get("idea", ""),
+            category=proj_data.get("category", ""),
+            raw_trends="\n".join(hot[project_id]),
+        )
+        updated.append(project_id)
+
+    logger.info(f"WF2: Re-analysis updated trends for {updated}")
+    return {"date": today, "new": len(titles), "updated": updated}
+
+
+async def poll_trend_sources(force: bool = False) -> list[dict]:
+    """Poll sources whose interval has elapsed (all if force); ingest unseen items.
+
+    Returns the newly ingested items across all polled sources.
+    """
+    state = await get_trend_sources_state()
+    now = datetime.now()
+    due = [
+        src for src in TREND_SOURCES
+        if force or _is_due(src, state.get(src["name"]), now)
+    ]
+    if not due:
+        return []
 
     async with httpx.AsyncClient(timeout=15, headers=HEADERS) as client:
-        for name, url in SOURCES:
-            try:
-                resp = await client.get(url)
-                resp.raise_for_status()
-                titles = _parse_rss_titles(resp.text)
-                all_trends.update(titles)
-                logger.info(f"WF2: {name} -> {len(titles)} titles")
-            except Exception as e:
-                logger.warning(f"WF2: Failed to fetch {name}: {e}")
+        results = await asyncio.gather(*(_poll_source(client, src) for src in due))
+    return [item for items in results for item in items]
+
+
+def _is_due(source: dict, state: dict | None, now: datetime) -> bool:
+    if not state or not state.get("last_polled_at"):
+        return True
+    last = datetime.fromisoformat(state["last_polled_at"])
+    return now - last >= timedelta(minutes=source["interval"])
+
+
+async def _poll_source(client: httpx.AsyncClient, source: dict) -> list[dict]:
+    name = source["name"]
+    try:
+        resp = await client.get(source["url"])
+        resp.raise_for_status()
+        items = PARSERS[source["parser"]](resp.text)
+        new_items = await ingest_trend_items(name, items)
+        await update_trend_source_state(name, len(new_items))
+        logger.info(f"WF2: {name} -> {len(items)} items, {len(new_items)} new")
+        return new_items
+    except Exception as e:
+        logger.warning(f"WF2: Failed to poll {name}: {e}")
+        await update_trend_source_state(name, 0, error=str(e)[:200])
+        return []
+
+
+async def get_sources_overview() -> list[dict]:
+    """Registry merged with poll state, for the /sources command."""
+    state = await get_trend_sources_state()
+    return [{**src, **state.get(src["name"], {})} for src in TREND_SOURCES]
+
+
+def _format_candidates(candidates: dict[str, list[str]],
+                       missing: str = "(релевантных трендов нет)") -> str:
+    """Render per-brand candidate lists for the analysis prompt."""
+    blocks = []
+    for project_id in BRANDS:
+        trends = candidates.get(project_id, [])
+        lines = [f"{project_id}:"]
+        lines += [f"  - {t}" for t in trends] or [f"  {missing}"]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
 
-    return [t for t in all_trends if len(t) > 3]
+# ── Parsers ─────────────────────────────────────────────────
+# Each parser turns a response body into [{"title", "link", "hash"}].
 
+def _parse_rss(body: str) -> list[dict]:
+    """Standard RSS/Atom items keyed by guid."""
+    return [
+        {"title": i["title"], "link": i["link"], "hash": item_key(i)}
+        for i in parse_rss_items(body) if i["title"]
+    ]
 
-def _parse_rss_titles(body: str) -> list[str]:
-    """Extract titles from RSS XML body."""
+
+def _parse_rss_titles(body: str) -> list[dict]:
+    """Loose title scraping for feeds without proper <item> blocks."""
     # CDATA titles (Google Trends format)
     cdata = re.findall(r"<title><!\[CDATA\[([^\]]+)\]\]></title>", body)
     # Plain titles (standard RSS)
     plain = re.findall(r"<title>([^<]{5,100})</title>", body)
     plain = [t.strip() for t in plain if "http" not in t and "<?" not in t]
 
-    titles = list(dict.fromkeys(cdata + plain[:15]))  # deduplicate, preserve order
-    return titles
+    titles = list(dict.fromkeys(cdata + plain))  # deduplicate, preserve order
+    return [
+        {"title": t, "link": "", "hash": hashlib.sha1(t.encode("utf-8")).hexdigest()}
+        for t in titles
+    ]
+
+
+PARSERS = {
+    "rss": _parse_rss,
+    "rss_titles": _parse_rss_titles,
+}
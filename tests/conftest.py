@@ -0,0 +1,84 @@
+"""Shared fixtures: a fresh SQLite database per test and a local HTTP stand-in."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "test.db")
+    monkeypatch.setattr(config, "DB_PATH", path)
+    monkeypatch.setattr(database, "DB_PATH", path)
+    asyncio.run(database.init_db())
+    return path
+
+
+class StandIn:
+    """aiohttp server on a free local port; records requests, answers from a queue.
+
+    `responses` holds (status, json body) pairs consumed per request; once it
+    is empty every request is answered by `handler(request)`.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.responses: list[tuple[int, dict]] = []
+        self.requests: list[dict] = []
+        self.url = ""
+        self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.json() if request.can_read_body else None
+        self.requests.append({
+            "path": request.path, "query": dict(request.query), "json": body,
+            "headers": dict(request.headers),
+        })
+        if self.responses:
+            status, payload = self.responses.pop(0)
+        else:
+            status, payload = 200, await self.handler(request, body)
+        return web.json_response(payload, status=status)
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+class FakeBot:
+    """Records admin messages; enough of aiogram's Bot for jobs and notices."""
+
+    def __init__(self):
+        self.messages: list[str] = []
+        self.markups: list = []
+
+    async def send_message(self, chat_id, text, reply_markup=None, **kwargs):
+        self.messages.append(text)
+        self.markups.append(reply_markup)
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Retry immediately instead of sleeping between attempts."""
+    import services.metrics
+    import services.targets
+    for module in (services.metrics, services.targets):
+        monkeypatch.setattr(module, "backoff_delay", lambda attempt, retry_after: 0)
@@ -0,0 +1,34 @@
+"""Competitor analysis chunks carry only their own channels' stats."""
+
+from services.ai_client import estimate_tokens
+from services.competitor import _chunk_with_stats
+
+
+def _stats(channel: str) -> dict:
+    return {
+        "channel": channel, "posts_per_day": 2.5, "avg_length": 480, "media_share": 0.4,
+        "avg_hashtags": 1.2, "peak_hours": [10, 18], "top_hashtags": ["#5g", "#b2b", "#iot"],
+    }
+
+
+def test_chunks_get_only_their_channels_stats_within_budget():
+    channels = [f"channel{i}" for i in range(120)]
+    posts = [{"channel": c} for c in channels for _ in range(2)]
+    lines = [f"Пост канала {p['channel']}: новость про оборудование" for p in posts]
+    budget = 300
+
+    chunks = _chunk_with_stats(posts, lines, [_stats(c) for c in channels], budget)
+
+    assert [line for chunk, _ in chunks for line in chunk] == lines
+    for chunk, stats_text in chunks:
+        chunk_channels = {line.split(":")[0].split()[-1] for line in chunk}
+        stats_channels = {line.split(":")[0].lstrip("@") for line in stats_text.split("\n")}
+        assert stats_channels == chunk_channels
+        used = sum(estimate_tokens(line) for line in chunk)
+        used += sum(estimate_tokens(line) for line in stats_text.split("\n"))
+        assert used <= budget
+
+
+def test_channel_without_stats():
+    chunks = _chunk_with_stats([{"channel": "new"}], ["Пост"], [], 3000)
+    assert chunks == [(["Пост"], "нет данных")]
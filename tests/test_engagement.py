@@ -0,0 +1,65 @@
+"""Engagement significance is tested per post, not per view."""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import aiosqlite
+
+import config
+from services.engagement import compute_engagement
+
+
+async def _add(category: str, views: int, interactions: int):
+    published = (datetime.now() - timedelta(days=1)).isoformat()
+    async with aiosqlite.connect(config.DB_PATH) as db:
+        cursor = await db.execute("""
+            INSERT INTO posts (project_id, platform, content, status, category,
+                               created_at, published_at, message_id)
+            VALUES ('pixie', 'telegram', 'text', 'published', ?, ?, ?, 1)
+        """, (category, published, published))
+        await db.execute("""
+            INSERT INTO post_metrics (post_id, sampled_at, views, reactions, forwards, comments)
+            VALUES (?, ?, ?, ?, 0, 0)
+        """, (cursor.lastrowid, published, views, interactions))
+        await db.commit()
+
+
+def _flags(stats: dict) -> dict[str, str]:
+    return {g["key"]: g["flag"] for g in stats["dimensions"]["category"]}
+
+
+def _add_group(category: str, er: float, count: int, rng: random.Random):
+    for _ in range(count):
+        views = rng.randint(800, 1200)
+        asyncio.run(_add(category, views, round(views * er * rng.uniform(0.8, 1.2))))
+
+
+def test_one_viral_post_does_not_flag_its_category(db):
+    rng = random.Random(1)
+    _add_group("кейс", 0.05, 5, rng)
+    _add_group("инсайт", 0.05, 20, rng)
+    # One viral post: 200x the views and a high ER. Pooled over views this
+    # made "кейс" look significantly better than "инсайт"
+    asyncio.run(_add("кейс", 200_000, 30_000))
+
+    flags = _flags(asyncio.run(compute_engagement()))
+    assert flags == {"кейс": "", "инсайт": ""}
+
+
+def test_consistent_difference_is_flagged(db):
+    rng = random.Random(2)
+    _add_group("кейс", 0.10, 8, rng)
+    _add_group("инсайт", 0.04, 12, rng)
+
+    stats = asyncio.run(compute_engagement())
+    assert _flags(stats) == {"кейс": "↑", "инсайт": "↓"}
+    by_key = {g["key"]: g for g in stats["dimensions"]["category"]}
+    assert 0.09 < by_key["кейс"]["er"] < 0.11
+
+
+def test_small_groups_are_never_flagged(db):
+    rng = random.Random(3)
+    _add_group("кейс", 0.20, 2, rng)
+    _add_group("инсайт", 0.04, 12, rng)
+    assert _flags(asyncio.run(compute_engagement()))["кейс"] == ""
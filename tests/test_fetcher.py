@@ -0,0 +1,33 @@
+"""fetch_many: a busy host does not starve requests to other hosts."""
+
+import asyncio
+import time
+
+import httpx
+
+import services.fetcher as fetcher
+
+
+def test_busy_host_does_not_hold_global_slots(monkeypatch):
+    started: dict[str, float] = {}
+    t0 = time.monotonic()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        started[str(request.url)] = time.monotonic() - t0
+        if request.url.host == "slow.example":
+            await asyncio.sleep(0.3)
+        return httpx.Response(200, text="ok")
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        fetcher.httpx, "AsyncClient",
+        lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+    )
+    urls = [f"https://slow.example/{i}" for i in range(3)] + ["https://fast.example/"]
+
+    bodies = asyncio.run(fetcher.fetch_many(urls, concurrency=2, per_host=1))
+
+    assert all(body == "ok" for body in bodies.values())
+    # Old order (global, then host): two slow requests took both global
+    # slots and the fast host waited for the first slow response
+    assert started["https://fast.example/"] < 0.2
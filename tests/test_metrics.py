@@ -0,0 +1,140 @@
+"""Metrics collector against a local stand-in of the metrics API."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import aiosqlite
+import pytest
+
+import config
+import services.metrics as metrics
+from services.ratelimit import TokenBucket
+from tests.conftest import StandIn
+
+
+@pytest.fixture(autouse=True)
+def fast_bucket(monkeypatch):
+    monkeypatch.setattr(metrics, "_bucket", TokenBucket(1000, 1000))
+
+
+async def _add_posts(message_ids: list[int], target: str | None = None) -> list[int]:
+    published = (datetime.now() - timedelta(hours=1)).isoformat()
+    ids = []
+    async with aiosqlite.connect(config.DB_PATH) as db:
+        for message_id in message_ids:
+            cursor = await db.execute("""
+                INSERT INTO posts (project_id, platform, content, status, created_at,
+                                   published_at, message_id)
+                VALUES ('pixie', 'telegram', 'text', 'published', ?, ?, ?)
+            """, (published, published, message_id))
+            ids.append(cursor.lastrowid)
+            if target:
+                await db.execute("""
+                    INSERT INTO publish_outbox (post_id, target, status, message_id, updated_at)
+                    VALUES (?, ?, 'sent', ?, ?)
+                """, (cursor.lastrowid, target, str(message_id), published))
+        await db.commit()
+    return ids
+
+
+async def _samples() -> dict[int, int]:
+    async with aiosqlite.connect(config.DB_PATH) as db:
+        cursor = await db.execute("SELECT post_id, views FROM post_metrics")
+        return dict(await cursor.fetchall())
+
+
+async def _views(request, body):
+    return {i: {"views": int(i) * 10, "reactions": 1} for i in request.query["ids"].split(",")}
+
+
+def test_collects_in_batches_per_chat(db, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_BATCH_SIZE", 2)
+
+    async def run():
+        async with StandIn(_views) as api:
+            monkeypatch.setattr(metrics, "METRICS_API_URL", api.url)
+            channel_posts = await _add_posts([1, 2, 3])
+            other_posts = await _add_posts([7], target="telegram:-100500")
+            first = await metrics.collect_metrics()
+            second = await metrics.collect_metrics()
+        return api.requests, channel_posts, other_posts, first, second
+
+    requests, channel_posts, other_posts, first, second = asyncio.run(run())
+
+    assert first == {"polled": 4, "changed": 4, "failed": 0}
+    # Polled again only after the age-based interval
+    assert second == {"polled": 0, "changed": 0, "failed": 0}
+    calls = sorted((r["path"], r["query"]["ids"]) for r in requests)
+    assert calls == [
+        ("/-100500", "7"),
+        (f"/{config.CHANNEL_ID}", "1,2"),
+        (f"/{config.CHANNEL_ID}", "3"),
+    ]
+    samples = asyncio.run(_samples())
+    assert samples == {
+        channel_posts[0]: 10, channel_posts[1]: 20, channel_posts[2]: 30, other_posts[0]: 70,
+    }
+
+
+def test_retries_transient_errors(db, monkeypatch, no_backoff):
+    monkeypatch.setattr(metrics, "METRICS_RETRIES", 2)
+
+    async def run():
+        async with StandIn(_views) as api:
+            monkeypatch.setattr(metrics, "METRICS_API_URL", api.url)
+            api.responses = [(503, {}), (429, {})]
+            await _add_posts([4])
+            return await metrics.collect_metrics(), len(api.requests)
+
+    stats, calls = asyncio.run(run())
+    assert stats == {"polled": 1, "changed": 1, "failed": 0}
+    assert calls == 3
+
+
+def test_gives_up_after_metrics_retries(db, monkeypatch, no_backoff):
+    monkeypatch.setattr(metrics, "METRICS_RETRIES", 1)
+
+    async def run():
+        async with StandIn(_views) as api:
+            monkeypatch.setattr(metrics, "METRICS_API_URL", api.url)
+            api.responses = [(503, {})] * 5
+            await _add_posts([5, 6])
+            return await metrics.collect_metrics(), len(api.requests)
+
+    stats, calls = asyncio.run(run())
+    assert stats == {"polled": 0, "changed": 0, "failed": 2}
+    assert calls == 2
+    assert asyncio.run(_samples()) == {}
+
+
+def test_disabled_without_api_url(db, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_API_URL", "")
+    asyncio.run(_add_posts([1]))
+    assert asyncio.run(metrics.collect_metrics()) == {"polled": 0, "changed": 0, "failed": 0}
+
+
+@pytest.mark.parametrize("payload", [[], None])
+def test_skips_batch_with_non_object_body(db, monkeypatch, payload):
+    async def run():
+        async with StandIn(_views) as api:
+            monkeypatch.setattr(metrics, "METRICS_API_URL", api.url)
+            api.responses = [(200, payload)]
+            await _add_posts([1])
+            await _add_posts([2], target="telegram:-100500")
+            return await metrics.collect_metrics()
+
+    # The malformed batch is logged and skipped; the other chat is still polled
+    assert asyncio.run(run()) == {"polled": 1, "changed": 1, "failed": 1}
+
+
+def test_skips_malformed_samples(db, monkeypatch):
+    async def run():
+        async with StandIn(_views) as api:
+            monkeypatch.setattr(metrics, "METRICS_API_URL", api.url)
+            api.responses = [(200, {"1": {"views": 5}, "2": [7]})]
+            ids = await _add_posts([1, 2])
+            return ids, await metrics.collect_metrics()
+
+    ids, stats = asyncio.run(run())
+    assert stats == {"polled": 1, "changed": 1, "failed": 1}
+    assert asyncio.run(_samples()) == {ids[0]: 5}
@@ -0,0 +1,49 @@
+"""Candidate sampling: extra variants for each brand's primary platform only."""
+
+import asyncio
+
+import pytest
+
+import config
+import services.post_generator as generator
+from database import count_post_candidates
+
+TOPICS = ["сети", "кабели", "серверы", "маркетинг", "продажи", "склад"]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(generator, "MULTI_PLATFORM_GENERATION", True)
+    calls = []
+
+    async def contents(ctx, platforms, temperature=0.7):
+        n = len(calls)
+        calls.append((ctx.project_id, tuple(platforms)))
+        return {
+            p: f"Пост номер {n} для {p}: {TOPICS[n % len(TOPICS)]} " * 20 + str(n)
+            for p in platforms
+        }
+
+    monkeypatch.setattr(generator, "_generate_contents", contents)
+    monkeypatch.setattr(generator, "enqueue_translation", lambda *a: None)
+    monkeypatch.setattr(generator, "POST_CANDIDATES", 2)
+    return calls
+
+
+def test_extra_candidates_only_for_primary_platform(db, fake_llm):
+    posts = asyncio.run(generator.run_post_generation())
+
+    expected = []
+    for pid, brand in config.BRANDS.items():
+        plats = tuple(brand["platforms"])
+        expected += [(pid, plats), (pid, plats[:1])]
+    assert sorted(fake_llm) == sorted(expected)
+
+    pools = {
+        (p["project_id"], p["platform"]): asyncio.run(count_post_candidates(p["id"]))
+        for p in posts
+    }
+    for pid, brand in config.BRANDS.items():
+        primary, *others = brand["platforms"]
+        assert pools[(pid, primary)] == 1
+        assert all(pools[(pid, plat)] == 0 for plat in others)
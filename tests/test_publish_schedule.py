@@ -0,0 +1,126 @@
+"""Publish slots and the retry policy for failed publishes."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import services.publish_schedule as schedule
+import services.publisher as publisher
+from database import create_post, get_post, set_post_scheduled_at, update_post_status
+from tests.conftest import FakeBot
+
+# Nothing listens on the discard port: every send fails with ConnectError
+DEAD_TARGET = "http:http://127.0.0.1:9/posts"
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.jobs: dict[str, datetime] = {}
+
+    def add_job(self, func, trigger, id, **kwargs):
+        self.jobs[id] = trigger.run_date.replace(tzinfo=None)
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def remove_job(self, job_id):
+        del self.jobs[job_id]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    def set_now(value: str):
+        monkeypatch.setattr(schedule, "local_now", lambda: datetime.fromisoformat(value))
+    return set_now
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    scheduler = FakeScheduler()
+    monkeypatch.setattr(schedule, "_scheduler", scheduler)
+    monkeypatch.setattr(schedule, "PUBLISH_SLOTS", ["10:00", "14:00", "18:00"])
+    monkeypatch.setattr(publisher, "targets_for", lambda post: [DEAD_TARGET])
+    monkeypatch.setattr("services.targets.PUBLISH_RETRIES", 0)
+    return scheduler.jobs
+
+
+async def _taken(at: str):
+    post_id = await create_post("pixie", "telegram", "Пост")
+    await update_post_status(post_id, "approved")
+    await set_post_scheduled_at(post_id, at)
+
+
+@pytest.mark.parametrize("now, taken, expected", [
+    # Open, unused window: right away
+    ("2026-10-19T19:00", [], "2026-10-19T19:00"),
+    # The evening window closes before the night
+    ("2026-10-19T23:30", [], "2026-10-20T10:00"),
+    ("2026-10-19T21:00", [], "2026-10-20T10:00"),
+    # Used window: the next slot
+    ("2026-10-19T11:00", ["2026-10-19T10:00"], "2026-10-19T14:00"),
+    ("2026-10-19T19:00", ["2026-10-19T18:00"], "2026-10-20T10:00"),
+])
+def test_next_free_slot(db, jobs, clock, now, taken, expected):
+    clock(now)
+
+    async def run():
+        for at in taken:
+            await _taken(at)
+        return await schedule.next_free_slot()
+
+    assert asyncio.run(run()) == datetime.fromisoformat(expected)
+
+
+def test_failed_approved_post_is_retried_with_backoff(db, jobs, clock):
+    clock("2026-10-19T10:00")
+
+    async def run():
+        post_id = await create_post("pixie", "telegram", "Пост")
+        await update_post_status(post_id, "approved", [DEAD_TARGET])
+        await set_post_scheduled_at(post_id, "2026-10-19T10:00")
+        retries = []
+        for _ in range(3):
+            retries.append(await schedule.publish_or_retry(FakeBot(), await get_post(post_id)))
+        return post_id, retries, await get_post(post_id)
+
+    post_id, retries, post = asyncio.run(run())
+    start = datetime.fromisoformat("2026-10-19T10:00")
+    assert retries == [
+        (False, start + timedelta(minutes=5)),
+        (False, start + timedelta(minutes=10)),
+        (False, start + timedelta(minutes=20)),
+    ]
+    assert jobs == {f"publish_post_{post_id}": start + timedelta(minutes=20)}
+    # Still approved and holding its slot
+    assert post["status"] == "approved" and post["scheduled_at"] == "2026-10-19T10:00"
+
+
+def test_retries_stop_after_the_attempt_limit(db, jobs, clock, monkeypatch):
+    clock("2026-10-19T10:00")
+    monkeypatch.setattr(schedule, "PUBLISH_RETRY_ATTEMPTS", 2)
+
+    async def run():
+        post_id = await create_post("pixie", "telegram", "Пост")
+        await update_post_status(post_id, "approved", [DEAD_TARGET])
+        return [
+            (await schedule.publish_or_retry(FakeBot(), await get_post(post_id)))[1]
+            for _ in range(2)
+        ]
+
+    first, second = asyncio.run(run())
+    assert first is not None and second is None
+
+
+def test_failed_draft_stays_a_draft_without_a_job(db, jobs, clock):
+    clock("2026-10-19T10:00")
+
+    async def run():
+        post_id = await create_post("pixie", "telegram", "Пост")
+        result = await schedule.publish_or_retry(FakeBot(), await get_post(post_id))
+        return result, await get_post(post_id), await schedule.recover_scheduled_posts()
+
+    result, post, recovered = asyncio.run(run())
+    assert result == (False, None)
+    assert post["status"] == "draft"
+    assert recovered == 0 and jobs == {}
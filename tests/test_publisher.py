@@ -0,0 +1,104 @@
+"""Outbox recovery: sends a crash interrupted are never resent on their own."""
+
+import asyncio
+
+import aiosqlite
+import pytest
+
+import config
+import services.publisher as publisher
+from database import (
+    create_post, get_post, get_outbox_entries, resolve_interrupted_outbox, update_post_status,
+)
+from tests.conftest import FakeBot, StandIn
+
+
+async def _created(request, body):
+    return {"id": f"ext-{body['post_id']}"}
+
+
+async def _approved_post(targets: list[str]) -> int:
+    post_id = await create_post("pixie", "telegram", "Короткий пост")
+    await update_post_status(post_id, "approved", targets)
+    return post_id
+
+
+async def _crash_while_sending(post_id: int, part_ids: str = None):
+    async with aiosqlite.connect(config.DB_PATH) as db:
+        await db.execute(
+            "UPDATE publish_outbox SET status = 'sending', part_ids = ? WHERE post_id = ?",
+            (part_ids, post_id),
+        )
+        await db.commit()
+
+
+@pytest.fixture
+def only_outbox_targets(monkeypatch):
+    monkeypatch.setattr(publisher, "targets_for", lambda post: [])
+
+
+def test_interrupted_http_send_waits_for_the_admin(db, only_outbox_targets):
+    async def run():
+        async with StandIn(_created) as platform:
+            post_id = await _approved_post([f"http:{platform.url}"])
+            await _crash_while_sending(post_id)
+            bot = FakeBot()
+            await publisher.recover_outbox(bot)
+            # Not resent by a publish run either
+            assert not await publisher.publish_and_record(bot, await get_post(post_id), True)
+            entry = (await get_outbox_entries([post_id]))[0]
+            before = (entry["status"], len(platform.requests), len(bot.messages))
+
+            # Admin: "Отправить заново"
+            assert await resolve_interrupted_outbox(entry["id"], resend=True)
+            published = await publisher.publish_and_record(bot, await get_post(post_id))
+            return before, published, len(platform.requests), await get_post(post_id)
+
+    before, published, requests, post = asyncio.run(run())
+    # Startup and the failed publish each asked the admin
+    assert before == ("interrupted", 0, 2)
+    assert published and requests == 1
+    assert post["status"] == "published"
+
+
+def test_admin_marks_interrupted_send_as_delivered(db, only_outbox_targets):
+    async def run():
+        post_id = await _approved_post(["http://127.0.0.1:9/never"])
+        await _crash_while_sending(post_id)
+        await publisher.recover_outbox(FakeBot())
+        entry = (await get_outbox_entries([post_id]))[0]
+        assert await resolve_interrupted_outbox(entry["id"])
+        # A second click finds nothing to resolve
+        assert not await resolve_interrupted_outbox(entry["id"], resend=True)
+        return await publisher.complete_if_sent(post_id), await get_post(post_id)
+
+    completed, post = asyncio.run(run())
+    assert completed and post["status"] == "published"
+
+
+def test_telegram_send_with_every_part_recorded_is_closed_at_startup(db, only_outbox_targets):
+    async def run():
+        post_id = await _approved_post(["telegram:-100500"])
+        await _crash_while_sending(post_id, part_ids="77")
+        bot = FakeBot()
+        await publisher.recover_outbox(bot)
+        return await get_post(post_id), await get_outbox_entries([post_id]), bot.messages
+
+    post, entries, messages = asyncio.run(run())
+    assert entries[0]["status"] == "sent" and entries[0]["message_id"] == "77"
+    assert post["status"] == "published" and post["message_id"] == 77
+    assert messages == []
+
+
+def test_telegram_send_with_missing_parts_stays_interrupted(db, only_outbox_targets):
+    async def run():
+        post_id = await create_post("pixie", "telegram", "Абзац.\n\n" * 1500)
+        await update_post_status(post_id, "approved", ["telegram:-100500"])
+        await _crash_while_sending(post_id, part_ids="77")
+        bot = FakeBot()
+        await publisher.recover_outbox(bot)
+        return await get_outbox_entries([post_id]), bot.messages
+
+    entries, messages = asyncio.run(run())
+    assert entries[0]["status"] == "interrupted"
+    assert len(messages) == 1 and "прервана" in messages[0]
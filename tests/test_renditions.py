@@ -0,0 +1,46 @@
+"""Rendition pool: a broken worker pool is replaced and the image retried once."""
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+
+import services.image_store as image_store
+import services.renditions as renditions
+
+
+class BrokenPool:
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def test_broken_pool_is_replaced_and_retried(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(image_store, "IMAGES_DIR", tmp_path / "store")
+    monkeypatch.setattr(
+        renditions, "ProcessPoolExecutor", lambda **kw: ThreadPoolExecutor(1)
+    )
+    src = tmp_path / "src.png"
+    Image.new("RGB", (64, 64), "red").save(src)
+
+    broken = BrokenPool()
+    monkeypatch.setattr(renditions, "_pool", broken)
+    image = {"image_hash": "a" * 64, "path": str(src)}
+
+    try:
+        rendition = asyncio.run(
+            renditions.get_platform_rendition(image, "telegram", "leader_team")
+        )
+        assert broken.shut_down
+        assert rendition and rendition["path"]
+        assert isinstance(renditions._pool, ThreadPoolExecutor)
+    finally:
+        renditions.shutdown_renditions()
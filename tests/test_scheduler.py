@@ -0,0 +1,63 @@
+"""WF1 morning job: pregenerated drafts plus generation of what is missing."""
+
+import asyncio
+
+import scheduler
+import services.post_generator
+import services.pregen
+from tests.conftest import FakeBot
+
+
+def _post(pid: str, platform: str) -> dict:
+    return {"id": hash((pid, platform)), "project_id": pid, "platform": platform}
+
+
+def _run_job(monkeypatch, pregen: list[dict]) -> tuple[list[dict], list[str]]:
+    calls = []
+
+    async def promote(bot, chat_id):
+        return pregen
+
+    async def generate(project_id=None, platform=None, on_post=None, **kwargs):
+        calls.append({"project_id": project_id, "platform": platform})
+        return [_post(project_id or "all", platform or "all")]
+
+    monkeypatch.setattr(scheduler, "PREGEN_ENABLED", True)
+    monkeypatch.setattr(services.pregen, "promote_pregen", promote)
+    monkeypatch.setattr(services.post_generator, "run_post_generation", generate)
+    bot = FakeBot()
+    asyncio.run(scheduler._job_generate(bot))
+    return calls, bot.messages
+
+
+def test_partial_pregen_fills_missing_brands_and_platforms(monkeypatch):
+    pregen = [
+        _post("personal_brand", "telegram"),
+        _post("leader_team", "telegram"),
+        _post("leader_team", "linkedin"),
+    ]
+    calls, messages = _run_job(monkeypatch, pregen)
+
+    assert sorted(calls, key=str) == sorted([
+        # Brand with one pregenerated platform: only the other one
+        {"project_id": "personal_brand", "platform": "instagram"},
+        # Brand without pregenerated posts: one run for all its platforms
+        {"project_id": "pixie", "platform": None},
+    ], key=str)
+    assert not any("error" in m for m in messages)
+    assert "Сгенерировано 5 постов" in messages[-1]
+
+
+def test_no_pregen_generates_everything(monkeypatch):
+    calls, messages = _run_job(monkeypatch, [])
+    assert calls == [{"project_id": None, "platform": None}]
+
+
+def test_full_pregen_generates_nothing(monkeypatch):
+    pregen = [
+        _post(pid, plat)
+        for pid, brand in scheduler.BRANDS.items() for plat in brand["platforms"]
+    ]
+    calls, messages = _run_job(monkeypatch, pregen)
+    assert calls == []
+    assert f"Сгенерировано {len(pregen)} постов" in messages[-1]
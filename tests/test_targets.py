@@ -0,0 +1,94 @@
+"""HTTP publish target against a local platform stand-in."""
+
+import asyncio
+
+import httpx
+import pytest
+
+import services.targets as targets
+from tests.conftest import StandIn
+
+POST = {"id": 42, "project_id": "pixie", "platform": "facebook", "content": "Пост"}
+
+
+async def _created(request, body):
+    return {"id": f"ext-{body['post_id']}"}
+
+
+def test_http_target_posts_json(db):
+    async def run():
+        async with StandIn(_created) as platform:
+            target = f"http:{platform.url}/posts"
+            message_id = await targets.get_adapter(target, bot=None).send(POST, {"id": 1})
+        return target, message_id, platform.requests
+
+    target, message_id, requests = asyncio.run(run())
+    assert message_id == "ext-42"
+    assert len(requests) == 1
+    assert requests[0]["path"] == "/posts"
+    assert requests[0]["json"] == {
+        "post_id": 42, "project_id": "pixie", "platform": "facebook",
+        "content": "Пост", "image_path": None,
+    }
+    assert requests[0]["headers"]["Idempotency-Key"] == f"42:{target}"
+
+
+def test_http_target_retries_not_processed(db, monkeypatch, no_backoff):
+    monkeypatch.setattr(targets, "PUBLISH_RETRIES", 2)
+
+    async def run():
+        async with StandIn(_created) as platform:
+            platform.responses = [(503, {}), (429, {})]
+            message_id = await targets.HttpTarget("http:x", platform.url).send(POST, {"id": 1})
+        return message_id, platform.requests
+
+    message_id, requests = asyncio.run(run())
+    assert message_id == "ext-42"
+    assert len(requests) == 3
+    # Same key on every attempt
+    assert {r["headers"]["Idempotency-Key"] for r in requests} == {"42:http:x"}
+
+
+@pytest.mark.parametrize("status", [400, 500, 502, 504])
+def test_http_target_does_not_retry_ambiguous_or_client_errors(db, no_backoff, status):
+    async def run():
+        async with StandIn(_created) as platform:
+            platform.responses = [(status, {"error": "bad"})]
+            try:
+                await targets.HttpTarget("http:x", platform.url).send(POST, {"id": 1})
+            finally:
+                assert len(platform.requests) == 1
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+
+
+def test_http_target_does_not_retry_read_timeout(db, monkeypatch, no_backoff):
+    monkeypatch.setattr(targets, "HTTP_TIMEOUT", 0.2)
+
+    async def slow(request, body):
+        await asyncio.sleep(1)
+        return {"id": "late"}
+
+    async def run():
+        async with StandIn(slow) as platform:
+            try:
+                await targets.HttpTarget("http:x", platform.url).send(POST, {"id": 1})
+            finally:
+                assert len(platform.requests) == 1
+
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(run())
+
+
+def test_http_target_retries_connect_errors(db, monkeypatch, no_backoff):
+    monkeypatch.setattr(targets, "PUBLISH_RETRIES", 1)
+
+    async def run():
+        async with StandIn(_created) as platform:
+            url = platform.url
+        # Stand-in stopped: nothing listens on the port any more
+        await targets.HttpTarget("http:x", url).send(POST, {"id": 1})
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(run())
@@ -29,8 +29,12 @@ def parse_project_platform(text: str) -> tuple[str | None, str | None]:
     return project_id, platform
 
 
-def format_post_card(post: dict) -> str:
-    """Format a post draft as a readable card for the admin."""
+def format_post_card(post: dict, limit: int | None = 3500) -> str:
+    """Format a post draft as a readable card for the admin.
+
+    The text is cut at `limit` so the card fits one message; pass None for
+    the full text when the caller splits the card.
+    """
     brand = BRANDS.get(post["project_id"], {})
     brand_name = brand.get("name", post["project_id"])
     status_emoji = {
@@ -41,12 +45,18 @@ def format_post_card(post: dict) -> str:
     lines = [
         f"{status_emoji} <b>#{post['id']} | {brand_name} | {post['platform']}</b>",
         f"Статус: {post['status']}",
-        "",
-        post["content"][:3500],
     ]
+    if post.get("similar_to"):
+        lines.append(f"⚠️ Похож на пост #{post['similar_to']}")
+    lines += ["", post["content"][:limit]]
     return "\n".join(lines)
 
 
+def format_slot(scheduled_at: str) -> str:
+    """'2025-06-01T14:00' -> '01.06 14:00'."""
+    return f"{scheduled_at[8:10]}.{scheduled_at[5:7]} {scheduled_at[11:16]}"
+
+
 def split_message(text: str, limit: int = 4096) -> list[str]:
     """Split long text into Telegram-safe chunks."""
     if len(text) <= limit:
@@ -79,3 +89,39 @@ def format_trends_card(trends: list[dict]) -> str:
         lines.append(f"  Идея: {t.get('idea', '—')}")
         lines.append("")
     return "\n".join(lines)
+
+
+def format_publish_stats(stats: dict) -> str:
+    """One-line summary of a WF4 publisher run."""
+    published, failed = stats["published"], stats["failed"]
+    lines = [f"Опубликовано {len(published)} постов: " + ", ".join(f"#{p['id']}" for p in published)]
+    if failed:
+        lines.append(f"Ошибки: {len(failed)} — " + ", ".join(f"#{p['id']}" for p in failed))
+    if stats.get("waiting"):
+        lines.append("Ждут перевода: " + ", ".join(f"#{p['id']}" for p in stats["waiting"]))
+    lines.append(f"За {stats['elapsed']} с ({stats['throughput']} постов/мин)")
+    return "\n".join(lines)
+
+
+def format_rollups(rows: list[dict]) -> str:
+    """Per-brand published-post summary from daily_post_rollups rows."""
+    by_project: dict[str, list[dict]] = {}
+    for r in rows:
+        by_project.setdefault(r["project_id"], []).append(r)
+
+    lines = []
+    for pid, items in by_project.items():
+        name = BRANDS.get(pid, {}).get("name", pid)
+        posts = sum(r["posts"] for r in items)
+        platforms, categories = {}, {}
+        for r in items:
+            platforms[r["platform"]] = platforms.get(r["platform"], 0) + r["posts"]
+            category = r["category"] or "—"
+            categories[category] = categories.get(category, 0) + r["posts"]
+        avg_chars = sum(r["chars"] for r in items) // posts
+        avg_words = sum(r["words"] for r in items) // posts
+        lines.append(f"{name}: {posts} постов")
+        lines.append("  Платформы: " + ", ".join(f"{k} {v}" for k, v in platforms.items()))
+        lines.append("  Рубрики: " + ", ".join(f"{k} {v}" for k, v in categories.items()))
+        lines.append(f"  Средняя длина: {avg_chars} символов, {avg_words} слов")
+    return "\n".join(lines)